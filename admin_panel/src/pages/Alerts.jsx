@@ -48,8 +48,17 @@ function Alerts() {
       } else if (filter === 2) {
         params.resolved = true;
       }
-      const response = await api.get('/admin/alerts', { params });
-      setAlerts(response.data.alerts || []);
+      // The API returns alerts a page at a time; follow next_cursor to the end
+      const allAlerts = [];
+      let cursor = null;
+      do {
+        const response = await api.get('/admin/alerts', {
+          params: cursor ? { ...params, cursor } : params,
+        });
+        allAlerts.push(...(response.data.alerts || []));
+        cursor = response.data.next_cursor;
+      } while (cursor);
+      setAlerts(allAlerts);
     } catch (error) {
       console.error('Failed to load alerts:', error);
     } finally {
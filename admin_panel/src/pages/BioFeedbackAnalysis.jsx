@@ -104,7 +104,11 @@ function BioFeedbackRow({ user }) {
         try {
             // In a real scenario, we'd fetch specific bio-feedback data for this user
             // For now, we'll simulate fetching from the profile or a specialized endpoint
-            const response = await api.get(`/admin/users/${user.id}/profile`);
+            // Only biofeedback and statistics are read here, so one session is
+            // enough of the paged session list (the statistics cover every session)
+            const response = await api.get(`/admin/users/${user.id}/profile`, {
+                params: { limit: 1 },
+            });
             const profile = response.data;
 
             // Extract real data from biofeedback collection
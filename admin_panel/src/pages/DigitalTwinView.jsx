@@ -23,7 +23,11 @@ function DigitalTwinView() {
 
   const loadDigitalTwin = async () => {
     try {
-      const response = await api.get(`/admin/users/${userId}/profile`);
+      // Only the digital twin is read here, so one session is enough of the
+      // paged session list (the session totals cover every session)
+      const response = await api.get(`/admin/users/${userId}/profile`, {
+        params: { limit: 1 },
+      });
       const twinData = response.data.digital_twin;
       
       if (twinData) {
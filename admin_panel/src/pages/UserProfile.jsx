@@ -27,8 +27,18 @@ function UserProfile() {
 
   const loadProfile = async () => {
     try {
+      // The API returns sessions a page at a time; follow next_cursor to the end
       const response = await api.get(`/admin/users/${userId}/profile`);
-      setProfile(response.data);
+      const sessions = [...(response.data.sessions || [])];
+      let cursor = response.data.next_cursor;
+      while (cursor) {
+        const page = await api.get(`/admin/users/${userId}/profile`, {
+          params: { after: cursor },
+        });
+        sessions.push(...(page.data.sessions || []));
+        cursor = page.data.next_cursor;
+      }
+      setProfile({ ...response.data, sessions });
     } catch (error) {
       console.error('Failed to load profile:', error);
     } finally {
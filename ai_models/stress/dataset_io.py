@@ -0,0 +1,58 @@
+"""
+dataset_io.py
+=============
+Storage helpers for the intermediate keystroke stress datasets
+(cmu_baseline_reps, participant_stress_reps, combined_labeled).
+
+Datasets are written as zstd-compressed Parquet so the trainer reads typed
+columns back without re-parsing text floats. If no Parquet engine (pyarrow)
+is installed, they fall back to CSV with the same stem; pass --csv to the
+builder scripts to also keep a CSV copy for inspection.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+
+def dataset_path(path: Path) -> Optional[Path]:
+    """Existing file for a dataset: the Parquet file, else its CSV fallback."""
+    for candidate in (path, path.with_suffix(".csv")):
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def write_dataset(df: pd.DataFrame, path: Path, csv: bool = False) -> Path:
+    """Write df to path (.parquet); returns the file actually written."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    csv_path = path.with_suffix(".csv")
+    try:
+        df.to_parquet(path, index=False, compression="zstd")
+    except ImportError:
+        print("  [dataset_io] No Parquet engine installed — writing CSV instead.")
+        # A Parquet file from an earlier run would otherwise shadow this one
+        path.unlink(missing_ok=True)
+        df.to_csv(csv_path, index=False)
+        return csv_path
+
+    if csv:
+        df.to_csv(csv_path, index=False)
+    return path
+
+
+def read_dataset(path: Path, dtype: Optional[dict] = None) -> pd.DataFrame:
+    """Read a dataset written by write_dataset(), optionally casting columns."""
+    found = dataset_path(path)
+    if found is None:
+        raise FileNotFoundError(f"Missing {path}")
+    if found.suffix == ".parquet":
+        df = pd.read_parquet(found)
+        return df.astype(dtype) if dtype else df
+    try:
+        # Multi-threaded Arrow parser, straight into the requested dtypes
+        return pd.read_csv(found, engine="pyarrow", dtype=dtype)
+    except ImportError:
+        return pd.read_csv(found, engine="c", dtype=dtype)
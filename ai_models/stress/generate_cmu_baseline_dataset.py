@@ -33,19 +33,22 @@ Label rationale (Akanksha et al. JETIR 2021):
 
 Usage:
 ------
-  python ai_models/stress/generate_cmu_baseline_dataset.py
+  python ai_models/stress/generate_cmu_baseline_dataset.py [--csv]
 
 Output:
 -------
-  ai_models/stress/data/cmu_baseline_reps.csv
+  ai_models/stress/data/cmu_baseline_reps.parquet  (+ .csv with --csv)
 """
 
 from __future__ import annotations
+import sys
 import numpy as np
 import pandas as pd
 from pathlib import Path
 
-OUT = Path(__file__).parent / "data" / "cmu_baseline_reps.csv"
+from dataset_io import write_dataset
+
+OUT = Path(__file__).parent / "data" / "cmu_baseline_reps.parquet"
 RNG = np.random.default_rng(42)
 
 # ── CMU statistical parameters from Killourhy & Maxion (2009) ───────────────
@@ -82,70 +85,82 @@ N_SESSIONS = 8
 N_REPS     = 50
 
 
-def generate_subject(subject_id: int) -> list[dict]:
-    """Generate N_SESSIONS * N_REPS repetitions for one subject."""
-    # Per-subject typing profile (individual differences)
-    subj_hold_mean = max(0.06, RNG.normal(HOLD_MEAN_MU, HOLD_MEAN_STD))
-    subj_dd_mean   = max(0.08, RNG.normal(DD_MEAN_MU,   DD_MEAN_STD))
-    subj_ud_mean   = RNG.normal(UD_MEAN_MU, UD_MEAN_STD)
-    subj_speed     = max(1.5, RNG.normal(SPEED_MU, SPEED_STD))
-
-    rows = []
-    for session in range(1, N_SESSIONS + 1):
-        # Session warm-up: first few reps slightly slower
-        warmup_factor = 1.0 + max(0, (3 - session) * 0.05)
-
-        for rep in range(1, N_REPS + 1):
-            rep_factor = 1.0 + max(0, (5 - rep) * 0.02) if rep <= 5 else 1.0
-
-            hold_mean = abs(RNG.normal(subj_hold_mean * warmup_factor * rep_factor,
-                                       HOLD_STD_MU * 0.3))
-            hold_std  = abs(RNG.normal(HOLD_STD_MU, HOLD_STD_STD))
-            dd_mean   = abs(RNG.normal(subj_dd_mean * warmup_factor,
-                                       DD_STD_MU * 0.3))
-            dd_std    = abs(RNG.normal(DD_STD_MU, DD_STD_STD))
-            ud_mean   = RNG.normal(subj_ud_mean, UD_STD_MU * 0.3)
-            ud_std    = abs(RNG.normal(UD_STD_MU, UD_STD_STD))
-            speed     = max(0.5, RNG.normal(subj_speed / (warmup_factor * rep_factor),
-                                            SPEED_STD * 0.4))
-            bsp_ratio = float(RNG.beta(BSP_ALPHA, BSP_BETA))
-
-            # Long pause ratio — relaxed typists rarely pause > 1s during a single rep
-            long_dd = float(RNG.beta(1.0, 15.0))   # mean ~6%
-            long_ud = float(RNG.beta(1.0, 25.0))   # mean ~4%
-
-            rows.append({
-                "User_ID":              f"CMU_s{subject_id:03d}",
-                "Session_ID":           session,
-                "rep_num":              rep,
-                "hold_mean":            round(hold_mean, 6),
-                "hold_std":             round(hold_std,  6),
-                "dd_mean":              round(dd_mean,   6),
-                "dd_std":               round(dd_std,    6),
-                "ud_mean":              round(ud_mean,   6),
-                "ud_std":               round(ud_std,    6),
-                "long_pause_dd_ratio":  round(long_dd,   6),
-                "long_pause_ud_ratio":  round(long_ud,   6),
-                "backspace_ratio":      round(bsp_ratio, 6),
-                "typing_speed_cps":     round(speed,     6),
-                "data_source":          "CMU_DSL_synthetic",
-                # LOW stress label — relaxed lab typing, no stress induction
-                "stress_label":         0,
-            })
-    return rows
-
-
-def main() -> None:
-    OUT.parent.mkdir(parents=True, exist_ok=True)
+def generate_dataset() -> pd.DataFrame:
+    """
+    Generate N_SUBJECTS * N_SESSIONS * N_REPS repetitions in one batch.
+
+    Every feature is drawn as a (subject, session, rep) array so the RNG runs
+    once per field instead of once per repetition.
+    """
+    shape = (N_SUBJECTS, N_SESSIONS, N_REPS)
+
+    # Per-subject typing profile (individual differences), broadcast over reps
+    subj_hold_mean = np.maximum(0.06, RNG.normal(HOLD_MEAN_MU, HOLD_MEAN_STD, N_SUBJECTS))[:, None, None]
+    subj_dd_mean   = np.maximum(0.08, RNG.normal(DD_MEAN_MU,   DD_MEAN_STD,   N_SUBJECTS))[:, None, None]
+    subj_ud_mean   = RNG.normal(UD_MEAN_MU, UD_MEAN_STD, N_SUBJECTS)[:, None, None]
+    subj_speed     = np.maximum(1.5, RNG.normal(SPEED_MU, SPEED_STD, N_SUBJECTS))[:, None, None]
+
+    sessions = np.arange(1, N_SESSIONS + 1)
+    reps     = np.arange(1, N_REPS + 1)
+
+    # Session warm-up and first-reps slowdown
+    warmup_factor = (1.0 + np.maximum(0, 3 - sessions) * 0.05)[None, :, None]
+    rep_factor    = (1.0 + np.maximum(0, 5 - reps) * 0.02)[None, None, :]
+
+    hold_mean = np.abs(RNG.normal(subj_hold_mean * warmup_factor * rep_factor,
+                                  HOLD_STD_MU * 0.3, shape))
+    hold_std  = np.abs(RNG.normal(HOLD_STD_MU, HOLD_STD_STD, shape))
+    dd_mean   = np.abs(RNG.normal(subj_dd_mean * warmup_factor,
+                                  DD_STD_MU * 0.3, shape))
+    dd_std    = np.abs(RNG.normal(DD_STD_MU, DD_STD_STD, shape))
+    ud_mean   = RNG.normal(subj_ud_mean, UD_STD_MU * 0.3, shape)
+    ud_std    = np.abs(RNG.normal(UD_STD_MU, UD_STD_STD, shape))
+    speed     = np.maximum(0.5, RNG.normal(subj_speed / (warmup_factor * rep_factor),
+                                           SPEED_STD * 0.4, shape))
+    bsp_ratio = RNG.beta(BSP_ALPHA, BSP_BETA, shape)
+
+    # Long pause ratio — relaxed typists rarely pause > 1s during a single rep
+    long_dd = RNG.beta(1.0, 15.0, shape)   # mean ~6%
+    long_ud = RNG.beta(1.0, 25.0, shape)   # mean ~4%
+
+    # One preallocated (feature, row) block: fill, round once in place, then
+    # hand each row to the frame as a column without another copy.
+    float_cols = {
+        "hold_mean":            hold_mean,
+        "hold_std":             hold_std,
+        "dd_mean":              dd_mean,
+        "dd_std":               dd_std,
+        "ud_mean":              ud_mean,
+        "ud_std":               ud_std,
+        "long_pause_dd_ratio":  long_dd,
+        "long_pause_ud_ratio":  long_ud,
+        "backspace_ratio":      bsp_ratio,
+        "typing_speed_cps":     speed,
+    }
+    n_rows = hold_mean.size
+    block  = np.empty((len(float_cols), n_rows), dtype=np.float64)
+    for i, values in enumerate(float_cols.values()):
+        block[i] = values.ravel()
+    np.round(block, 6, out=block)
+
+    user_ids = np.array([f"CMU_s{sid:03d}" for sid in range(1, N_SUBJECTS + 1)], dtype=object)
+    return pd.DataFrame({
+        "User_ID":              np.repeat(user_ids, N_SESSIONS * N_REPS),
+        "Session_ID":           np.tile(np.repeat(sessions, N_REPS), N_SUBJECTS),
+        "rep_num":              np.tile(reps, N_SUBJECTS * N_SESSIONS),
+        **dict(zip(float_cols, block)),
+        "data_source":          "CMU_DSL_synthetic",
+        # LOW stress label — relaxed lab typing, no stress induction
+        "stress_label":         np.zeros(n_rows, dtype=np.int64),
+    }, copy=False)
+
+
+def main(csv: bool = False) -> None:
     print("Generating CMU baseline dataset (51 subjects × 8 sessions × 50 reps)...")
-    all_rows = []
-    for sid in range(1, N_SUBJECTS + 1):
-        all_rows.extend(generate_subject(sid))
-
-    df = pd.DataFrame(all_rows)
-    df.to_csv(OUT, index=False)
+    df  = generate_dataset()
+    out = write_dataset(df, OUT, csv=csv)
 
-    print(f"Generated {len(df):,} rows → {OUT}")
+    print(f"Generated {len(df):,} rows → {out}")
     print("\nFeature summary (should match Killourhy & Maxion 2009 statistics):")
     print(df[["hold_mean", "dd_mean", "typing_speed_cps",
               "backspace_ratio", "long_pause_dd_ratio"]].describe().round(4).to_string())
@@ -153,4 +168,4 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    main(csv="--csv" in sys.argv[1:])
@@ -32,25 +32,28 @@ Scoring: each signal above counts +1. Total score → label:
 
 Usage:
 ------
-  python ai_models/stress/parse_raw_keystroke_data.py
+  python ai_models/stress/parse_raw_keystroke_data.py [--csv]
 
 Output:
 -------
-  ai_models/stress/data/participant_stress_reps.csv
+  ai_models/stress/data/participant_stress_reps.parquet  (+ .csv with --csv)
 """
 
 from __future__ import annotations
 import glob
+import sys
 import numpy as np
 import pandas as pd
 from pathlib import Path
 
+from dataset_io import write_dataset
+
 # Raw data lives in the backend data folder
 RAW_GLOB = str(
     Path(__file__).resolve().parent.parent.parent
     / "backend" / "app" / "data" / "keystroke_stress" / "*_keystroke_raw.csv"
 )
-OUT = Path(__file__).parent / "data" / "participant_stress_reps.csv"
+OUT = Path(__file__).parent / "data" / "participant_stress_reps.parquet"
 
 # ── Akanksha et al. (JETIR 2021) absolute stress thresholds ─────────────────
 THR_HOLD_MEAN        = 0.30   # seconds — dwell time
@@ -60,95 +63,178 @@ THR_BACKSPACE_RATIO  = 0.08   # proportion
 THR_LONG_PAUSE_RATIO = 0.18   # proportion of DD intervals > 1s
 
 
+# Only the columns the rep parser reads; timing columns stay untyped because
+# some exports contain stray tokens there (coerced later with pd.to_numeric).
+RAW_USECOLS = ["User_ID", "Session_ID", "Key_Pressed", "Press_Time", "Hold_Time", "DD", "UD"]
+RAW_DTYPES  = {"User_ID": str, "Key_Pressed": str}
+
+
+def read_raw_csv(path: str) -> pd.DataFrame:
+    """Read one raw keystroke CSV with pyarrow, falling back to the C parser."""
+    try:
+        return pd.read_csv(path, engine="pyarrow", on_bad_lines="skip",
+                           usecols=RAW_USECOLS, dtype=RAW_DTYPES)
+    except (ImportError, ValueError):
+        # pyarrow missing, or a pandas version whose pyarrow engine lacks on_bad_lines
+        return pd.read_csv(path, engine="c", on_bad_lines="skip",
+                           usecols=RAW_USECOLS, dtype=RAW_DTYPES)
+
+
+# Key tokens are enumerated pynput names, so a set lookup replaces the regex scan
+BSP_KEYS = {"key.backspace", "backspace", "\b"}
+
+
+def _is_backspace(keys: np.ndarray) -> np.ndarray:
+    """Boolean backspace mask; each distinct key token is checked only once."""
+    codes, uniques = pd.factorize(keys)
+    lut = np.fromiter((str(k).lower() in BSP_KEYS for k in uniques), dtype=bool, count=len(uniques))
+    return lut[codes]
+
+
+REP_COLUMNS = [
+    "User_ID", "Session_ID", "rep_num",
+    "hold_mean", "hold_std", "dd_mean", "dd_std", "ud_mean", "ud_std",
+    "long_pause_dd_ratio", "long_pause_ud_ratio",
+    "backspace_ratio", "typing_speed_cps", "data_source",
+]
+
+
+def _rep_boundaries(is_enter: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return [start, end) row ranges of each repetition.
+    An Enter only closes a repetition once more than 4 keys are buffered;
+    shorter runs carry over into the next attempt.
+    """
+    starts, ends = [], []
+    start = 0
+    for i in np.flatnonzero(is_enter):
+        if i - start + 1 > 4:
+            starts.append(start)
+            ends.append(i + 1)
+            start = i + 1
+    return np.asarray(starts, dtype=np.intp), np.asarray(ends, dtype=np.intp)
+
+
+def _segment_stats(values: np.ndarray, mask: np.ndarray,
+                   starts: np.ndarray, lengths: np.ndarray):
+    """
+    Per-segment count, mean, sample std and >1s ratio of values[mask].
+    values/mask are (rows, k): all k timing columns are reduced together,
+    one reduceat per statistic, and results come back as (segments, k).
+    """
+    n     = np.add.reduceat(mask.astype(np.int64), starts, axis=0)
+    total = np.add.reduceat(np.where(mask, values, 0.0), starts, axis=0)
+    mean  = total / n
+    dev   = np.where(mask, values - np.repeat(mean, lengths, axis=0), 0.0)
+    std   = np.sqrt(np.add.reduceat(dev * dev, starts, axis=0) / (n - 1))
+    std[n < 2] = np.nan
+    long_ratio = np.add.reduceat(mask & (values > 1.0), starts, axis=0) / n
+    return n, mean, std, long_ratio
+
+
+def _empty_rep_columns() -> dict[str, np.ndarray]:
+    cols = {col: np.empty(0, dtype=np.float64) for col in REP_COLUMNS}
+    cols["User_ID"]     = np.empty(0, dtype=object)
+    cols["Session_ID"]  = np.empty(0, dtype=np.int64)
+    cols["rep_num"]     = np.empty(0, dtype=np.int64)
+    cols["data_source"] = np.empty(0, dtype=object)
+    return cols
+
+
+def _rep_columns(session_df: pd.DataFrame,
+                 user_id: str,
+                 session_id: int) -> dict[str, np.ndarray]:
+    """Rep-level features of one session as a dict of REP_COLUMNS arrays."""
+    keys     = session_df["Key_Pressed"].astype(str).to_numpy()
+    is_enter = keys == "Key.enter"
+
+    starts, ends = _rep_boundaries(is_enter)
+    if not len(starts):
+        return _empty_rep_columns()
+
+    # Repetitions are contiguous, so reduceat over the trimmed arrays
+    # yields exactly one value per [start, end) range.
+    stop    = ends[-1]
+    lengths = ends - starts
+    numeric = {
+        col: pd.to_numeric(session_df[col].iloc[:stop], errors="coerce").to_numpy(dtype=np.float64)
+        for col in ("Hold_Time", "DD", "UD", "Press_Time")
+    }
+    typing = ~is_enter[:stop]
+    is_bsp = _is_backspace(keys[:stop])
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n_typing = np.add.reduceat(typing.astype(np.int64), starts)
+
+        timing = np.column_stack([numeric["Hold_Time"], numeric["DD"], numeric["UD"]])
+        _, mean, std, long_ratio = _segment_stats(
+            timing, typing[:, None] & ~np.isnan(timing), starts, lengths
+        )
+        feats = {}
+        for j, name in enumerate(("hold", "dd", "ud")):
+            feats[f"{name}_mean"] = mean[:, j]
+            feats[f"{name}_std"]  = std[:, j]
+            feats[f"{name}_long"] = long_ratio[:, j]
+
+        pt       = numeric["Press_Time"]
+        pt_ok    = ~np.isnan(pt)
+        n_pt     = np.add.reduceat(pt_ok.astype(np.int64), starts)
+        pt_max   = np.maximum.reduceat(np.where(pt_ok, pt, -np.inf), starts)
+        pt_min   = np.minimum.reduceat(np.where(pt_ok, pt,  np.inf), starts)
+        duration = np.where(n_pt >= 2, pt_max - pt_min, np.nan)
+        speed    = np.where(duration > 0, lengths / duration, np.nan)
+        bsp      = np.add.reduceat(is_bsp.astype(np.int64), starts) / lengths
+
+    keep   = n_typing >= 5
+    n_keep = int(keep.sum())
+    return {
+        "User_ID":              np.full(n_keep, user_id, dtype=object),
+        "Session_ID":           np.full(n_keep, session_id, dtype=np.int64),
+        "rep_num":              np.arange(n_keep, dtype=np.int64),
+        "hold_mean":            feats["hold_mean"][keep],
+        "hold_std":             feats["hold_std"][keep],
+        "dd_mean":              feats["dd_mean"][keep],
+        "dd_std":               feats["dd_std"][keep],
+        "ud_mean":              feats["ud_mean"][keep],
+        "ud_std":               feats["ud_std"][keep],
+        "long_pause_dd_ratio":  feats["dd_long"][keep],
+        "long_pause_ud_ratio":  feats["ud_long"][keep],
+        "backspace_ratio":      bsp[keep],
+        "typing_speed_cps":     speed[keep],
+        "data_source":          np.full(n_keep, "participant_raw_data", dtype=object),
+    }
+
+
 def parse_repetitions(session_df: pd.DataFrame,
                        user_id: str,
-                       session_id: int) -> list[dict]:
+                       session_id: int) -> pd.DataFrame:
     """
     Split a session's raw keystrokes into individual password repetitions
     (each terminated by an Enter keypress) and compute rep-level features.
     """
-    rows: list[dict] = []
-    buffer: list = []
-    rep_num = 0
-
-    for _, row in session_df.iterrows():
-        buffer.append(row)
-        if row["Key_Pressed"] == "Key.enter" and len(buffer) > 4:
-            rep_df = pd.DataFrame(buffer)
-
-            # Exclude the terminal Enter from timing stats
-            typing = rep_df[rep_df["Key_Pressed"] != "Key.enter"]
-            is_bsp = rep_df["Key_Pressed"].astype(str).str.contains(
-                "backspace", case=False, na=False
-            )
-
-            if len(typing) < 5:
-                buffer = []
-                continue
-
-            hold_vals = pd.to_numeric(typing["Hold_Time"], errors="coerce").dropna()
-            dd_vals   = pd.to_numeric(typing["DD"],        errors="coerce").dropna()
-            ud_vals   = pd.to_numeric(typing["UD"],        errors="coerce").dropna()
-            pt        = pd.to_numeric(rep_df["Press_Time"], errors="coerce").dropna()
-
-            duration  = float(pt.max() - pt.min()) if len(pt) >= 2 else np.nan
-            key_count = len(rep_df)
-            speed     = key_count / duration if (duration and duration > 0) else np.nan
-
-            rows.append({
-                "User_ID":              user_id,
-                "Session_ID":           session_id,
-                "rep_num":              rep_num,
-                "hold_mean":            float(hold_vals.mean()) if len(hold_vals) else np.nan,
-                "hold_std":             float(hold_vals.std())  if len(hold_vals) else np.nan,
-                "dd_mean":              float(dd_vals.mean())   if len(dd_vals)   else np.nan,
-                "dd_std":               float(dd_vals.std())    if len(dd_vals)   else np.nan,
-                "ud_mean":              float(ud_vals.mean())   if len(ud_vals)   else np.nan,
-                "ud_std":               float(ud_vals.std())    if len(ud_vals)   else np.nan,
-                "long_pause_dd_ratio":  float((dd_vals > 1.0).mean()) if len(dd_vals) else np.nan,
-                "long_pause_ud_ratio":  float((ud_vals > 1.0).mean()) if len(ud_vals) else np.nan,
-                "backspace_ratio":      float(is_bsp.sum() / key_count),
-                "typing_speed_cps":     speed,
-                "data_source":          "participant_raw_data",
-            })
-            rep_num += 1
-            buffer = []
-
-    return rows
-
-
-def assign_stress_label(row: pd.Series) -> int:
+    return pd.DataFrame(_rep_columns(session_df, user_id, session_id), columns=REP_COLUMNS)
+
+
+def assign_stress_labels(feat_df: pd.DataFrame) -> np.ndarray:
     """
     Multi-signal stress scoring grounded in Akanksha et al. (JETIR 2021).
     Each criterion maps to one stress signal; sum → 3-tier label.
+    Missing feature values never count as a signal (NaN comparisons are False).
     """
-    score = 0
-
-    if pd.notna(row["hold_mean"]) and row["hold_mean"] > THR_HOLD_MEAN:
-        score += 1
-
-    if pd.notna(row["dd_mean"]) and row["dd_mean"] > THR_DD_MEAN:
-        score += 1
-
-    if pd.notna(row["typing_speed_cps"]) and row["typing_speed_cps"] < THR_TYPING_SPEED:
-        score += 1
-
-    if pd.notna(row["backspace_ratio"]) and row["backspace_ratio"] > THR_BACKSPACE_RATIO:
-        score += 1
-
-    if pd.notna(row["long_pause_dd_ratio"]) and row["long_pause_dd_ratio"] > THR_LONG_PAUSE_RATIO:
-        score += 1
+    signals = (
+        feat_df["hold_mean"].to_numpy()           > THR_HOLD_MEAN,
+        feat_df["dd_mean"].to_numpy()             > THR_DD_MEAN,
+        feat_df["typing_speed_cps"].to_numpy()    < THR_TYPING_SPEED,
+        feat_df["backspace_ratio"].to_numpy()     > THR_BACKSPACE_RATIO,
+        feat_df["long_pause_dd_ratio"].to_numpy() > THR_LONG_PAUSE_RATIO,
+    )
+    score = np.add.reduce([s.astype(np.int8) for s in signals])
 
-    if score <= 1:
-        return 0   # Low
-    elif score == 2:
-        return 1   # Medium
-    else:
-        return 2   # High
+    # 0 (Low): score ≤ 1, 1 (Medium): score = 2, 2 (High): score ≥ 3
+    return np.where(score <= 1, 0, np.where(score == 2, 1, 2)).astype(np.int8)
 
 
-def main() -> None:
-    OUT.parent.mkdir(parents=True, exist_ok=True)
+def main(csv: bool = False) -> None:
     paths = sorted(glob.glob(RAW_GLOB))
     if not paths:
         raise FileNotFoundError(
@@ -158,31 +244,33 @@ def main() -> None:
 
     print(f"Found {len(paths)} raw CSV files.")
 
-    all_reps: list[dict] = []
+    all_reps: list[dict[str, np.ndarray]] = []
     for p in paths:
         try:
-            df = pd.read_csv(p, engine="python", on_bad_lines="skip")
+            df = read_raw_csv(p)
         except Exception as e:
             print(f"  Skipping {p}: {e}")
             continue
 
-        for uid in df["User_ID"].dropna().unique():
-            for sid in df[df["User_ID"] == uid]["Session_ID"].dropna().unique():
-                sess = df[(df["User_ID"] == uid) & (df["Session_ID"] == sid)]
-                reps = parse_repetitions(sess, str(uid), int(sid))
-                all_reps.extend(reps)
+        # One hash partition per file instead of a full-frame mask per session
+        for (uid, sid), sess in df.groupby(["User_ID", "Session_ID"], sort=False):
+            all_reps.append(_rep_columns(sess, str(uid), int(sid)))
         print(f"  Parsed: {Path(p).name}")
 
-    feat_df = pd.DataFrame(all_reps)
+    # Concatenate column-wise and box into a frame once
+    feat_df = pd.DataFrame({
+        col: np.concatenate([reps[col] for reps in all_reps])
+        for col in REP_COLUMNS
+    }) if all_reps else pd.DataFrame(_empty_rep_columns())
 
     # Drop rows with too many NaN features
     feat_df = feat_df.dropna(subset=["hold_mean", "dd_mean", "typing_speed_cps"])
 
     # Apply absolute stress labels
-    feat_df["stress_label"] = feat_df.apply(assign_stress_label, axis=1)
+    feat_df["stress_label"] = assign_stress_labels(feat_df)
 
-    feat_df.to_csv(OUT, index=False)
-    print(f"\nSaved {len(feat_df)} repetitions → {OUT}")
+    out = write_dataset(feat_df, OUT, csv=csv)
+    print(f"\nSaved {len(feat_df)} repetitions → {out}")
 
     print("\nLabel distribution (Akanksha et al. absolute thresholds):")
     print(feat_df["stress_label"].value_counts().sort_index()
@@ -195,4 +283,4 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    main(csv="--csv" in sys.argv[1:])
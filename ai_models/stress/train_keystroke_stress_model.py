@@ -2,20 +2,24 @@
 train_keystroke_stress_model.py
 ================================
 Merges the CMU baseline (LOW stress) and participant raw data (labeled via
-Akanksha et al. thresholds), then trains a Random Forest classifier.
+Akanksha et al. thresholds), then trains a gradient-boosted tree classifier.
 
 Pipeline:
-  1. Load data/cmu_baseline_reps.csv      (stress_label = 0, relaxed typing)
-  2. Load data/participant_stress_reps.csv (stress_label = 0/1/2, threshold-labeled)
-  3. Merge → data/combined_labeled.csv
-  4. Train: SimpleImputer → StandardScaler → RandomForestClassifier
+  1. Load data/cmu_baseline_reps.parquet      (stress_label = 0, relaxed typing)
+  2. Load data/participant_stress_reps.parquet (stress_label = 0/1/2, threshold-labeled)
+  3. Merge → data/combined_labeled.parquet
+     (each falls back to a .csv of the same name without pyarrow, see dataset_io.py)
+  4. Train: HistGradientBoostingClassifier (native NaN handling, no scaling)
   5. Save → backend/models/keystroke_stress/keystroke_stress_model.joblib
 
 Model rationale — Akanksha et al. (JETIR 2021):
-  Random Forest was found to be the best-performing classifier for
+  Tree ensembles (Random Forest) were the best-performing classifiers for
   multi-class cognitive stress classification via keystroke dynamics,
   outperforming SVM, k-NN, and Naive Bayes in their benchmark.
-  n_estimators=200 and class_weight='balanced' follow their recommendation.
+  The histogram-based gradient-boosted variant keeps that tree-ensemble
+  family while binning features once (O(bins) split search) and training
+  multi-threaded; it is scale-invariant and routes NaNs natively, so the
+  imputer/scaler steps are gone. class_weight='balanced' follows the paper.
 
 Usage:
 ------
@@ -31,21 +35,22 @@ Output:
 
 from __future__ import annotations
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import joblib
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.impute import SimpleImputer
-from sklearn.metrics import classification_report, confusion_matrix
-from sklearn.model_selection import StratifiedKFold, cross_val_score, train_test_split
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import StandardScaler
+
+# sklearn and joblib are imported where they are used, so importing this
+# module for FEATURE_COLS / DTYPE does not pay for them
+if TYPE_CHECKING:
+    from sklearn.pipeline import Pipeline
+
+from dataset_io import dataset_path, read_dataset, write_dataset
 
 BASE_DIR   = Path(__file__).parent
-CMU_CSV    = BASE_DIR / "data" / "cmu_baseline_reps.csv"
-YOUR_CSV   = BASE_DIR / "data" / "participant_stress_reps.csv"
-MERGED     = BASE_DIR / "data" / "combined_labeled.csv"
+CMU_DATA   = BASE_DIR / "data" / "cmu_baseline_reps.parquet"
+YOUR_DATA  = BASE_DIR / "data" / "participant_stress_reps.parquet"
+MERGED     = BASE_DIR / "data" / "combined_labeled.parquet"
 
 # Output model goes into backend/models/ — same pattern as team's other models
 MODEL_OUT  = (
@@ -65,36 +70,73 @@ FEATURE_COLS = [
 
 STRESS_LEVEL_MAP = {0: "Low", 1: "Medium", 2: "High"}
 
+# Typed on load, so both sources concatenate without upcasting
+DTYPE = {col: "float32" for col in FEATURE_COLS}
+DTYPE["stress_label"] = "int8"
+
 
 def load_and_merge() -> pd.DataFrame:
-    if not CMU_CSV.exists():
+    if dataset_path(CMU_DATA) is None:
         raise FileNotFoundError(
-            f"Missing {CMU_CSV}\n"
+            f"Missing {CMU_DATA}\n"
             "Run generate_cmu_baseline_dataset.py first."
         )
-    if not YOUR_CSV.exists():
+    if dataset_path(YOUR_DATA) is None:
         raise FileNotFoundError(
-            f"Missing {YOUR_CSV}\n"
+            f"Missing {YOUR_DATA}\n"
             "Run parse_raw_keystroke_data.py first."
         )
 
-    cmu  = pd.read_csv(CMU_CSV)
-    your = pd.read_csv(YOUR_CSV)
+    cmu  = read_dataset(CMU_DATA, dtype=DTYPE)
+    your = read_dataset(YOUR_DATA, dtype=DTYPE)
 
     print(f"CMU baseline rows  : {len(cmu):>6,}  (all label=0 / Low)")
     print(f"Participant rows   : {len(your):>6,}")
     print(f"  Label dist       : {your['stress_label'].value_counts().sort_index().to_dict()}")
 
     combined = pd.concat([cmu, your], ignore_index=True, sort=False)
-    MERGED.parent.mkdir(parents=True, exist_ok=True)
-    combined.to_csv(MERGED, index=False)
-    print(f"\nMerged dataset     : {len(combined):>6,} rows → {MERGED}")
+    merged = write_dataset(combined, MERGED)
+    print(f"\nMerged dataset     : {len(combined):>6,} rows → {merged}")
     print(f"Combined label dist: {combined['stress_label'].value_counts().sort_index().to_dict()}")
     return combined
 
 
+def batched_permutation_importance(pipe: Pipeline, X: pd.DataFrame, y: pd.Series,
+                                   n_repeats: int = 10, random_state: int = 42) -> np.ndarray:
+    """
+    Mean macro-F1 drop per feature when that feature is shuffled.
+    All n_repeats shuffles of a feature are stacked into one tiled matrix and
+    scored with a single predict call, instead of one call per repeat.
+    """
+    from sklearn.metrics import f1_score
+
+    rng   = np.random.default_rng(random_state)
+    X_np  = X.to_numpy()
+    y_np  = np.asarray(y)
+    n     = len(X_np)
+    base  = f1_score(y_np, pipe.predict(X), average="macro")
+    tiled = np.tile(X_np, (n_repeats, 1))
+
+    importances = np.empty(X_np.shape[1])
+    for j in range(X_np.shape[1]):
+        perms       = np.argsort(rng.random((n_repeats, n)), axis=1)
+        tiled[:, j] = X_np[perms.ravel(), j]
+        preds       = pipe.predict(pd.DataFrame(tiled, columns=X.columns)).reshape(n_repeats, n)
+        importances[j] = base - np.mean([f1_score(y_np, p, average="macro") for p in preds])
+        tiled[:, j] = np.tile(X_np[:, j], n_repeats)
+    return importances
+
+
 def train(df: pd.DataFrame) -> None:
-    X = df[FEATURE_COLS]
+    import joblib
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    from sklearn.metrics import classification_report, confusion_matrix
+    from sklearn.model_selection import StratifiedKFold, cross_val_score, train_test_split
+    from sklearn.pipeline import Pipeline
+
+    # float32 end to end: the forest casts to float32 internally anyway, and the
+    # serving path builds float32 feature vectors (see stress_analysis.py)
+    X = df[FEATURE_COLS].astype(np.float32)
     y = df["stress_label"].astype(int)
 
     if y.nunique() < 3:
@@ -105,19 +147,25 @@ def train(df: pd.DataFrame) -> None:
 
     # ── 5-fold cross-validation ─────────────────────────────────────────────
     pipe = Pipeline([
-        ("imputer", SimpleImputer(strategy="median")),
-        ("scaler",  StandardScaler()),
-        ("clf", RandomForestClassifier(
-            n_estimators=200,
-            max_depth=None,
+        ("clf", HistGradientBoostingClassifier(
+            max_iter=200,
+            learning_rate=0.05,
+            max_bins=255,
             class_weight="balanced",
+            early_stopping=True,
+            n_iter_no_change=20,
             random_state=42,
-            n_jobs=-1,
         )),
     ])
 
+    # One worker per fold and no more. joblib's loky backend caps each worker's
+    # OpenMP pool at cpu_count // n_jobs, so the folds' boosting threads share
+    # the cores instead of each fold spinning up a full-size pool.
     cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
-    cv_scores = cross_val_score(pipe, X, y, cv=cv, scoring="f1_macro", n_jobs=-1)
+    cv_scores = cross_val_score(
+        pipe, X, y, cv=cv, scoring="f1_macro",
+        n_jobs=cv.get_n_splits(), pre_dispatch="n_jobs",
+    )
     print(f"\n5-Fold CV macro-F1: {cv_scores.mean():.4f} ± {cv_scores.std():.4f}")
 
     # ── Hold-out test set evaluation ────────────────────────────────────────
@@ -142,17 +190,24 @@ def train(df: pd.DataFrame) -> None:
     print(cm_df.to_string())
 
     # ── Feature importance ──────────────────────────────────────────────────
-    importances = pipe.named_steps["clf"].feature_importances_
-    imp_df = pd.DataFrame({"feature": FEATURE_COLS, "importance": importances})
-    imp_df = imp_df.sort_values("importance", ascending=False)
-    print("\nFeature Importances (Random Forest):")
-    for _, row in imp_df.iterrows():
-        bar = "█" * int(row["importance"] * 50)
-        print(f"  {row['feature']:<26} {row['importance']:.4f}  {bar}")
+    # Boosted trees expose no impurity importances; use hold-out permutation
+    # importance (mean macro-F1 drop when a feature is shuffled)
+    importances = batched_permutation_importance(pipe, X_test, y_test, n_repeats=10, random_state=42)
+    order = np.argsort(importances, kind="stable")[::-1]
+    names = np.asarray(FEATURE_COLS)[order]
+    vals  = importances[order]
+    print("\nFeature Importances (permutation, hold-out macro-F1):")
+    print("\n".join(
+        f"  {name:<26} {val:.4f}  {'█' * max(int(val * 50), 0)}"
+        for name, val in zip(names, vals.tolist())
+    ))
 
     # ── Retrain on full dataset before saving ───────────────────────────────
     pipe.fit(X, y)
     MODEL_OUT.parent.mkdir(parents=True, exist_ok=True)
+    # Left uncompressed on purpose: the backend loads it with mmap_mode="r" so
+    # uvicorn workers share one page-cache copy, and joblib cannot memory-map
+    # compressed files
     joblib.dump({"model": pipe, "feature_cols": FEATURE_COLS}, MODEL_OUT)
     print(f"\nModel saved → {MODEL_OUT}")
 
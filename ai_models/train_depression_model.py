@@ -3,25 +3,24 @@ Training script for depression detection model
 """
 
 import numpy as np
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report, accuracy_score
-import joblib
 import os
 
+# pandas, sklearn and joblib are imported inside the methods that use them,
+# so importing this module (e.g. for the trainer class) stays cheap
+
 class DepressionModelTrainer:
     """Train depression detection model"""
     
     def __init__(self):
         self.model = None
-        self.scaler = StandardScaler()
+        self.scaler = None  # StandardScaler, created in train() or load_model()
         self.model_path = "./models/depression_model.pkl"
         self.scaler_path = "./models/scaler.pkl"
     
     def prepare_data(self, data_path: str):
         """Prepare training data"""
+        import pandas as pd
+        
         # Load dataset (example structure)
         # In production, load from your actual dataset
         df = pd.read_csv(data_path)
@@ -44,19 +43,29 @@ class DepressionModelTrainer:
     
     def train(self, X, y):
         """Train the model"""
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.ensemble import HistGradientBoostingClassifier
+        from sklearn.metrics import classification_report, accuracy_score
+        
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=0.2, random_state=42
         )
         
         # Scale features
+        self.scaler = StandardScaler()
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
         
-        # Train model
-        self.model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
+        # Train model (histogram GBDT: binned splits, multi-threaded, NaN-aware)
+        self.model = HistGradientBoostingClassifier(
+            max_iter=200,
+            learning_rate=0.05,
+            max_bins=255,
+            class_weight='balanced',
+            early_stopping=True,
+            n_iter_no_change=20,
             random_state=42
         )
         self.model.fit(X_train_scaled, y_train)
@@ -73,24 +82,32 @@ class DepressionModelTrainer:
     
     def save_model(self):
         """Save trained model"""
+        import joblib
+        
         os.makedirs("./models", exist_ok=True)
-        joblib.dump(self.model, self.model_path)
+        joblib.dump(self.model, self.model_path, compress=3)
         joblib.dump(self.scaler, self.scaler_path)
         print(f"Model saved to {self.model_path}")
     
     def load_model(self):
         """Load trained model"""
+        import joblib
+        
         self.model = joblib.load(self.model_path)
         self.scaler = joblib.load(self.scaler_path)
         print("Model loaded successfully")
     
-    def predict(self, features):
-        """Predict depression score"""
+    def predict_batch(self, features_2d):
+        """Predict class probabilities for a (B, F) feature matrix in one call"""
         if self.model is None:
             self.load_model()
         
-        features_scaled = self.scaler.transform([features])
-        prediction = self.model.predict_proba(features_scaled)[0]
+        features_2d = np.ascontiguousarray(features_2d, dtype=np.float32)
+        return self.model.predict_proba(self.scaler.transform(features_2d))
+    
+    def predict(self, features):
+        """Predict depression score"""
+        prediction = self.predict_batch([features])[0]
         
         return {
             'depression_score': float(prediction[1]),
@@ -2,12 +2,13 @@
 Training script for typing pattern analysis model
 """
 
+import ast
+import os
+
 import numpy as np
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import GradientBoostingClassifier
-from sklearn.metrics import classification_report
-import joblib
+
+# pandas, sklearn and joblib are imported inside the methods that use them,
+# so importing this module (e.g. for the trainer class) stays cheap
 
 class TypingModelTrainer:
     """Train typing pattern analysis model"""
@@ -34,35 +35,63 @@ class TypingModelTrainer:
     
     def prepare_data(self, data_path: str):
         """Prepare training data"""
+        import pandas as pd
+        
         df = pd.read_csv(data_path)
         
-        features_list = []
-        labels = []
+        # Parse every timing list once (stored as Python list literals, which
+        # are not always valid JSON), then reduce all rows together
+        timings = [ast.literal_eval(t) for t in df['keystroke_timings'].to_numpy()]
+        lengths = np.fromiter((len(t) for t in timings), dtype=np.int64, count=len(timings))
+        flat = np.fromiter(
+            (v for t in timings for v in t), dtype=np.float64, count=int(lengths.sum())
+        )
+        
+        X = np.column_stack([
+            *self._timing_stats(flat, lengths),
+            df[['typing_speed', 'pause_duration', 'error_rate']].to_numpy(dtype=np.float64),
+        ])
+        y = df['depression_label'].to_numpy()
         
-        for _, row in df.iterrows():
-            keystroke_data = {
-                'timings': eval(row['keystroke_timings']),
-                'typing_speed': row['typing_speed'],
-                'pause_duration': row['pause_duration'],
-                'error_rate': row['error_rate'],
-            }
-            
-            features = self.extract_features(keystroke_data)
-            features_list.append(features)
-            labels.append(row['depression_label'])
+        return X, y
+    
+    @staticmethod
+    def _timing_stats(flat: np.ndarray, lengths: np.ndarray):
+        """Per-row mean, std, min and max of concatenated timing lists"""
+        stats = np.full((4, len(lengths)), np.nan)
+        has = lengths > 0
+        if not has.any():
+            return stats
         
-        return np.array(features_list), np.array(labels)
+        # reduceat needs non-empty segments; empty rows stay NaN
+        starts = (np.cumsum(lengths) - lengths)[has]
+        n = lengths[has]
+        mean = np.add.reduceat(flat, starts) / n
+        dev = flat - np.repeat(mean, n)
+        stats[0, has] = mean
+        stats[1, has] = np.sqrt(np.add.reduceat(dev * dev, starts) / n)
+        stats[2, has] = np.minimum.reduceat(flat, starts)
+        stats[3, has] = np.maximum.reduceat(flat, starts)
+        return stats
     
     def train(self, X, y):
         """Train the model"""
+        from sklearn.model_selection import train_test_split
+        from sklearn.ensemble import HistGradientBoostingClassifier
+        from sklearn.metrics import classification_report
+        
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=0.2, random_state=42
         )
         
-        self.model = GradientBoostingClassifier(
-            n_estimators=100,
-            learning_rate=0.1,
-            max_depth=5
+        self.model = HistGradientBoostingClassifier(
+            max_iter=200,
+            learning_rate=0.05,
+            max_bins=255,
+            class_weight='balanced',
+            early_stopping=True,
+            n_iter_no_change=20,
+            random_state=42
         )
         self.model.fit(X_train, y_train)
         
@@ -73,8 +102,10 @@ class TypingModelTrainer:
     
     def save_model(self):
         """Save trained model"""
+        import joblib
+        
         os.makedirs("./models", exist_ok=True)
-        joblib.dump(self.model, self.model_path)
+        joblib.dump(self.model, self.model_path, compress=3)
         print(f"Model saved to {self.model_path}")
 
 if __name__ == "__main__":
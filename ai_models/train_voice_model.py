@@ -3,12 +3,11 @@ Training script for voice analysis model
 """
 
 import numpy as np
-import librosa
 import os
-from sklearn.model_selection import train_test_split
-from sklearn.svm import SVC
-from sklearn.metrics import classification_report
-import joblib
+from concurrent.futures import ProcessPoolExecutor
+
+# librosa, sklearn and joblib are imported inside the methods that use them,
+# so importing this module (e.g. for the trainer class) stays cheap
 
 class VoiceModelTrainer:
     """Train voice analysis model for emotion and depression detection"""
@@ -17,9 +16,27 @@ class VoiceModelTrainer:
         self.model = None
         self.model_path = "./models/voice_model.pkl"
     
+    def load_audio(self, audio_path: str):
+        """Load mono 22050 Hz audio, decoding each file only once"""
+        # The decoded waveform is kept next to the source file as .22k.npy, so
+        # later runs memory-map it instead of decoding and resampling again
+        import librosa
+        
+        sr = 22050
+        cache_path = audio_path + '.22k.npy'
+        if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(audio_path):
+            return np.load(cache_path, mmap_mode='r'), sr
+        
+        y, sr = librosa.load(audio_path, sr=sr, mono=True)
+        y = y.astype(np.float32, copy=False)
+        np.save(cache_path, y)
+        return y, sr
+    
     def extract_features(self, audio_path: str):
         """Extract features from audio file"""
-        y, sr = librosa.load(audio_path, sr=22050)
+        import librosa
+        
+        y, sr = self.load_audio(audio_path)
         
         # Extract features
         mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
@@ -37,31 +54,47 @@ class VoiceModelTrainer:
     
     def prepare_data(self, data_dir: str):
         """Prepare training data from audio files"""
-        features_list = []
+        audio_paths = []
         labels = []
         
         # Load audio files and labels
         # Adjust based on your data structure
         for file in os.listdir(data_dir):
             if file.endswith('.wav') or file.endswith('.mp3'):
-                audio_path = os.path.join(data_dir, file)
-                features = self.extract_features(audio_path)
-                features_list.append(features)
+                audio_paths.append(os.path.join(data_dir, file))
                 
                 # Extract label from filename or metadata
                 # Adjust based on your labeling system
                 label = 0  # Placeholder
                 labels.append(label)
         
+        # Decoding and feature extraction are CPU-bound and independent per
+        # file, so spread them over one process per core
+        with ProcessPoolExecutor() as ex:
+            features_list = list(ex.map(self.extract_features, audio_paths, chunksize=8))
+        
         return np.array(features_list), np.array(labels)
     
     def train(self, X, y):
         """Train the model"""
+        from sklearn.model_selection import train_test_split
+        from sklearn.ensemble import HistGradientBoostingClassifier
+        from sklearn.metrics import classification_report
+        
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=0.2, random_state=42
         )
         
-        self.model = SVC(kernel='rbf', probability=True)
+        # Histogram GBDT trains in linear time on the (N, 15) feature matrix,
+        # unlike RBF-SVC whose probability=True also runs an internal 5-fold CV
+        self.model = HistGradientBoostingClassifier(
+            max_iter=300,
+            learning_rate=0.05,
+            max_depth=None,
+            class_weight='balanced',
+            early_stopping=True,
+            random_state=42
+        )
         self.model.fit(X_train, y_train)
         
         # Evaluate
@@ -71,8 +104,10 @@ class VoiceModelTrainer:
     
     def save_model(self):
         """Save trained model"""
+        import joblib
+        
         os.makedirs("./models", exist_ok=True)
-        joblib.dump(self.model, self.model_path)
+        joblib.dump(self.model, self.model_path, compress=3)
         print(f"Model saved to {self.model_path}")
 
 if __name__ == "__main__":
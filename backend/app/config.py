@@ -4,6 +4,7 @@ Configuration settings for the application
 
 import os
 import json
+from functools import lru_cache
 from typing import List, Union
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
@@ -23,6 +24,13 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # argon2id cost for new password hashes (OWASP minimum: 19 MiB, 2 passes);
+    # stored hashes made with other settings or with bcrypt are rehashed on
+    # the user's next successful login
+    ARGON2_MEMORY_COST_KIB: int = 19456
+    ARGON2_TIME_COST: int = 2
+    ARGON2_PARALLELISM: int = 1
+    
     # CORS settings
     ALLOWED_ORIGINS: Union[str, List[str]] = "*"
     
@@ -52,6 +60,14 @@ class Settings(BaseSettings):
     
     # Firebase settings
     FIREBASE_CREDENTIALS: str = os.getenv("FIREBASE_CREDENTIALS", "")
+    # Worker threads of the event loop's default executor, which runs every
+    # blocking Firestore call made with asyncio.to_thread, the service's
+    # gathered fan-outs included; sized for those fan-outs rather than CPU
+    # count. It bounds the RPCs that async routes have in flight. Sync routes
+    # and background tasks run on Starlette's own thread pool instead. All of
+    # them share the client's one gRPC channel, so keep this under Firestore's
+    # 100 concurrent streams per connection or calls queue client-side
+    FIRESTORE_IO_THREADS: int = 32
     
     # Google APIs
     GOOGLE_SPEECH_API_KEY: str = os.getenv("GOOGLE_SPEECH_API_KEY", "")
@@ -74,5 +90,10 @@ class Settings(BaseSettings):
         env_file = ".env"
         extra = "ignore"  # Ignore extra fields in .env (like old MySQL settings)
 
-settings = Settings()
+@lru_cache()
+def get_settings() -> Settings:
+    """Settings parsed once per process (usable as a FastAPI dependency)"""
+    return Settings()
+
+settings = get_settings()
 
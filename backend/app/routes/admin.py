@@ -2,19 +2,98 @@
 Admin panel routes for hospital management - Using Firestore
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import bisect
+import time
+from collections import OrderedDict
+from operator import itemgetter
+
+import orjson
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime, timezone
 from firebase_admin import firestore
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+from jose import JWTError, jwt
 
-from app.routes.auth import get_current_user
-from app.services.firestore_service import FirestoreService
+from app.config import settings
+from app.routes.auth import get_current_user, invalidate_user_cache, security
+from app.services.firestore_client import firestore_service
 from app.services.batch_fake_detection import BatchFakeDetectionService
 from app.services.phq9_service import PHQ9Service
 
-router = APIRouter()
-firestore_service = FirestoreService()
+try:
+    from ciso8601 import parse_datetime as _parse_iso  # C parser, accepts a trailing 'Z'
+except ImportError:
+    _parse_iso = None
+
+# Admin responses are large lists of rows; serialize them with orjson
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Dashboard and alert payloads are shared by every admin for this many
+# seconds, so a burst of page refreshes costs one set of Firestore reads
+ADMIN_CACHE_TTL_SECONDS = 30
+# Keys include client-supplied filters and cursors, so the number of
+# snapshots kept is capped; the oldest are dropped first
+ADMIN_CACHE_MAX_ENTRIES = 256
+
+class _ResponseCache:
+    """Short-lived snapshots of admin read endpoints, keyed by endpoint and filters"""
+    
+    def __init__(self, ttl: float = ADMIN_CACHE_TTL_SECONDS, maxsize: int = ADMIN_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._locks = {}
+        self._generation = 0
+    
+    def _fresh(self, key):
+        entry = self._data.get(key)
+        if entry and time.monotonic() < entry[0]:
+            return entry
+        return None
+    
+    def _evict(self):
+        """Drop expired snapshots, the oldest beyond maxsize, and locks no request holds"""
+        now = time.monotonic()
+        for key in [key for key, (expires, _) in self._data.items() if expires <= now]:
+            del self._data[key]
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        for key in [key for key, lock in self._locks.items() if key not in self._data and not lock.locked()]:
+            del self._locks[key]
+    
+    async def get_or_build(self, key, build):
+        """Return the cached value for key, or await build() once for all waiting requests"""
+        self._evict()
+        entry = self._fresh(key)
+        if entry:
+            return entry[1]
+        
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = self._fresh(key)
+            if entry:
+                return entry[1]
+            generation = self._generation
+            value = await build()
+            # Don't store a snapshot that was being built while a write cleared the cache
+            if generation == self._generation:
+                self._data[key] = (time.monotonic() + self.ttl, value)
+                self._data.move_to_end(key)
+                self._evict()
+            return value
+    
+    def clear(self):
+        """Drop every snapshot - call after any write that the admin views show"""
+        self._generation += 1
+        self._data.clear()
+        self._evict()
+
+_response_cache = _ResponseCache()
 
 def require_admin_access(current_user: dict):
     """Check if user has admin or sub-admin access"""
@@ -28,6 +107,128 @@ def require_full_admin(current_user: dict):
         raise HTTPException(status_code=403, detail="Full administrator access required")
     return True
 
+def _token_claims(credentials: HTTPAuthorizationCredentials) -> dict:
+    """Verified JWT claims, or {} if the token is invalid (get_current_user then answers 401)"""
+    try:
+        return jwt.decode(credentials.credentials, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return {}
+
+async def get_admin_user(request: Request,
+                         credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Dependency - the current user, or 403 unless admin or sub-admin"""
+    # A token whose role claims say neither admin nor sub-admin is refused
+    # without the Firestore user lookup; positive claims still load the user
+    # (callers need its fields), and older tokens without claims take the full path
+    claims = _token_claims(credentials)
+    if claims.get('is_admin') is False and claims.get('is_sub_admin') is False:
+        raise HTTPException(status_code=403, detail="Admin or sub-admin access required")
+    current_user = await get_current_user(request, credentials)
+    require_admin_access(current_user)
+    return current_user
+
+async def get_full_admin_user(request: Request,
+                              credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Dependency - the current user, or 403 unless full admin"""
+    if _token_claims(credentials).get('is_admin') is False:
+        raise HTTPException(status_code=403, detail="Full administrator access required")
+    current_user = await get_current_user(request, credentials)
+    require_full_admin(current_user)
+    return current_user
+
+def _claims_user(credentials: HTTPAuthorizationCredentials) -> Optional[dict]:
+    """The caller's username and roles straight from the token, or None for older tokens without role claims"""
+    claims = _token_claims(credentials)
+    if not claims.get('sub') or 'is_admin' not in claims or 'is_sub_admin' not in claims:
+        return None
+    return {
+        'username': claims['sub'],
+        'is_admin': bool(claims['is_admin']),
+        'is_sub_admin': bool(claims['is_sub_admin'])
+    }
+
+async def get_admin_role(request: Request,
+                         credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Dependency - the caller's roles, or 403 unless admin or sub-admin
+
+    For routes that only gate on the role: the token's role claims are trusted,
+    so there is no Firestore read. Claims are set at login, so a revoked role
+    lasts until the token expires (ACCESS_TOKEN_EXPIRE_MINUTES). Routes that
+    use the user's other fields depend on get_admin_user instead.
+    """
+    role_user = _claims_user(credentials)
+    if role_user is None:
+        return await get_admin_user(request, credentials)
+    require_admin_access(role_user)
+    return role_user
+
+async def get_full_admin_role(request: Request,
+                              credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Dependency - the caller's roles, or 403 unless full admin (see get_admin_role)"""
+    role_user = _claims_user(credentials)
+    if role_user is None:
+        return await get_full_admin_user(request, credentials)
+    require_full_admin(role_user)
+    return role_user
+
+def _dt_from_datetime(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)  # stored naive values are UTC
+    return value.astimezone(timezone.utc)
+
+def _dt_from_iso(value: str) -> Optional[datetime]:
+    try:
+        if _parse_iso:
+            return _dt_from_datetime(_parse_iso(value))
+        if value.endswith('Z'):
+            value = value[:-1] + '+00:00'
+        return _dt_from_datetime(datetime.fromisoformat(value))
+    except ValueError:
+        return None
+
+# Timestamps arrive as Firestore DatetimeWithNanoseconds, plain datetimes or
+# ISO strings; dispatch on the exact type instead of an isinstance ladder per value
+_DT_PARSERS = {
+    DatetimeWithNanoseconds: _dt_from_datetime,
+    datetime: _dt_from_datetime,
+    str: _dt_from_iso,
+}
+
+# Display formats for dashboard rows, rendered in the server's local time
+_TIME_FORMAT = '%H:%M'
+_ALERT_DATE_FORMAT = '%d %B %H:%M'
+
+def _parse_dt(value) -> Optional[datetime]:
+    """Any stored timestamp as a timezone-aware UTC datetime, or None"""
+    if not value:
+        return None
+    parser = _DT_PARSERS.get(type(value))
+    if parser:
+        return parser(value)
+    if hasattr(value, 'timestamp'):  # other timestamp types
+        try:
+            return datetime.fromtimestamp(value.timestamp(), tz=timezone.utc)
+        except (TypeError, ValueError, OverflowError):
+            return None
+    return None
+
+def _iso_utc(value) -> Optional[str]:
+    """Any stored timestamp as an ISO string in UTC with a +00:00 offset, or None
+
+    The offset lets the browser convert it to the viewer's local time.
+    """
+    dt = _parse_dt(value)
+    return dt.isoformat() if dt else None
+
+def _epoch_millis(value) -> Optional[int]:
+    """Timestamp as epoch milliseconds for list payloads (stored naive values are UTC)
+
+    The admin panel reads these with new Date(...), which takes millis as readily
+    as ISO strings, and an int is smaller and cheaper to encode.
+    """
+    dt = _parse_dt(value)
+    return int(dt.timestamp() * 1000) if dt else None
+
 class AlertResponse(BaseModel):
     id: str  # Changed from int to str for Firestore
     user_id: str  # Changed from int to str
@@ -56,21 +257,97 @@ class CreateUserRequest(BaseModel):
     role: Optional[str] = None  # 'doctor' or 'nurse'
     specialization: Optional[str] = None  # Doctor specialization (e.g., 'Cardiologist', 'Psychiatrist')
 
-@router.get("/dashboard")
+@router.get("/dashboard", response_model=None)
 async def get_dashboard(
-    current_user: dict = Depends(get_current_user)
+    response_format: str = Query('json', alias='format'),  # 'json' or 'ndjson'
+    current_user: dict = Depends(get_admin_role)
 ):
     """Get admin dashboard data from Firestore (accessible by admin and sub-admin)"""
-    require_admin_access(current_user)
-    
+    # Keyed by day too, so today's appointments and new/old patient counts
+    # never carry over midnight
+    dashboard = await _response_cache.get_or_build(
+        ('dashboard', datetime.utcnow().date().isoformat()), _build_dashboard
+    )
+    if response_format == 'ndjson':
+        return StreamingResponse(_dashboard_ndjson(dashboard), media_type='application/x-ndjson')
+    return _json_response(dashboard)
+
+def _orjson_default(value):
+    """orjson fallback for Firestore timestamps and other non-native values"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+def _json_response(content) -> Response:
+    """Serialize a plain dict payload straight to JSON with orjson
+
+    Returning a Response skips FastAPI's jsonable_encoder pass, which otherwise
+    walks every row of the (possibly cached) payload on every request.
+    """
+    return Response(
+        orjson.dumps(content, default=_orjson_default, option=orjson.OPT_SERIALIZE_NUMPY),
+        media_type='application/json'
+    )
+
+def _dashboard_ndjson(dashboard: dict):
+    """Yield the dashboard as NDJSON - a summary line, then one line per user row
+
+    The summary line holds every key except users, so the client can render the
+    key metrics before the user table arrives and never holds one large JSON blob.
+    """
+    summary = {key: value for key, value in dashboard.items() if key != 'users'}
+    yield orjson.dumps(summary, default=_orjson_default) + b"\n"
+    for row in dashboard['users']:
+        yield orjson.dumps(row, default=_orjson_default) + b"\n"
+
+@router.get("/dashboard/summary", response_model=None)
+async def get_dashboard_summary(
+    current_user: dict = Depends(get_admin_role)
+):
+    """Get the dashboard key metrics and demographics only (accessible by admin and sub-admin)
+
+    Read from the session counter shards and user count aggregations, so the cost
+    does not grow with the number of users or sessions. Session totals cover
+    every session, not only those of current patients.
+    """
+    return _json_response(await _response_cache.get_or_build(('dashboard_summary',), _build_dashboard_summary))
+
+async def _build_dashboard_summary():
+    """Shape FirestoreService.aget_dashboard_summary like the dashboard's statistics"""
+    summary = await firestore_service.aget_dashboard_summary()
+    total_patients = summary['total_patients']
+    total_demo = (summary['male'] + summary['female'] + summary['other']) or 1
+    return {
+        "statistics": {
+            "appointments": summary['total_sessions'],  # Using sessions as appointments
+            "total_patients": total_patients,
+            "clinic_consulting": summary['clinic_consultations'],
+            "video_consulting": summary['video_consultations'],
+            "new_patients": summary['new_patients'],
+            "old_patients": summary['old_patients'],
+            "new_patients_percent": round(summary['new_patients'] / total_patients * 100) if total_patients else 0,
+            "old_patients_percent": round(summary['old_patients'] / total_patients * 100) if total_patients else 0
+        },
+        "demographics": {
+            gender: {"count": summary[gender], "percent": round(summary[gender] / total_demo * 100)}
+            for gender in ('male', 'female', 'other')
+        }
+    }
+
+async def _build_dashboard():
+    """Aggregate users, statistics, demographics and appointments for the dashboard"""
     try:
         from datetime import datetime, timedelta
         
         # Initialize services
         batch_fake_service = BatchFakeDetectionService()
         
-        # Get all active users
-        all_users = firestore_service.get_all_active_users()
+        # Get all active users and the pending alerts side by side; the Firestore
+        # SDK blocks, so both run in worker threads off the event loop
+        all_users, pending_alerts = await asyncio.gather(
+            asyncio.to_thread(firestore_service.get_all_active_users, firestore_service.DASHBOARD_USER_FIELDS),
+            asyncio.to_thread(firestore_service.get_alerts, resolved=False, limit=5)
+        )
         # Filter out admins and sub-admins - only include patients (regular users)
         users = [
             user for user in all_users 
@@ -89,28 +366,31 @@ async def get_dashboard(
         female_count = 0
         other_count = 0
         
-        # Today's date
-        today = datetime.utcnow().date()
-        today_start = datetime.combine(today, datetime.min.time())
+        # Today's date - one clock read for the whole build, aware UTC to match _parse_dt
+        now = datetime.now(timezone.utc)
+        today = now.date()
         
         # Appointment requests (using alerts as pending requests)
         appointment_requests = []
         
         # Today's appointments (sessions)
-        today_appointments = []
+        today_appointments = []  # (minutes since midnight, row) pairs
         
         # New vs old patients
         new_patients = 0
         old_patients = 0
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+        thirty_days_ago = now - timedelta(days=30)
+        
+        # Sessions for all patients in bulk rather than one query per patient
+        stats_by_user = await firestore_service.aget_users_statistics(users)
         
         for user in users:
             try:
                 user_id = user.get('id')
                 if not user_id: continue
                 
-                # Use optimized statistics (this now fetches sessions and mood check-ins only once internally)
-                stats = firestore_service.get_user_statistics(user_id)
+                stats = stats_by_user.get(user_id)
+                if stats is None: continue
                 
                 # Update global counters from stats
                 total_sessions += stats.get('total_sessions', 0)
@@ -119,26 +399,15 @@ async def get_dashboard(
                 
                 # Today's appointments (sessions already returned in stats)
                 for session in stats.get('sessions', []):
-                    start_time = session.get('start_time')
-                    if start_time:
-                        dt = None
-                        if hasattr(start_time, 'timestamp'):
-                            try: dt = datetime.fromtimestamp(start_time.timestamp())
-                            except: pass
-                        elif isinstance(start_time, datetime):
-                            dt = start_time
-                        elif isinstance(start_time, str):
-                            try: dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-                            except: pass
-                        
-                        if dt and dt.date() == today:
-                            today_appointments.append({
-                                "user_id": user_id,
-                                "username": user.get('username', 'Unknown'),
-                                "type": session.get('session_type', 'chatbot').replace('_', ' ').title(),
-                                "time": dt.strftime('%H:%M'),
-                                "status": "Ongoing" if not session.get('end_time') else "Completed"
-                            })
+                    dt = _parse_dt(session.get('start_time'))
+                    if dt and dt.date() == today:
+                        today_appointments.append((dt.hour * 60 + dt.minute, {
+                            "user_id": user_id,
+                            "username": user.get('username', 'Unknown'),
+                            "type": session.get('session_type', 'chatbot').replace('_', ' ').title(),
+                            "time": dt.astimezone().strftime(_TIME_FORMAT),
+                            "status": "Ongoing" if not session.get('end_time') else "Completed"
+                        }))
                 
                 # Demographics
                 gender = user.get('gender', 'other') # Use real field if exists
@@ -147,16 +416,7 @@ async def get_dashboard(
                 else: other_count += 1 # Default or use hash-based distribution if no data
                 
                 # New vs old
-                created_at = user.get('created_at')
-                user_created = datetime.utcnow()
-                if created_at:
-                    if hasattr(created_at, 'timestamp'): 
-                        try: user_created = datetime.fromtimestamp(created_at.timestamp())
-                        except: pass
-                    elif isinstance(created_at, datetime): user_created = created_at
-                    elif isinstance(created_at, str):
-                        try: user_created = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                        except: pass
+                user_created = _parse_dt(user.get('created_at')) or now
                 
                 if user_created >= thirty_days_ago: new_patients += 1
                 else: old_patients += 1
@@ -181,7 +441,7 @@ async def get_dashboard(
                     "phq9_severity": stats.get('phq9_severity'),
                     "is_fake": is_fake,
                     "fake_score": fake_score,
-                    "last_activity": stats.get('last_activity')
+                    "last_activity": _epoch_millis(stats.get('last_activity'))
                 })
                 
                 # Background task to update fake status if missing
@@ -199,44 +459,37 @@ async def get_dashboard(
                 traceback.print_exc()
                 continue
         
-        # Get appointment requests from alerts (unresolved alerts as requests)
-        alerts = firestore_service.get_alerts(resolved=False)
-        for alert in alerts[:5]:  # Limit to 5
+        # Get appointment requests from alerts (unresolved alerts as requests).
+        # Alerts carry their username; for older ones the user is usually among
+        # the active users already loaded, and any others come back in one batched read
+        request_alerts = pending_alerts[:5]  # Limit to 5
+        users_by_id = {user.get('id'): user for user in all_users if user.get('id')}
+        missing_user_ids = [
+            alert.get('user_id') for alert in request_alerts
+            if not alert.get('username') and alert.get('user_id') and alert.get('user_id') not in users_by_id
+        ]
+        if missing_user_ids:
+            users_by_id.update(await asyncio.to_thread(firestore_service.get_users_by_ids, missing_user_ids))
+        
+        for alert in request_alerts:
             user_id = alert.get('user_id')
-            user = firestore_service.get_user_by_id(user_id) if user_id else None
-            username = user.get('username', 'Unknown') if user else 'Unknown'
-            
-            # Generate a date (use alert created_at or random)
-            alert_date = alert.get('created_at')
-            date_str = datetime.utcnow().strftime('%d %B %H:%M')
+            user = users_by_id.get(user_id) if user_id else None
+            username = alert.get('username') or (user.get('username', 'Unknown') if user else 'Unknown')
+            gender = user.get('gender') if user else None  # Only shown when recorded
             
-            if alert_date:
-                # Handle Firestore Timestamp objects
-                if hasattr(alert_date, 'timestamp'):
-                    try:
-                        dt = datetime.fromtimestamp(alert_date.timestamp())
-                        date_str = dt.strftime('%d %B %H:%M')
-                    except:
-                        pass
-                elif isinstance(alert_date, datetime):
-                    date_str = alert_date.strftime('%d %B %H:%M')
-                elif isinstance(alert_date, str):
-                    try:
-                        dt = datetime.fromisoformat(alert_date.replace('Z', '+00:00'))
-                        date_str = dt.strftime('%d %B %H:%M')
-                    except:
-                        pass
+            # Date of the alert (now if it has none)
+            date_str = (_parse_dt(alert.get('created_at')) or now).astimezone().strftime(_ALERT_DATE_FORMAT)
             
             appointment_requests.append({
                 "id": alert.get('id'),
                 "user_id": user_id,
                 "username": username,
-                "details": f"{hash(user_id) % 50 + 20} {'Male' if hash(user_id) % 2 == 0 else 'Female'}, {date_str}",
+                "details": f"{gender.title()}, {date_str}" if gender else date_str,
                 "status": "Pending"  # Can be "Confirmed" or "Declined"
             })
         
         # Sort today's appointments by time
-        today_appointments.sort(key=lambda x: x.get('time', '00:00'))
+        today_appointments.sort(key=itemgetter(0))
         
         # Calculate demographics percentages
         total_demo = male_count + female_count + other_count
@@ -263,7 +516,7 @@ async def get_dashboard(
                 "other": {"count": other_count, "percent": round((other_count / total_demo * 100))}
             },
             "appointment_requests": appointment_requests[:5],  # Limit to 5
-            "today_appointments": today_appointments[:5]  # Limit to 5
+            "today_appointments": [row for _, row in today_appointments[:5]]  # Limit to 5
         }
         
     except Exception as e:
@@ -272,20 +525,38 @@ async def get_dashboard(
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to load dashboard data: {str(e)}")
 
-@router.get("/alerts")
+@router.get("/alerts", response_model=None)
 async def get_alerts(
     resolved: Optional[bool] = None,
-    current_user: dict = Depends(get_current_user)
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,  # next_cursor from the previous page
+    current_user: dict = Depends(get_admin_role)
 ):
     """Get admin alerts from Firestore (accessible by admin and sub-admin)"""
-    require_admin_access(current_user)
+    return _json_response(await _response_cache.get_or_build(
+        ('alerts', resolved, limit, cursor),
+        lambda: _build_alerts(resolved, limit, cursor)
+    ))
+
+async def _build_alerts(resolved: Optional[bool], limit: int, cursor: Optional[str]):
+    """Load one page of alerts with their usernames"""
+    # The Firestore SDK blocks, so the reads run in worker threads off the event loop
+    alerts = await asyncio.to_thread(
+        firestore_service.get_alerts, resolved=resolved, limit=limit, cursor=cursor
+    )
     
-    alerts = firestore_service.get_alerts(resolved=resolved)
+    # Alerts carry their user's username; only older alerts written before
+    # that need their users, in one batched read
+    users = await asyncio.to_thread(
+        firestore_service.get_users_by_ids,
+        [alert.get('user_id') for alert in alerts if not alert.get('username')]
+    )
     
     result = []
     for alert in alerts:
         user_id = alert.get('user_id')
-        user = firestore_service.get_user_by_id(user_id) if user_id else None
+        user = users.get(user_id) if user_id else None
+        username = alert.get('username') or (user.get('username', 'Unknown') if user else "Unknown")
         
         # Get severity from alert (either directly or derived from risk_level)
         severity = alert.get('severity') or alert.get('risk_level', 'low')
@@ -293,89 +564,84 @@ async def get_alerts(
         result.append({
             "id": alert.get('id'),
             "user_id": user_id,
-            "username": user.get('username', 'Unknown') if user else "Unknown",
+            "username": username,
             "alert_type": alert.get('alert_type', 'unknown'),
             "severity": severity,
             "risk_level": alert.get('risk_level', 'low'),
             "message": alert.get('message', ''),
             "is_resolved": alert.get('is_resolved', False),
-            "created_at": alert.get('created_at')
+            "created_at": _epoch_millis(alert.get('created_at'))
         })
     
-    return {"alerts": result}
+    # A full page means there may be more; the client passes this back as cursor
+    next_cursor = result[-1]["id"] if len(result) == limit else None
+    return {"alerts": result, "next_cursor": next_cursor}
 
 @router.post("/alerts/{alert_id}/resolve")
 async def resolve_alert(
     alert_id: str,  # Changed from int to str
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_admin_role)
 ):
     """Resolve an alert in Firestore (accessible by admin and sub-admin)"""
-    require_admin_access(current_user)
-    
-    # Check if alert exists
-    alerts = firestore_service.get_alerts()
-    alert_exists = any(a.get('id') == alert_id for a in alerts)
-    
-    if not alert_exists:
+    if not firestore_service.resolve_alert(alert_id):
         raise HTTPException(status_code=404, detail="Alert not found")
-    
-    firestore_service.resolve_alert(alert_id)
+    _response_cache.clear()
     
     return {"message": "Alert resolved", "alert_id": alert_id}
 
+def _save_session_moods(mood_updates: dict):
+    """Background task - persist moods matched to sessions by get_user_profile"""
+    try:
+        firestore_service.update_sessions(mood_updates)
+    except Exception as e:
+        print(f"[WARNING] Failed to save matched session moods: {e}")
+
 @router.get("/users/{user_id}/profile")
 async def get_user_profile(
     user_id: str,  # Changed from int to str
-    current_user: dict = Depends(get_current_user)
+    background_tasks: BackgroundTasks,
+    limit: int = Query(50, ge=1, le=200),  # sessions per page
+    offset: int = 0,
+    after: Optional[str] = None,  # next_cursor from the previous page
+    current_user: dict = Depends(get_admin_role)
 ):
     """Get detailed user profile from Firestore including mood check-ins (accessible by admin and sub-admin)"""
-    require_admin_access(current_user)
-    
-    user = firestore_service.get_user_by_id(user_id)
+    # One page of sessions (newest first, only the fields rendered below);
+    # the session totals in statistics still cover every session
+    load_sessions = asyncio.to_thread(firestore_service.get_user_sessions_page, user_id,
+                                      limit=limit, offset=offset, start_after_id=after)
+    # The user, digital twin, sessions, mood check-ins, biofeedback and session
+    # totals are independent reads, so they run side by side in worker threads
+    user, digital_twin, sessions, mood_checkins, biofeedback, session_summary = await asyncio.gather(
+        asyncio.to_thread(firestore_service.get_user_by_id, user_id),
+        asyncio.to_thread(firestore_service.get_digital_twin, user_id),
+        load_sessions,
+        asyncio.to_thread(firestore_service.get_user_mood_checkins, user_id, limit=200),
+        asyncio.to_thread(firestore_service.get_user_biofeedback_analyses, user_id, limit=1),
+        firestore_service.aget_session_summary(user_id)
+    )
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Get digital twin
-    digital_twin = firestore_service.get_digital_twin(user_id)
-    
-    # Get all sessions
-    sessions = firestore_service.get_user_sessions(user_id)
-    
-    # Get all mood check-ins
-    mood_checkins = firestore_service.get_user_mood_checkins(user_id, limit=200)
-    
-    # Create a mapping of session_id to mood check-ins (for linked check-ins)
+    # One pass over the check-ins (newest first) builds both the session_id ->
+    # mood mapping for linked check-ins and the parsed times used to match the
+    # rest to sessions by time proximity (within 1 hour of session start)
+    from datetime import timedelta
     mood_by_session_id = {}
+    timed_checkins = []
     for checkin in mood_checkins:
         session_id = checkin.get('session_id')
-        if session_id:
-            # Use the most recent mood for each session
-            if session_id not in mood_by_session_id:
-                mood_by_session_id[session_id] = checkin.get('mood')
-    
-    # Helper function to parse datetime from various formats (including Firestore timestamps)
-    def parse_datetime(dt_value):
-        if dt_value is None:
-            return None
-        if isinstance(dt_value, datetime):
-            return dt_value
-        # Handle Firestore Timestamp objects
-        if hasattr(dt_value, 'timestamp'):
-            try:
-                return datetime.fromtimestamp(dt_value.timestamp())
-            except:
-                pass
-        if isinstance(dt_value, str):
-            try:
-                # Try ISO format
-                return datetime.fromisoformat(dt_value.replace('Z', '+00:00'))
-            except:
-                pass
-        return None
-    
-    # Match mood check-ins to sessions by time proximity (within 1 hour of session start)
-    from datetime import timedelta
+        # Use the most recent mood for each session
+        if session_id and session_id not in mood_by_session_id:
+            mood_by_session_id[session_id] = checkin.get('mood')
+        checkin_time = _parse_dt(checkin.get('created_at'))
+        if checkin_time:
+            timed_checkins.append((checkin_time, checkin))
+    # Sorted once, so each session's window is found by binary search
+    timed_checkins.sort(key=lambda item: item[0])
+    checkin_times = [checkin_time for checkin_time, _ in timed_checkins]
     sessions_with_mood = []
+    mood_updates = {}  # session_id -> {'mood': ...}, saved after the response
     for session in sessions:
         session_id = session.get('id')
         session_mood = session.get('mood')  # Check if mood is already in session
@@ -386,41 +652,39 @@ async def get_user_profile(
         
         # If still no mood, try to match by time proximity (within 1 hour of session start)
         if not session_mood:
-            session_start = parse_datetime(session.get('start_time'))
+            session_start = _parse_dt(session.get('start_time'))
             if session_start:
                 one_hour_after = session_start + timedelta(hours=1)
                 one_hour_before = session_start - timedelta(hours=1)
                 
-                # Find mood check-ins within 1 hour of session start
-                for checkin in mood_checkins:
-                    checkin_time = parse_datetime(checkin.get('created_at'))
-                    if checkin_time and one_hour_before <= checkin_time <= one_hour_after:
-                        session_mood = checkin.get('mood')
-                        # Also update the session with this mood for future reference
-                        try:
-                            firestore_service.update_session(session_id, {'mood': session_mood})
-                        except:
-                            pass
-                        break
-        
-        dt = parse_datetime(session.get('start_time'))
-        start_time_iso = None
-        if dt:
-            start_time_iso = dt.isoformat()
-            if not start_time_iso.endswith('Z') and '+' not in start_time_iso:
-                start_time_iso += 'Z'
+                # Latest mood check-in within 1 hour of session start
+                lo = bisect.bisect_left(checkin_times, one_hour_before)
+                hi = bisect.bisect_right(checkin_times, one_hour_after)
+                if lo < hi:
+                    session_mood = timed_checkins[hi - 1][1].get('mood')
+                    # Also update the session with this mood for future reference
+                    if session_id:
+                        mood_updates[session_id] = {'mood': session_mood}
         
         sessions_with_mood.append({
             "id": session_id,
             "type": session.get('session_type'),
-            "start_time": start_time_iso,
+            "start_time": _iso_utc(session.get('start_time')),
             "depression_score": session.get('depression_score'),
             "risk_level": session.get('risk_level'),
             "mood": session_mood  # Include mood from session or matched check-in
         })
     
-    # Get user statistics (includes mood-based risk)
-    stats = firestore_service.get_user_statistics(user_id)
+    # Matched moods are written back in one batch once the response is sent
+    if mood_updates:
+        background_tasks.add_task(_save_session_moods, mood_updates)
+    
+    # Get user statistics (includes mood-based risk), reusing the user,
+    # check-ins and session totals already loaded
+    stats = await asyncio.to_thread(
+        firestore_service.get_user_statistics, user_id, user=user, mood_checkins=mood_checkins,
+        session_summary=session_summary
+    )
     
     # Format digital twin data properly for frontend
     digital_twin_data = None
@@ -448,13 +712,15 @@ async def get_user_profile(
         },
         "digital_twin": digital_twin_data,
         "sessions": sessions_with_mood,
-        "biofeedback": firestore_service.get_user_biofeedback_analyses(user_id, limit=1),
+        # A full page means there may be more; pass this back as after
+        "next_cursor": sessions[-1].get('id') if len(sessions) == limit else None,
+        "biofeedback": biofeedback,
         "mood_checkins": [
             {
                 "id": m.get('id'),
                 "mood": m.get('mood'),
                 "notes": m.get('notes'),
-                "created_at": parse_datetime(m.get('created_at')).isoformat() if m.get('created_at') else None,
+                "created_at": _iso_utc(m.get('created_at')),
                 "date": m.get('date')
             }
             for m in mood_checkins[:50]  # Return most recent 50
@@ -464,11 +730,9 @@ async def get_user_profile(
 @router.get("/user/{user_id}/diagnostics")
 async def get_user_diagnostics(
     user_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_admin_role)
 ):
     """Get detailed diagnostics for a user (PHQ-9, Keystroke, Fake Status)"""
-    require_admin_access(current_user)
-    
     phq9_service = PHQ9Service()
     batch_fake_service = BatchFakeDetectionService()
     
@@ -547,22 +811,28 @@ async def get_all_mood_checkins(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     user_id: Optional[str] = None,
-    current_user: dict = Depends(get_current_user)
+    after: Optional[str] = None,  # next_cursor from the previous page
+    current_user: dict = Depends(get_admin_role)
 ):
     """Get all mood check-ins (accessible by admin and sub-admin)"""
-    require_admin_access(current_user)
-    
-    checkins = firestore_service.get_all_mood_checkins(
+    # Both reads block, so they run in worker threads; the user lookup needs
+    # the check-ins, so they run one after the other
+    checkins = await asyncio.to_thread(
+        firestore_service.get_all_mood_checkins,
         limit=limit,
         start_date=start_date,
         end_date=end_date,
-        user_id=user_id
+        user_id=user_id,
+        start_after_id=after
     )
     
-    # Enrich with user information
+    # Enrich with user information, all users in one batched read
+    users = await asyncio.to_thread(
+        firestore_service.get_users_by_ids, [checkin['user_id'] for checkin in checkins]
+    )
     result = []
     for checkin in checkins:
-        user = firestore_service.get_user_by_id(checkin['user_id'])
+        user = users.get(checkin['user_id'])
         result.append({
             'id': checkin['id'],
             'user_id': checkin['user_id'],
@@ -574,22 +844,43 @@ async def get_all_mood_checkins(
             'date': checkin.get('date', datetime.now().date().isoformat())
         })
     
-    return {"checkins": result}
+    # A full page means there may be more; pass this back as after
+    next_cursor = result[-1]['id'] if len(result) == limit else None
+    return {"checkins": result, "next_cursor": next_cursor}
 
-@router.get("/users")
+@router.get("/users", response_model=None)
 async def get_all_users(
-    current_user: dict = Depends(get_current_user)
+    limit: Optional[int] = Query(None, ge=1, le=500),  # page size; all users when omitted
+    after: Optional[str] = None,  # next_cursor from the previous page
+    current_user: dict = Depends(get_admin_role)
 ):
     """Get all users including admins, sub-admins, doctors, and nurses (accessible by admin and sub-admin)"""
-    require_admin_access(current_user)
-    
     try:
-        # Get all users including admins for the Settings page
+        # Get all active users including admins for the Settings page, newest
+        # first, with only the fields the listing shows
         users_ref = firestore_service.db.collection('users')
+        if limit:
+            # A page is filtered and sorted server-side (index: is_active,
+            # created_at desc); users without is_active or created_at are not
+            # matched until backfill_user_is_active.py has been run
+            query = (
+                users_ref
+                .where('is_active', '==', True)
+                .order_by('created_at', direction=firestore.Query.DESCENDING)
+                .select(firestore_service.USER_LIST_FIELDS)
+            )
+            if after:
+                cursor_doc = users_ref.document(after).get()
+                if cursor_doc.exists:
+                    query = query.start_after(cursor_doc)
+            query = query.limit(limit)
+        else:
+            # The full listing scans the projected collection so users missing
+            # either field are still listed; filtered and sorted below
+            query = users_ref.select(firestore_service.USER_LIST_FIELDS)
         users = []
-        user_ids_seen = set()
         
-        for doc in users_ref.stream():
+        for doc in query.stream():
             try:
                 user_data = doc.to_dict()
                 if not user_data:
@@ -597,9 +888,6 @@ async def get_all_users(
                 
                 # Use document ID as the primary identifier
                 doc_id = doc.id
-                if doc_id in user_ids_seen:
-                    continue
-                user_ids_seen.add(doc_id)
                 
                 # Ensure id field is set to document ID (this is the actual Firestore document ID)
                 user_data['id'] = doc_id
@@ -612,10 +900,13 @@ async def get_all_users(
                 print(f"[ERROR] Error processing user document {doc.id}: {e}")
                 continue
         
-        # Sort by created_at descending
-        users.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+        if not limit:
+            # Sort by created_at descending, users without it last
+            created = {user['id']: _parse_dt(user.get('created_at')) for user in users}
+            users.sort(key=lambda x: (created[x['id']] is not None, created[x['id']] or 0), reverse=True)
         
-        return {"users": users}
+        next_cursor = users[-1]['id'] if limit and len(users) == limit else None
+        return _json_response({"users": users, "next_cursor": next_cursor})
     except Exception as e:
         print(f"[ERROR] Failed to get users: {e}")
         import traceback
@@ -625,11 +916,9 @@ async def get_all_users(
 @router.post("/users/create")
 async def create_user(
     user_data: CreateUserRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_full_admin_role)
 ):
     """Create a new user (full admin only - sub-admins cannot create users)"""
-    require_full_admin(current_user)
-    
     try:
         # Check if username already exists
         if firestore_service.get_user_by_username(user_data.username):
@@ -641,7 +930,7 @@ async def create_user(
         
         # Hash password using the same method as in auth.py
         from app.routes.auth import get_password_hash
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await asyncio.to_thread(get_password_hash, user_data.password)
         
         # Validate role if provided
         if user_data.role and user_data.role not in ['doctor', 'nurse']:
@@ -681,6 +970,7 @@ async def create_user(
         
         # Create user in Firestore
         user_id = firestore_service.create_user(user_dict)
+        _response_cache.clear()
         
         # Return created user (without password)
         created_user = firestore_service.get_user_by_id(user_id)
@@ -714,28 +1004,12 @@ class UpdateUserRequest(BaseModel):
 async def update_user_profile(
     user_id: str,
     user_data: UpdateUserRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_full_admin_user)
 ):
     """Update user profile (full admin only - sub-admins cannot edit users)"""
-    require_full_admin(current_user)
-    
     try:
         # Find the user - user_id should be the document ID from get_all_users
-        users_ref = firestore_service.db.collection('users')
-        user = None
-        doc_id = user_id  # user_id should be the document ID
-        
-        # Try direct document ID first
-        user_doc = users_ref.document(user_id).get()
-        if user_doc.exists:
-            user = user_doc.to_dict()
-        else:
-            # Fallback: search by id field
-            query = users_ref.where('id', '==', user_id).limit(1).stream()
-            for doc in query:
-                doc_id = doc.id
-                user = doc.to_dict()
-                break
+        doc_id, user = await asyncio.to_thread(firestore_service.find_user_doc, user_id)
         
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -803,17 +1077,14 @@ async def update_user_profile(
         if updates:
             # Use the document ID for update
             firestore_service.update_user(actual_doc_id, updates)
+            _response_cache.clear()
+            invalidate_user_cache()
         
-        # Return updated user using document ID
-        updated_doc = users_ref.document(actual_doc_id).get()
-        if updated_doc.exists:
-            user_dict = updated_doc.to_dict()
-            if user_dict:
-                user_dict['id'] = actual_doc_id  # Ensure id is set
-                user_dict.pop('hashed_password', None)
-                user_dict.pop('password_hash', None)  # Remove both for safety
-        else:
-            raise HTTPException(status_code=404, detail="Updated user not found")
+        # Return the updated user - the document read above with the updates
+        # applied, rather than reading it back
+        user_dict = {**user, **updates, 'id': actual_doc_id}  # Ensure id is set
+        user_dict.pop('hashed_password', None)
+        user_dict.pop('password_hash', None)  # Remove both for safety
         
         return {
             "message": "User updated successfully",
@@ -830,11 +1101,9 @@ async def update_user_profile(
 @router.delete("/users/{user_id}")
 async def delete_user(
     user_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_full_admin_user)
 ):
     """Delete a user (full admin only - sub-admins cannot delete users)"""
-    require_full_admin(current_user)
-    
     # Prevent deleting yourself
     if str(current_user.get('id')) == str(user_id):
         raise HTTPException(status_code=400, detail="Cannot delete your own account")
@@ -842,24 +1111,8 @@ async def delete_user(
     try:
         # Find the user document - user_id should be the document ID from get_all_users
         users_ref = firestore_service.db.collection('users')
-        user = None
-        doc_id = user_id  # user_id should be the document ID from get_all_users
-        
-        # Try direct document ID first (user_id should be the document ID)
         try:
-            user_doc = users_ref.document(user_id).get()
-            if user_doc.exists:
-                user = user_doc.to_dict()
-                print(f"[INFO] Found user by document ID: {user_id}")
-            else:
-                # If not found, search by id field (fallback)
-                print(f"[WARNING] User not found by document ID {user_id}, searching by id field...")
-                query = users_ref.where('id', '==', user_id).limit(1).stream()
-                for doc in query:
-                    doc_id = doc.id
-                    user = doc.to_dict()
-                    print(f"[INFO] Found user by id field query: document_id={doc_id}, user_id={user_id}")
-                    break
+            doc_id, user = await asyncio.to_thread(firestore_service.find_user_doc, user_id)
         except Exception as e:
             print(f"[ERROR] Error searching for user {user_id}: {e}")
             raise HTTPException(status_code=404, detail=f"User not found: {str(e)}")
@@ -874,6 +1127,8 @@ async def delete_user(
         # Delete the user document using the document ID
         try:
             users_ref.document(doc_id).delete()
+            _response_cache.clear()
+            invalidate_user_cache()
             print(f"[INFO] User document {doc_id} deleted successfully")
         except Exception as e:
             print(f"[ERROR] Failed to delete user document {doc_id}: {e}")
@@ -1064,6 +1319,14 @@ async def get_all_patients(
         users_ref = firestore_service.db.collection('users')
         patients = []
         
+        # Many patients share a doctor or nurse; look each one up once per request
+        # (not module-level - user docs change)
+        staff_by_id = {}
+        def get_staff(staff_id):
+            if staff_id not in staff_by_id:
+                staff_by_id[staff_id] = firestore_service.get_user_by_id(staff_id)
+            return staff_by_id[staff_id]
+        
         for doc in users_ref.stream():
             user_data = doc.to_dict()
             if not user_data:
@@ -1079,7 +1342,7 @@ async def get_all_patients(
                 for assignment_doc in assignments:
                     assignment = assignment_doc.to_dict()
                     if assignment.get('doctor_id'):
-                        doctor = firestore_service.get_user_by_id(assignment.get('doctor_id'))
+                        doctor = get_staff(assignment.get('doctor_id'))
                         if doctor:
                             assigned_doctor = {
                                 'id': doctor.get('id'),
@@ -1087,7 +1350,7 @@ async def get_all_patients(
                                 'email': doctor.get('email')
                             }
                     elif assignment.get('nurse_id'):
-                        nurse = firestore_service.get_user_by_id(assignment.get('nurse_id'))
+                        nurse = get_staff(assignment.get('nurse_id'))
                         if nurse:
                             assigned_nurse = {
                                 'id': nurse.get('id'),
@@ -1324,10 +1587,7 @@ async def get_user_alerts(
     
     try:
         # Get all alerts for this user (unresolved and resolved)
-        alerts = firestore_service.get_alerts(resolved=None)
-        
-        # Filter alerts for current user
-        user_alerts = [alert for alert in alerts if alert.get('user_id') == user_id]
+        user_alerts = firestore_service.get_alerts(user_id=user_id)
         
         result = []
         for alert in user_alerts:
@@ -2,20 +2,66 @@
 Authentication routes - Using Firestore
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+import asyncio
+import hashlib
+import time
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status, UploadFile, File
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr, field_validator, model_validator
 from typing import Optional
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
+from passlib.context import CryptContext
 import bcrypt
 import os
+import shutil
 from app.config import settings
-from app.services.firestore_service import FirestoreService
+from app.services.firestore_client import firestore_service
 
 router = APIRouter()
 security = HTTPBearer()
-firestore_service = FirestoreService()
+
+# Authenticated users by token, so a burst of requests with the same token
+# decodes it and reads the user document once. Entries never outlive the
+# token, and user writes made through this process's API (updates, deletes)
+# clear the whole map. Changes made anywhere else - another worker, the
+# Firebase console, a script - are only seen once the entry expires, so a
+# user deleted or deactivated there can keep authenticating for up to
+# AUTH_CACHE_TTL_SECONDS.
+AUTH_CACHE_TTL_SECONDS = 30
+AUTH_CACHE_MAX_ENTRIES = 10000
+_user_cache: dict = {}  # sha256(token) -> (monotonic expiry, user)
+
+def _token_cache_key(token: str) -> str:
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+def _get_cached_user(token: str) -> Optional[dict]:
+    entry = _user_cache.get(_token_cache_key(token))
+    if entry is None:
+        return None
+    expires_at, user = entry
+    if expires_at <= time.monotonic():
+        _user_cache.pop(_token_cache_key(token), None)
+        return None
+    return dict(user)  # callers may modify their copy
+
+def _cache_user(token: str, payload: dict, user: dict):
+    ttl = AUTH_CACHE_TTL_SECONDS
+    if payload.get('exp') is not None:
+        ttl = min(ttl, payload['exp'] - time.time())
+    if ttl <= 0:
+        return
+    now = time.monotonic()
+    if len(_user_cache) >= AUTH_CACHE_MAX_ENTRIES:
+        for key in [key for key, (expires_at, _) in _user_cache.items() if expires_at <= now]:
+            del _user_cache[key]
+        if len(_user_cache) >= AUTH_CACHE_MAX_ENTRIES:
+            _user_cache.clear()
+    _user_cache[_token_cache_key(token)] = (now + ttl, dict(user))
+
+def invalidate_user_cache():
+    """Forget every cached authenticated user - call after changing a user document"""
+    _user_cache.clear()
 
 class UserRegister(BaseModel):
     username: str
@@ -40,8 +86,27 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
+# New hashes are argon2id. Older bcrypt hashes are verified with the bcrypt
+# module directly (as they were created) and replaced on the next login.
+pwd_context = CryptContext(
+    schemes=['argon2'],
+    argon2__type='ID',
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST_KIB,
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM
+)
+
+def _is_argon2_hash(hashed_password: str) -> bool:
+    return hashed_password.startswith('$argon2')
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify password using bcrypt"""
+    """Verify password against an argon2 or legacy bcrypt hash"""
+    if _is_argon2_hash(hashed_password):
+        try:
+            return pwd_context.verify(plain_password, hashed_password)
+        except Exception as e:
+            print(f"[ERROR] Password verification failed: {e}")
+            return False
     try:
         password_bytes = plain_password.encode('utf-8')
         # Bcrypt has 72-byte limit, truncate if necessary
@@ -53,15 +118,28 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 def get_password_hash(password: str) -> str:
-    """Hash password using bcrypt"""
-    password_bytes = password.encode('utf-8')
-    # Bcrypt has 72-byte limit, truncate if necessary
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-    # Generate salt and hash
-    salt = bcrypt.gensalt(rounds=12)
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
+    """Hash password using argon2id"""
+    return pwd_context.hash(password)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True for bcrypt hashes and argon2 hashes made with other settings"""
+    if not _is_argon2_hash(hashed_password):
+        return True
+    return pwd_context.needs_update(hashed_password)
+
+def _rehash_password(user_id: str, password: str):
+    """Background task - store the password hashed with the current settings"""
+    try:
+        # The user's id field need not be its document ID; write to the document it resolves to
+        doc_id, _ = firestore_service.find_user_doc(user_id)
+        if not doc_id:
+            print(f"[WARNING] Failed to rehash password: user {user_id} not found")
+            return
+        firestore_service.update_user(doc_id, {'hashed_password': get_password_hash(password)})
+        invalidate_user_cache()
+        print(f"[INFO] Rehashed password for user: {doc_id}")
+    except Exception as e:
+        print(f"[WARNING] Failed to rehash password: {e}")
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     """Create JWT token"""
@@ -75,16 +153,29 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     return encoded_jwt
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     """Get current authenticated user from Firestore"""
+    # Resolved at most once per request, however many dependencies ask for it
+    cached = getattr(request.state, 'current_user', None)
+    if cached is not None and cached[0] == credentials.credentials:
+        return cached[1]
+    
+    token = credentials.credentials
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    user = _get_cached_user(token)
+    if user is not None:
+        if not user.get('is_active', True):
+            raise credentials_exception
+        request.state.current_user = (token, user)
+        return user
+    
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
@@ -95,6 +186,11 @@ async def get_current_user(
     user = firestore_service.get_user_by_username(username)
     if user is None:
         raise credentials_exception
+    _cache_user(token, payload, user)
+    # Deactivated (soft-deleted) users no longer authenticate
+    if not user.get('is_active', True):
+        raise credentials_exception
+    request.state.current_user = (token, user)
     return user
 
 async def get_current_user_optional(
@@ -107,8 +203,12 @@ async def get_current_user_optional(
     if credentials is None:
         return None
     
+    token = credentials.credentials
+    user = _get_cached_user(token)
+    if user is not None:
+        return user if user.get('is_active', True) else None
+    
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
@@ -117,20 +217,28 @@ async def get_current_user_optional(
         return None
     
     user = firestore_service.get_user_by_username(username)
-    return user
+    if user is None:
+        return None
+    _cache_user(token, payload, user)
+    return user if user.get('is_active', True) else None
 
 @router.post("/register", response_model=Token)
 async def register(user_data: UserRegister):
     """Register new user in Firestore"""
     try:
-        # Check if user exists
-        if firestore_service.get_user_by_username(user_data.username):
+        # Check if user exists - both lookups run side by side in worker threads
+        existing_username, existing_email = await asyncio.gather(
+            asyncio.to_thread(firestore_service.get_user_by_username, user_data.username),
+            asyncio.to_thread(firestore_service.get_user_by_email, user_data.email)
+        )
+        if existing_username:
             raise HTTPException(status_code=400, detail="Username already registered")
-        if firestore_service.get_user_by_email(user_data.email):
+        if existing_email:
             raise HTTPException(status_code=400, detail="Email already registered")
         
         # Create new user
-        hashed_password = get_password_hash(user_data.password)
+        # Password hashing is CPU-bound; hash in a worker thread to keep the event loop free
+        hashed_password = await asyncio.to_thread(get_password_hash, user_data.password)
         user_data_dict = {
             'username': user_data.username,
             'email': user_data.email,
@@ -149,7 +257,8 @@ async def register(user_data: UserRegister):
         # Create access token
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": user_data.username}, expires_delta=access_token_expires
+            data={"sub": user_data.username, "is_admin": False, "is_sub_admin": False},
+            expires_delta=access_token_expires
         )
         
         return {"access_token": access_token, "token_type": "bearer"}
@@ -162,7 +271,7 @@ async def register(user_data: UserRegister):
         raise HTTPException(status_code=500, detail=f"Registration failed: {str(e)}")
 
 @router.post("/login", response_model=Token)
-async def login(user_data: UserLogin):
+async def login(user_data: UserLogin, background_tasks: BackgroundTasks):
     """Login user from Firestore - supports both username and email"""
     # Debug logging
     print(f"[DEBUG] Login attempt - username: {user_data.username}, email: {user_data.email}")
@@ -208,7 +317,7 @@ async def login(user_data: UserLogin):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    password_valid = verify_password(user_data.password, stored_hash)
+    password_valid = await asyncio.to_thread(verify_password, user_data.password, stored_hash)
     print(f"[DEBUG] Password verification result: {password_valid}")
     
     if not password_valid:
@@ -222,22 +331,13 @@ async def login(user_data: UserLogin):
     # If user has old 'password_hash' field, migrate it to 'hashed_password' for consistency
     if user.get('password_hash') and not user.get('hashed_password'):
         try:
-            from app.services.firestore_service import FirestoreService
-            firestore_service_temp = FirestoreService()
             user_id = user.get('id') or user.get('user_id')
             if user_id:
                 # Get the actual document ID for update
-                users_ref = firestore_service_temp.db.collection('users')
-                user_doc = users_ref.document(user_id).get()
-                if not user_doc.exists:
-                    # Try to find by query
-                    query = users_ref.where('username', '==', user.get('username')).limit(1).stream()
-                    for doc in query:
-                        user_id = doc.id
-                        break
+                user_id, _ = await asyncio.to_thread(firestore_service.find_user_doc, user_id)
                 
                 if user_id:
-                    firestore_service_temp.update_user(user_id, {
+                    firestore_service.update_user(user_id, {
                         'hashed_password': user.get('password_hash'),
                         'password_hash': None  # Remove old field
                     })
@@ -255,6 +355,10 @@ async def login(user_data: UserLogin):
                 'last_activity': datetime.utcnow().isoformat() + 'Z'
             })
             print(f"[INFO] Updated last_activity for user: {user.get('username')}")
+            
+            # Upgrade bcrypt and outdated argon2 hashes, after the response
+            if password_needs_rehash(stored_hash):
+                background_tasks.add_task(_rehash_password, user_id, user_data.password)
     except Exception as e:
         print(f"[WARNING] Failed to update last_activity: {e}")
     
@@ -267,8 +371,15 @@ async def login(user_data: UserLogin):
         )
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # Role claims are read from the user document at each login; admin routes
+    # that only gate on the role trust them until the token expires
     access_token = create_access_token(
-        data={"sub": username_for_token}, expires_delta=access_token_expires
+        data={
+            "sub": username_for_token,
+            "is_admin": bool(user.get('is_admin', False)),
+            "is_sub_admin": bool(user.get('is_sub_admin', False))
+        },
+        expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
@@ -319,6 +430,11 @@ class PasswordChangeRequest(BaseModel):
     current_password: str
     new_password: str
 
+def _save_upload(source, file_path: str):
+    """Copy an uploaded file to file_path in 1 MiB chunks, so memory use stays flat"""
+    with open(file_path, 'wb') as buffer:
+        shutil.copyfileobj(source, buffer, 1 << 20)
+
 @router.post("/profile/upload-image")
 async def upload_profile_image(
     image_file: UploadFile = File(...),
@@ -349,15 +465,15 @@ async def upload_profile_image(
             f"{user_id}_{datetime.now().timestamp()}.{file_ext}"
         )
         
-        with open(file_path, "wb") as buffer:
-            content = await image_file.read()
-            buffer.write(content)
+        # Stream to disk in a worker thread instead of reading the whole file into memory
+        await asyncio.to_thread(_save_upload, image_file.file, file_path)
         
         # Generate URL (in production, this would be a CDN or storage bucket URL)
         profile_image_url = f"/uploads/profile_images/{os.path.basename(file_path)}"
         
         # Update user profile with image URL
         firestore_service.update_user(user_id, {'profile_image_url': profile_image_url})
+        invalidate_user_cache()
         
         return {
             "message": "Profile image uploaded successfully",
@@ -384,10 +500,18 @@ async def update_profile(
         
         updates = {}
         
+        # Duplicate checks for a new username and/or email run side by side
+        lookups = {}
+        if profile_data.username is not None:
+            lookups['username'] = asyncio.to_thread(firestore_service.get_user_by_username, profile_data.username)
+        if profile_data.email is not None:
+            lookups['email'] = asyncio.to_thread(firestore_service.get_user_by_email, profile_data.email)
+        existing_users = dict(zip(lookups, await asyncio.gather(*lookups.values())))
+        
         # Handle username update
         if profile_data.username is not None:
             # Check if username already exists (for another user)
-            existing_user = firestore_service.get_user_by_username(profile_data.username)
+            existing_user = existing_users['username']
             if existing_user:
                 existing_user_id = existing_user.get('id')
                 if existing_user_id and str(existing_user_id) != str(user_id):
@@ -397,7 +521,7 @@ async def update_profile(
         # Handle email update
         if profile_data.email is not None:
             # Check if email already exists (for another user)
-            existing_user = firestore_service.get_user_by_email(profile_data.email)
+            existing_user = existing_users['email']
             if existing_user:
                 existing_user_id = existing_user.get('id')
                 if existing_user_id and str(existing_user_id) != str(user_id):
@@ -413,6 +537,7 @@ async def update_profile(
         
         if updates:
             firestore_service.update_user(user_id, updates)
+            invalidate_user_cache()
         
         # Return updated user
         updated_user = firestore_service.get_user_by_id(user_id)
@@ -453,7 +578,7 @@ async def change_password(
         if not stored_hash:
             raise HTTPException(status_code=400, detail="Password not set for this user")
         
-        password_valid = verify_password(password_data.current_password, stored_hash)
+        password_valid = await asyncio.to_thread(verify_password, password_data.current_password, stored_hash)
         if not password_valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -468,10 +593,11 @@ async def change_password(
             )
         
         # Hash new password and update
-        new_hashed_password = get_password_hash(password_data.new_password)
+        new_hashed_password = await asyncio.to_thread(get_password_hash, password_data.new_password)
         firestore_service.update_user(user_id, {
             'hashed_password': new_hashed_password
         })
+        invalidate_user_cache()
         
         return {"message": "Password changed successfully"}
     except HTTPException:
@@ -500,6 +626,7 @@ async def update_fcm_token(
         firestore_service.update_user(user_id, {
             'fcm_token': token_data.fcm_token
         })
+        invalidate_user_cache()
         
         # Also update real-time data
         from app.services.firebase_service import update_user_realtime_data
@@ -11,14 +11,13 @@ import json
 
 from app.routes.auth import get_current_user
 from app.services.call_service import CallService, CallType, CallStatus
-from app.services.firestore_service import FirestoreService
+from app.services.firestore_client import firestore_service
 from app.services.chatbot_service import ChatbotService
 from app.services.voice_call_service import voice_call_service
 import base64
 
 router = APIRouter()
 call_service = CallService()
-firestore_service = FirestoreService()
 chatbot_service = ChatbotService()
 
 # WebSocket connection manager
@@ -13,10 +13,10 @@ from app.services.phq9_service import PHQ9Service
 from app.services.stress_analysis import StressAnalysisService
 from app.services.chatbot_safety import ChatbotSafetyService
 from app.services.depression_detection import DepressionDetectionService
-from app.services.firestore_service import FirestoreService
+from app.services.firestore_client import firestore_service
 
 router = APIRouter()
-firestore_service = FirestoreService()
+stress_service = StressAnalysisService()
 
 # ========== Request/Response Models ==========
 
@@ -134,14 +134,12 @@ async def chat(
     if chat_message.keystroke_events:
         pending_events.extend(chat_message.keystroke_events)
     
-    # Initialize stress analysis service
-    stress_service = StressAnalysisService()
     stress_result = None
     
     # Check if we should analyze stress (every 5 messages)
     if message_count % 5 == 0 and pending_events:
         try:
-            stress_result = stress_service.predict(pending_events)
+            stress_result = await stress_service.predict_async(pending_events)
             # Clear pending events after analysis
             pending_events = []
         except Exception as e:
@@ -239,6 +237,7 @@ async def chat(
                 message = f"PHQ-9 assessment completed with score {total_score}/27. Risk level: {interpretation['risk_level']}."
                 firestore_service.create_alert({
                     'user_id': user_id,
+                    'username': current_user.get('username') if current_user else None,
                     'session_id': session_id,
                     'alert_type': 'phq9_high_score',
                     'phq9_score': total_score,
@@ -364,6 +363,7 @@ async def chat(
         risk_level = result.get('risk_level', 'severe')
         firestore_service.create_alert({
             'user_id': user_id,
+            'username': current_user.get('username'),
             'session_id': session_id,
             'alert_type': 'crisis' if result.get('is_crisis') else 'high_risk',
             'message': chat_message.message,
@@ -554,6 +554,7 @@ async def answer_phq9_question(
             message = f"PHQ-9 assessment completed with score {total_score}/27. Risk level: {interpretation['risk_level']}."
             firestore_service.create_alert({
                 'user_id': user_id,
+                'username': current_user.get('username'),
                 'session_id': request.session_id,
                 'alert_type': 'phq9_high_score',
                 'phq9_score': total_score,
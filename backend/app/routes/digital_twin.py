@@ -10,10 +10,9 @@ import json
 
 from app.routes.auth import get_current_user
 from app.services.digital_twin_service import DigitalTwinService
-from app.services.firestore_service import FirestoreService
+from app.services.firestore_client import firestore_service
 
 router = APIRouter()
-firestore_service = FirestoreService()
 
 class DigitalTwinResponse(BaseModel):
     user_id: str  # Changed from int to str for Firestore
@@ -20,9 +20,7 @@ from app.utils.extract_w2v_embeddings import extract_w2v_embedding
 from app.models.movement_caption import analyze_activity
 from app.models.heartrate_measure import analyze_stress
 from app.routes.auth import get_current_user_optional
-from app.services.firestore_service import FirestoreService
-
-firestore_service = FirestoreService()
+from app.services.firestore_client import firestore_service
 
 
 router = APIRouter(prefix="/api", tags=["data"])
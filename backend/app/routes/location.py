@@ -9,10 +9,9 @@ from datetime import datetime, timezone
 from firebase_admin import firestore
 
 from app.routes.auth import get_current_user, get_current_user_optional
-from app.services.firestore_service import FirestoreService
+from app.services.firestore_client import firestore_service
 
 router = APIRouter()
-firestore_service = FirestoreService()
 
 class LocationUpdate(BaseModel):
     latitude: float
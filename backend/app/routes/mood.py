@@ -8,10 +8,9 @@ from typing import Optional, List
 from datetime import datetime
 
 from app.routes.auth import get_current_user
-from app.services.firestore_service import FirestoreService
+from app.services.firestore_client import firestore_service
 
 router = APIRouter()
-firestore_service = FirestoreService()
 
 class MoodCheckInRequest(BaseModel):
     mood: str
@@ -182,8 +181,10 @@ async def get_mood_history(
         end_date=end_date
     )
     
+    # FastAPI validates the list against response_model on the way out, so
+    # build the rows without validating them a second time here
     return [
-        MoodCheckInResponse(
+        MoodCheckInResponse.model_construct(
             id=checkin['id'],
             user_id=checkin['user_id'],
             mood=checkin['mood'],
@@ -213,10 +214,11 @@ async def get_all_mood_checkins_admin(
         user_id=user_id
     )
     
-    # Enrich with user information
+    # Enrich with user information, all users in one batched read
+    users = firestore_service.get_users_by_ids([checkin['user_id'] for checkin in checkins])
     result = []
     for checkin in checkins:
-        user = firestore_service.get_user_by_id(checkin['user_id'])
+        user = users.get(checkin['user_id'])
         result.append({
             'id': checkin['id'],
             'user_id': checkin['user_id'],
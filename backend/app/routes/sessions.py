@@ -7,10 +7,9 @@ from pydantic import BaseModel
 from typing import Optional
 
 from app.routes.auth import get_current_user
-from app.services.firestore_service import FirestoreService
+from app.services.firestore_client import firestore_service
 
 router = APIRouter()
-firestore_service = FirestoreService()
 
 class SessionMoodUpdateRequest(BaseModel):
     mood: Optional[str] = None  # Mood is optional
@@ -4,16 +4,16 @@ Follows the same pattern as typing.py and voice.py
 """
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import Dict, List, Literal, Optional
 from datetime import datetime
 
 from app.routes.auth import get_current_user
 from app.services.stress_analysis import StressAnalysisService
-from app.services.firestore_service import FirestoreService
+from app.services.firestore_client import firestore_service
 
 router = APIRouter()
-firestore_service = FirestoreService()
 stress_service = StressAnalysisService()
 
 # ── Request / Response Models ─────────────────────────────────────────────────
@@ -41,6 +41,12 @@ class StressResponse(BaseModel):
     warning: Optional[str] = None
 
 
+@router.on_event("startup")
+async def start_stress_batcher():
+    """Start the shared prediction micro-batcher once the event loop is running"""
+    stress_service.start_batcher()
+
+
 # ── Health Check ──────────────────────────────────────────────────────────────
 
 @router.get("/health")
@@ -49,13 +55,14 @@ async def stress_health():
     return {
         "status": "ok",
         "model_loaded": stress_service.model_loaded,
+        "score_cache": stress_service.cache_stats,
         "service": "Keystroke Stress Detection",
     }
 
 
 # ── Predict ───────────────────────────────────────────────────────────────────
 
-@router.post("/analyze", response_model=StressResponse)
+@router.post("/analyze", response_model=StressResponse, response_class=ORJSONResponse)
 async def analyze_stress(
     request: KeystrokeRequest,
     current_user: dict = Depends(get_current_user),
@@ -93,7 +100,7 @@ async def analyze_stress(
         session = firestore_service.get_session_by_id(session_id)
 
     # Run prediction
-    result = stress_service.predict(request.events)
+    result = await stress_service.predict_async(request.events)
 
     # Map stress pred to depression_score and risk_level for dashboard compatibility
     # stress 0→low, 1→medium, 2→high  →  depression_score 0.1, 0.5, 0.9
@@ -126,7 +133,7 @@ async def analyze_stress(
 
 # ── History ───────────────────────────────────────────────────────────────────
 
-@router.get("/history")
+@router.get("/history", response_class=ORJSONResponse)
 async def get_stress_history(
     current_user: dict = Depends(get_current_user),
 ):
@@ -12,10 +12,9 @@ from app.routes.auth import get_current_user
 from app.services.typing_analysis import TypingAnalysisService
 from app.services.fake_detection import FakeDetectionService
 from app.services.batch_fake_detection import BatchFakeDetectionService
-from app.services.firestore_service import FirestoreService
+from app.services.firestore_client import firestore_service
 
 router = APIRouter()
-firestore_service = FirestoreService()
 batch_fake_service = BatchFakeDetectionService()
 
 class TypingData(BaseModel):
@@ -127,6 +126,7 @@ async def analyze_typing(
         if batch_result.get("is_fake", False) and batch_result.get("fake_score", 0) >= 0.6:
             firestore_service.create_alert({
                 'user_id': user_id,
+                'username': current_user.get('username'),
                 'alert_type': 'batch_fake_detected',
                 'severity': 'high' if batch_result.get("fake_score", 0) >= 0.8 else 'medium',
                 'message': f"Fake user detected in {batch_result.get('batch_name')} batch (chats {batch_result.get('batch_range')}). Fake score: {batch_result.get('fake_score', 0):.2f}"
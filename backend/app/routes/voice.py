@@ -14,11 +14,10 @@ from app.services.voice_analysis import VoiceAnalysisService
 from app.services.call_bot_detection import CallBotDetectionService
 from app.services.fake_detection import FakeDetectionService
 from app.services.batch_fake_detection import BatchFakeDetectionService
-from app.services.firestore_service import FirestoreService
+from app.services.firestore_client import firestore_service
 from app.config import settings
 
 router = APIRouter()
-firestore_service = FirestoreService()
 batch_fake_service = BatchFakeDetectionService()
 
 class VoiceAnalysisResponse(BaseModel):
@@ -178,6 +177,7 @@ async def analyze_voice(
         
         firestore_service.create_alert({
             'user_id': user_id,
+            'username': current_user.get('username'),
             'alert_type': 'fake_detected',
             'severity': severity,
             'message': f"Potential fake call detected. Risk: {risk_label}, Confidence: {fake_confidence:.2f}. Suspicious words: {words_str}. Language: {language}."
@@ -213,6 +213,7 @@ async def analyze_voice(
         if batch_result.get("is_fake", False) and batch_result.get("fake_score", 0) >= 0.6:
             firestore_service.create_alert({
                 'user_id': user_id,
+                'username': current_user.get('username'),
                 'alert_type': 'batch_fake_detected',
                 'severity': 'high' if batch_result.get("fake_score", 0) >= 0.8 else 'medium',
                 'message': f"Fake user detected in {batch_result.get('batch_name')} batch (calls {batch_result.get('batch_range')}). Fake score: {batch_result.get('fake_score', 0):.2f}"
@@ -7,14 +7,14 @@ Works for both typing and voice patterns
 import numpy as np
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
-from app.services.firestore_service import FirestoreService
+from app.services.firestore_client import firestore_service
 from app.services.call_bot_detection import CallBotDetectionService
 
 class BatchFakeDetectionService:
     """Service for batch-based fake user detection"""
     
     def __init__(self):
-        self.firestore_service = FirestoreService()
+        self.firestore_service = firestore_service
         
         # Batch checkpoints for typing analysis
         self.typing_batches = [
@@ -8,7 +8,7 @@ from datetime import datetime
 from enum import Enum
 import uuid
 
-from app.services.firestore_service import FirestoreService
+from app.services.firestore_client import firestore_service
 
 class CallType(str, Enum):
     """Types of calls supported"""
@@ -30,7 +30,7 @@ class CallService:
     """Service for managing calls between users and counselors/AI"""
     
     def __init__(self):
-        self.firestore_service = FirestoreService()
+        self.firestore_service = firestore_service
         # In-memory call tracking (for WebRTC signaling)
         self.active_calls: Dict[str, Dict] = {}
     
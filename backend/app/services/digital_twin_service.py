@@ -6,13 +6,13 @@ from typing import Dict, Any, Optional
 from datetime import datetime
 import json
 
-from app.services.firestore_service import FirestoreService
+from app.services.firestore_client import firestore_service
 
 class DigitalTwinService:
     """Service for managing digital twin profiles"""
     
     def __init__(self):
-        self.firestore_service = FirestoreService()
+        self.firestore_service = firestore_service
     
     async def create_profile(self, user_id: str, db: Optional[Any] = None) -> Dict[str, Any]:
         """Create initial digital twin profile in Firestore"""
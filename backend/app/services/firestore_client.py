@@ -0,0 +1,10 @@
+"""
+Shared Firestore service instance
+Import firestore_service from here instead of constructing FirestoreService,
+so every route and service reuses one client and its gRPC channel
+"""
+
+from app.services.firestore_service import FirestoreService
+
+firestore_service = FirestoreService()
+db = firestore_service.db
@@ -4,9 +4,12 @@ Use this instead of database.py for all database operations
 """
 
 from firebase_admin import firestore
+from google.api_core.exceptions import NotFound
 from app.services.firebase_service import get_firestore_db, is_firebase_initialized, initialize_firebase
-from typing import Optional, Dict, List
-from datetime import datetime
+from typing import Any, Callable, Iterable, Optional, Dict, List, Tuple
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
 
 class FirestoreService:
     """Firestore database service - replaces SQLAlchemy"""
@@ -36,6 +39,11 @@ class FirestoreService:
             user_ref = self.db.collection('users').document()
             user_data['id'] = user_ref.id
             user_data['created_at'] = firestore.SERVER_TIMESTAMP
+            # Listings filter on is_active and the dashboard counts patients by
+            # the role flags server-side, so every user needs all three fields
+            user_data.setdefault('is_active', True)
+            user_data.setdefault('is_admin', False)
+            user_data.setdefault('is_sub_admin', False)
             
             # Remove None values to avoid Firestore errors
             user_data = {k: v for k, v in user_data.items() if v is not None}
@@ -48,6 +56,18 @@ class FirestoreService:
             traceback.print_exc()
             raise
     
+    def find_user_doc(self, user_id: str) -> Tuple[Optional[str], Optional[Dict]]:
+        """(document ID, user) for a user addressed by document ID or by its id field, or (None, None)"""
+        users_ref = self.db.collection('users')
+        # Most users are addressed by document ID, so the id-field query only
+        # runs on a miss; a direct hit wins (older users' id fields may differ)
+        doc = users_ref.document(user_id).get()
+        if not doc.exists:
+            doc = next(iter(users_ref.where('id', '==', user_id).limit(1).stream()), None)
+        if doc is None:
+            return None, None
+        return doc.id, doc.to_dict()
+    
     def get_user_by_username(self, username: str) -> Optional[Dict]:
         """Get user by username"""
         users_ref = self.db.collection('users')
@@ -94,6 +114,33 @@ class FirestoreService:
         
         return None
     
+    def get_users_by_ids(self, user_ids: List[str]) -> Dict[str, Dict]:
+        """Get many users by document ID in one batched read, keyed by user_id"""
+        ids = list(dict.fromkeys(user_id for user_id in user_ids if user_id))
+        if not ids:
+            return {}
+        
+        users = {}
+        try:
+            users_ref = self.db.collection('users')
+            for doc in self.db.get_all([users_ref.document(user_id) for user_id in ids]):
+                if not doc.exists:
+                    continue
+                user_data = doc.to_dict()
+                if user_data:
+                    user_data['id'] = doc.id  # Ensure id field is set
+                    users[doc.id] = user_data
+        except Exception as e:
+            print(f"[ERROR] get_users_by_ids batch read failed: {e}")
+        
+        # Users stored under a different document ID go through the slow path
+        for user_id in ids:
+            if user_id not in users:
+                user_data = self.get_user_by_id(user_id)
+                if user_data:
+                    users[user_id] = user_data
+        return users
+    
     def get_user_by_email(self, email: str) -> Optional[Dict]:
         """Get user by email"""
         try:
@@ -128,8 +175,19 @@ class FirestoreService:
         """Update user data"""
         self.db.collection('users').document(user_id).update(updates)
     
-    def get_all_active_users(self) -> List[Dict]:
-        """Get all active users (or all users if is_active field is missing)"""
+    # Fields the admin user listing renders (never the password hash)
+    USER_LIST_FIELDS = ['id', 'username', 'email', 'phone_number', 'role', 'specialization',
+                        'is_admin', 'is_sub_admin', 'is_active', 'created_at', 'last_activity',
+                        'twitter_username']
+    # Fields the admin dashboard reads from each user
+    DASHBOARD_USER_FIELDS = ['id', 'username', 'email', 'gender', 'created_at', 'last_activity',
+                             'fake_status', 'is_active', 'is_admin', 'is_sub_admin']
+    
+    def get_all_active_users(self, fields: Optional[List[str]] = None) -> List[Dict]:
+        """Get all active users (or all users if is_active field is missing)
+
+        With fields, only those fields are read (is_active and is_admin are always included).
+        """
         try:
             users_ref = self.db.collection('users')
             users = []
@@ -138,7 +196,10 @@ class FirestoreService:
             # Get all users first (simpler and more reliable)
             print("[INFO] Fetching all users from Firestore...")
             try:
-                all_docs = users_ref.stream()
+                query = users_ref
+                if fields:
+                    query = users_ref.select(list(dict.fromkeys([*fields, 'is_active', 'is_admin'])))
+                all_docs = query.stream()
                 for doc in all_docs:
                     try:
                         user_data = doc.to_dict()
@@ -198,6 +259,12 @@ class FirestoreService:
         session_data['id'] = session_ref.id
         session_data['start_time'] = firestore.SERVER_TIMESTAMP
         session_ref.set(session_data)
+        # The dashboard counters are best-effort: a failed increment must never
+        # fail the session itself
+        try:
+            self._increment_session_counters(session_data.get('session_type', 'chatbot'))
+        except Exception as e:
+            print(f"[WARNING] Failed to update session counters: {e}")
         return session_ref.id
     
     def get_session_by_id(self, session_id: str) -> Optional[Dict]:
@@ -235,19 +302,7 @@ class FirestoreService:
                     print(f"[ERROR] Error processing session document {doc.id}: {e}")
                     continue
             
-            # Sort by start_time descending (handle various time formats)
-            def get_start_time(s):
-                start_time = s.get('start_time')
-                if isinstance(start_time, datetime):
-                    return start_time
-                elif isinstance(start_time, str):
-                    try:
-                        return datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-                    except:
-                        pass
-                return datetime.min
-            
-            sessions.sort(key=get_start_time, reverse=True)
+            self._sort_sessions(sessions)
             
             print(f"[INFO] Retrieved {len(sessions)} sessions for user {user_id}")
             return sessions
@@ -258,12 +313,155 @@ class FirestoreService:
             traceback.print_exc()
             return []
     
+    async def aget_sessions_by_user(self, user_ids: List[str],
+                                    fields: Optional[List[str]] = None) -> Dict[str, List[Dict]]:
+        """Get sessions for many users at once, keyed by user_id (newest first)"""
+        sessions_by_user = await self._aget_docs_by_user('sessions', user_ids, fields)
+        for sessions in sessions_by_user.values():
+            self._sort_sessions(sessions)
+        
+        print(f"[INFO] Retrieved sessions for {len(sessions_by_user)} users")
+        return sessions_by_user
+    
+    def _get_docs_for_users(self, collection: str, user_ids: List[str],
+                            fields: Optional[List[str]] = None) -> List[Dict]:
+        """Get every document of a collection owned by any of user_ids (at most 30 ids)"""
+        docs = []
+        try:
+            query = self.db.collection(collection).where('user_id', 'in', user_ids)
+            if fields:
+                query = query.select(fields)
+            for doc in query.stream():
+                data = doc.to_dict()
+                if not data:
+                    continue
+                if 'id' not in data:
+                    data['id'] = doc.id
+                docs.append(data)
+        except Exception as e:
+            print(f"[ERROR] Failed to get {collection} for users {user_ids}: {e}")
+        return docs
+    
+    async def _aget_docs_by_user(self, collection: str, user_ids: List[str],
+                                 fields: Optional[List[str]] = None) -> Dict[str, List[Dict]]:
+        """Get every document of a collection owned by any of user_ids, grouped by user_id
+
+        With fields, only those fields are read (user_id is always included for grouping).
+        """
+        docs_by_user = {user_id: [] for user_id in user_ids}
+        ids = list(docs_by_user)
+        if fields and 'user_id' not in fields:
+            fields = ['user_id', *fields]
+        
+        # One 'in' query per 30 users (Firestore's disjunction limit) instead
+        # of one query per user. The chunks are independent, so they run side
+        # by side on the event loop's default executor, which bounds them
+        chunks = [ids[i:i + 30] for i in range(0, len(ids), 30)]
+        results = await asyncio.gather(*(
+            asyncio.to_thread(self._get_docs_for_users, collection, chunk, fields) for chunk in chunks
+        ))
+        for docs in results:
+            for data in docs:
+                docs_by_user.setdefault(data.get('user_id'), []).append(data)
+        
+        return docs_by_user
+    
+    @staticmethod
+    def _sort_sessions(sessions: List[Dict]):
+        """Sort sessions by start_time descending (handle various time formats)"""
+        sessions.sort(key=lambda s: FirestoreService._utc_time_key(s.get('start_time')), reverse=True)
+    
+    @staticmethod
+    def _utc_time_key(value) -> datetime:
+        """Sort key for a stored time (handle various time formats)
+
+        Always timezone-aware UTC - naive values are taken as UTC and missing or
+        unparseable ones sort oldest - so Firestore timestamps and ISO strings
+        with or without an offset compare without a TypeError.
+        """
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                value = None
+        if not isinstance(value, datetime):
+            return datetime.min.replace(tzinfo=timezone.utc)
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+    
+    # Fields the admin profile renders for each session
+    SESSION_LIST_FIELDS = ['id', 'session_type', 'start_time', 'depression_score', 'risk_level', 'mood']
+    
+    def get_user_sessions_page(self, user_id: str, limit: int = 100, offset: int = 0,
+                               fields: Optional[List[str]] = None,
+                               start_after_id: Optional[str] = None) -> List[Dict]:
+        """Get one page of a user's sessions, newest first, with only the listed fields
+
+        start_after_id is the id of the last session of the previous page.
+        """
+        try:
+            # Sorted, paged and projected server-side (index: user_id, start_time desc)
+            sessions_ref = self.db.collection('sessions')
+            query = (
+                sessions_ref
+                .where('user_id', '==', user_id)
+                .order_by('start_time', direction=firestore.Query.DESCENDING)
+                .select(fields or self.SESSION_LIST_FIELDS)
+            )
+            if start_after_id:
+                cursor_doc = sessions_ref.document(start_after_id).get()
+                if cursor_doc.exists:
+                    query = query.start_after(cursor_doc)
+            if offset:
+                query = query.offset(offset)
+            query = query.limit(limit)
+            
+            sessions = []
+            for doc in query.stream():
+                session_data = doc.to_dict() or {}
+                if not session_data.get('id'):
+                    session_data['id'] = doc.id
+                sessions.append(session_data)
+            return sessions
+        except Exception as e:
+            print(f"[ERROR] Failed to get user sessions page: {e}")
+            import traceback
+            traceback.print_exc()
+            return []
+    
     def update_session(self, session_id: str, updates: Dict):
         """Update session"""
         if 'end_time' in updates and updates['end_time'] is None:
             updates['end_time'] = firestore.SERVER_TIMESTAMP
         self.db.collection('sessions').document(session_id).update(updates)
     
+    def update_sessions(self, updates: Dict[str, Dict]):
+        """Apply many session updates, keyed by session_id, in batched writes"""
+        sessions_ref = self.db.collection('sessions')
+        self.batch_write((sessions_ref.document(session_id), session_updates)
+                         for session_id, session_updates in updates.items())
+    
+    # Firestore caps a write batch at 500 operations
+    MAX_BATCH_WRITES = 500
+    
+    def batch_write(self, writes: Iterable[Tuple[Any, Dict]], method: str = 'update') -> int:
+        """Apply (document reference, data) writes with batch.update or batch.set, returns how many
+
+        writes may be a generator; it is committed every MAX_BATCH_WRITES writes.
+        """
+        batch = self.db.batch()
+        written = 0
+        for reference, data in writes:
+            getattr(batch, method)(reference, data)
+            written += 1
+            if written % self.MAX_BATCH_WRITES == 0:
+                batch.commit()
+                batch = self.db.batch()
+        if written % self.MAX_BATCH_WRITES:
+            batch.commit()
+        return written
+    
     # ========== VOICE ANALYSIS OPERATIONS ==========
     
     def create_voice_analysis(self, analysis_data: Dict) -> str:
@@ -337,39 +535,111 @@ class FirestoreService:
         alert_ref.set(alert_data)
         return alert_ref.id
     
-    def get_alerts(self, resolved: Optional[bool] = None) -> List[Dict]:
-        """Get all alerts"""
+    def get_alerts(self, resolved: Optional[bool] = None, user_id: Optional[str] = None,
+                   limit: Optional[int] = None, cursor: Optional[str] = None) -> List[Dict]:
+        """Get alerts, newest first - optionally one user's, one page at a time
+
+        cursor is the id of the last alert of the previous page.
+        """
         alerts_ref = self.db.collection('admin_alerts')
         query = alerts_ref
         
+        # Filtered and sorted server-side (indexes: is_resolved / user_id, created_at desc)
         if resolved is not None:
             query = query.where('is_resolved', '==', resolved)
+        if user_id is not None:
+            query = query.where('user_id', '==', user_id)
+        query = query.order_by('created_at', direction=firestore.Query.DESCENDING)
+        
+        if cursor:
+            cursor_doc = alerts_ref.document(cursor).get()
+            if cursor_doc.exists:
+                query = query.start_after(cursor_doc)
+        if limit:
+            query = query.limit(limit)
         
         alerts = []
         for doc in query.stream():
             alerts.append(doc.to_dict())
-        
-        # Sort by created_at descending
-        alerts.sort(key=lambda x: x.get('created_at', datetime.min), reverse=True)
         return alerts
     
-    def resolve_alert(self, alert_id: str):
-        """Mark alert as resolved"""
-        self.db.collection('admin_alerts').document(alert_id).update({
-            'is_resolved': True,
-            'resolved_at': firestore.SERVER_TIMESTAMP
-        })
+    def resolve_alert(self, alert_id: str) -> bool:
+        """Mark alert as resolved - returns False if the alert does not exist"""
+        # update() fails on a missing document, so it doubles as the existence check
+        try:
+            self.db.collection('admin_alerts').document(alert_id).update({
+                'is_resolved': True,
+                'resolved_at': firestore.SERVER_TIMESTAMP
+            })
+        except NotFound:
+            return False
+        return True
     
     # ========== ADMIN DASHBOARD OPERATIONS ==========
     
-    def get_user_statistics(self, user_id: str) -> Dict:
+    # Fields get_user_statistics (and the dashboard's today's appointments) read
+    # from each bulk-loaded document; transcripts and feature payloads stay on the server
+    STATS_SESSION_FIELDS = ['id', 'session_type', 'start_time', 'end_time', 'depression_score',
+                            'risk_level', 'phq9_score', 'phq9_severity']
+    STATS_MOOD_CHECKIN_FIELDS = ['id', 'mood', 'created_at']
+    STATS_TYPING_FIELDS = ['id', 'risk_level', 'depression_indicator', 'created_at']
+    
+    async def aget_users_statistics(self, users: List[Dict]) -> Dict[str, Dict]:
+        """Get dashboard statistics for many users, keyed by user_id"""
+        # Sessions, mood check-ins and typing analyses for every user come back
+        # in a handful of bulk queries per collection, and the user docs are
+        # already in hand, so nothing is read per user
+        user_ids = [user['id'] for user in users if user.get('id')]
+        sessions_by_user, checkins_by_user, typing_by_user = await asyncio.gather(
+            self.aget_sessions_by_user(user_ids, self.STATS_SESSION_FIELDS),
+            self._aget_docs_by_user('mood_checkins', user_ids, self.STATS_MOOD_CHECKIN_FIELDS),
+            self._aget_docs_by_user('typing_analyses', user_ids, self.STATS_TYPING_FIELDS)
+        )
+        return await asyncio.to_thread(self._build_users_statistics, users, sessions_by_user,
+                                       checkins_by_user, typing_by_user)
+    
+    def _build_users_statistics(self, users: List[Dict], sessions_by_user: Dict[str, List[Dict]],
+                                checkins_by_user: Dict[str, List[Dict]],
+                                typing_by_user: Dict[str, List[Dict]]) -> Dict[str, Dict]:
+        """Statistics for each user from the bulk-read documents, keyed by user_id"""
+        stats = {}
+        for user in users:
+            user_id = user.get('id')
+            if not user_id:
+                continue
+            try:
+                mood_checkins = checkins_by_user.get(user_id, [])
+                mood_checkins.sort(key=self._created_time_key, reverse=True)
+                typing_analyses = typing_by_user.get(user_id, [])
+                typing_analyses.sort(key=self._created_time_key, reverse=True)
+                
+                stats[user_id] = self.get_user_statistics(
+                    user_id,
+                    sessions=sessions_by_user.get(user_id, []),
+                    user=user,
+                    mood_checkins=mood_checkins[:200],
+                    typing_analyses=typing_analyses
+                )
+            except Exception as e:
+                print(f"[ERROR] Failed to get statistics for user {user_id}: {e}")
+        return stats
+    
+    def get_user_statistics(self, user_id: str, sessions: Optional[List[Dict]] = None,
+                            user: Optional[Dict] = None,
+                            mood_checkins: Optional[List[Dict]] = None,
+                            typing_analyses: Optional[List[Dict]] = None,
+                            session_summary: Optional[Dict] = None) -> Dict:
         """Get user statistics for dashboard including mood-based risk (Optimized)"""
-        # 1. Fetch sessions once
-        sessions = self.get_user_sessions(user_id)
-        total_sessions = len(sessions)
+        # Any argument left as None is fetched here; aget_users_statistics
+        # passes them all in from its bulk reads
+        # 1. Session totals - without a session list they come from aggregation
+        # queries, so no session documents are downloaded
+        if sessions is None and session_summary is None:
+            session_summary = self._get_session_summary(user_id)
         
         # 2. Fetch all mood check-ins once (limit 200)
-        mood_checkins = self.get_user_mood_checkins(user_id=user_id, limit=200)
+        if mood_checkins is None:
+            mood_checkins = self.get_user_mood_checkins(user_id=user_id, limit=200)
         
         # 3. Filter recent mood check-ins (last 7 days) from the already fetched list
         from datetime import timedelta
@@ -390,6 +660,12 @@ class FirestoreService:
                 except: return datetime.min.replace(tzinfo=timezone.utc)
             return datetime.min.replace(tzinfo=timezone.utc)
 
+        if session_summary is None:
+            session_summary = self._summarize_sessions(
+                sessions, lambda s: to_datetime_helper(s.get('start_time'))
+            )
+        total_sessions = session_summary['total_sessions']
+        
         seven_days_ago_utc = seven_days_dt.replace(tzinfo=None) # Comparison depends on how they are stored
         
         recent_mood_checkins = [
@@ -397,22 +673,18 @@ class FirestoreService:
             if to_datetime_helper(m.get('created_at')).replace(tzinfo=None) >= seven_days_ago_utc
         ]
         
-        # Calculate average depression score
-        avg_score = 0.0
-        if sessions:
-            scores_with_values = [s.get('depression_score') for s in sessions if s.get('depression_score') is not None]
-            if scores_with_values:
-                avg_score = sum(scores_with_values) / len(scores_with_values)
+        avg_score = session_summary['average_depression_score']
         
         # Get user record
-        user = self.get_user_by_id(user_id)
+        if user is None:
+            user = self.get_user_by_id(user_id)
         user_last_activity = user.get('last_activity') if user else None
         
         latest_activity_dt = to_datetime_helper(user_last_activity)
         last_activity = user_last_activity
 
-        if sessions:
-            last_session = max(sessions, key=lambda s: to_datetime_helper(s.get('start_time')))
+        last_session = session_summary['last_session']
+        if last_session:
             session_time = last_session.get('start_time')
             if to_datetime_helper(session_time) > latest_activity_dt:
                 latest_activity_dt = to_datetime_helper(session_time)
@@ -421,7 +693,8 @@ class FirestoreService:
             session_risk = last_session.get('risk_level', 'low')
             
             # Fetch typing analysis once
-            typing_analyses = self.get_user_typing_analyses(user_id)
+            if typing_analyses is None:
+                typing_analyses = self.get_user_typing_analyses(user_id)
             typing_risk = 'low'
             if typing_analyses:
                 latest = typing_analyses[0]
@@ -464,16 +737,7 @@ class FirestoreService:
                 if not (last_activity.endswith('Z') or '+' in last_activity):
                     last_activity_str = last_activity + 'Z'
 
-        # Get latest PHQ-9 score and severity
-        latest_phq9 = self.get_latest_phq9_session(user_id)
-        
-        # Calculate consultation types
-        video_consultations = 0
-        clinic_consultations = 0
-        for s in sessions:
-            stype = s.get('session_type', 'chatbot')
-            if stype in ['voice', 'video', 'call']: video_consultations += 1
-            elif stype in ['clinic', 'in-person']: clinic_consultations += 1
+        latest_phq9 = session_summary['latest_phq9']
 
         return {
             'total_sessions': total_sessions,
@@ -484,10 +748,153 @@ class FirestoreService:
             'recent_mood_checkins': len(recent_mood_checkins),
             'phq9_score': latest_phq9.get('phq9_score') if latest_phq9 else None,
             'phq9_severity': latest_phq9.get('phq9_severity') if latest_phq9 else None,
-            'video_consultations': video_consultations,
-            'clinic_consultations': clinic_consultations,
-            'sessions': sessions # Return sessions for today's appointment check
+            'video_consultations': session_summary['video_consultations'],
+            'clinic_consultations': session_summary['clinic_consultations'],
+            # Return sessions for today's appointment check (bulk path only)
+            'sessions': sessions if sessions is not None else []
+        }
+    
+    # Session types counted as video and clinic consultations
+    VIDEO_SESSION_TYPES = ['voice', 'video', 'call']
+    CLINIC_SESSION_TYPES = ['clinic', 'in-person']
+    
+    @classmethod
+    def _summarize_sessions(cls, sessions: List[Dict], start_time_key) -> Dict:
+        """Session totals for get_user_statistics from an already loaded list (newest first)"""
+        scores_with_values = [s.get('depression_score') for s in sessions if s.get('depression_score') is not None]
+        session_types = [s.get('session_type', 'chatbot') for s in sessions]
+        return {
+            'total_sessions': len(sessions),
+            'average_depression_score': sum(scores_with_values) / len(scores_with_values) if scores_with_values else 0.0,
+            'last_session': max(sessions, key=start_time_key) if sessions else None,
+            'video_consultations': sum(1 for t in session_types if t in cls.VIDEO_SESSION_TYPES),
+            'clinic_consultations': sum(1 for t in session_types if t in cls.CLINIC_SESSION_TYPES),
+            # Completed PHQ-9 runs are sessions too
+            'latest_phq9': next(
+                (s for s in sessions if s.get('session_type') == 'phq9' and 'phq9_score' in s),
+                None
+            )
         }
+    
+    # Session counters are spread over this many shard documents, summed on
+    # read; Firestore sustains about one write per second per document
+    SESSION_COUNTER_SHARDS = 10
+    
+    def _counter_shards_ref(self):
+        """Shard documents of the session counters kept up to date by create_session"""
+        return self.db.collection('stats').document('global').collection('counter_shards')
+    
+    def _increment_session_counters(self, session_type: str):
+        """Count one new session of session_type in a random shard"""
+        shard_id = str(random.randrange(self.SESSION_COUNTER_SHARDS))
+        self._counter_shards_ref().document(shard_id).set({
+            'total_sessions': firestore.Increment(1),
+            'session_types': {session_type: firestore.Increment(1)}
+        }, merge=True)
+    
+    def _get_session_counters(self) -> Dict:
+        """Session counters summed over all shards"""
+        total_sessions = 0
+        session_types = {}
+        for doc in self._counter_shards_ref().stream():
+            shard = doc.to_dict() or {}
+            total_sessions += shard.get('total_sessions', 0)
+            for session_type, count in shard.get('session_types', {}).items():
+                session_types[session_type] = session_types.get(session_type, 0) + count
+        return {'total_sessions': total_sessions, 'session_types': session_types}
+    
+    async def aget_dashboard_summary(self) -> Dict:
+        """Dashboard totals from the session counter shards and user count aggregations, without scanning"""
+        # Patients are the active users that are neither admins nor sub-admins.
+        # create_user and backfill_user_is_active.py give every user both flags,
+        # so one equality filter selects them (indexes: is_active, is_admin,
+        # is_sub_admin, created_at | gender)
+        patients = (
+            self.db.collection('users')
+            .where('is_active', '==', True)
+            .where('is_admin', '==', False)
+            .where('is_sub_admin', '==', False)
+        )
+        thirty_days_ago = datetime.now(timezone.utc) - timedelta(days=30)
+        
+        def count(query) -> int:
+            return query.count(alias='total').get()[0][0].value or 0
+        
+        # The patient total is the sum of its created_at buckets, so new and
+        # old always add up to it
+        stats, new_patients, old_patients, male, female = await asyncio.gather(
+            asyncio.to_thread(self._get_session_counters),
+            asyncio.to_thread(count, patients.where('created_at', '>=', thirty_days_ago)),
+            asyncio.to_thread(count, patients.where('created_at', '<', thirty_days_ago)),
+            asyncio.to_thread(count, patients.where('gender', '==', 'male')),
+            asyncio.to_thread(count, patients.where('gender', '==', 'female'))
+        )
+        total_patients = new_patients + old_patients
+        
+        session_types = stats.get('session_types', {})
+        return {
+            'total_patients': total_patients,
+            'new_patients': new_patients,
+            'old_patients': old_patients,
+            'total_sessions': stats.get('total_sessions', 0),
+            'video_consultations': sum(session_types.get(t, 0) for t in self.VIDEO_SESSION_TYPES),
+            'clinic_consultations': sum(session_types.get(t, 0) for t in self.CLINIC_SESSION_TYPES),
+            'male': male,
+            'female': female,
+            'other': total_patients - male - female
+        }
+    
+    def _session_summary_reads(self, user_id: str) -> List[Callable[[], object]]:
+        """The independent reads behind a session summary, in _session_summary's argument order"""
+        sessions_query = self.db.collection('sessions').where('user_id', '==', user_id)
+        
+        def aggregate(query):
+            return {result.alias: result.value for result in query.get()[0]}
+        
+        def latest_session():
+            query = (
+                sessions_query
+                .order_by('start_time', direction=firestore.Query.DESCENDING)
+                .select(self.STATS_SESSION_FIELDS)
+                .limit(1)
+            )
+            return next((doc.to_dict() for doc in query.stream()), None)
+        
+        # (indexes: user_id + depression_score for avg(), user_id + session_type,
+        # user_id + start_time desc)
+        return [
+            lambda: aggregate(sessions_query.count(alias='total').avg('depression_score', alias='average')),
+            lambda: aggregate(sessions_query.where('session_type', 'in', self.VIDEO_SESSION_TYPES)
+                              .count(alias='total')),
+            lambda: aggregate(sessions_query.where('session_type', 'in', self.CLINIC_SESSION_TYPES)
+                              .count(alias='total')),
+            latest_session,
+            lambda: self.get_latest_phq9_session(user_id),
+        ]
+    
+    @staticmethod
+    def _session_summary(totals: Dict, video: Dict, clinic: Dict,
+                         last_session: Optional[Dict], latest_phq9: Optional[Dict]) -> Dict:
+        """Session totals for get_user_statistics from the results of _session_summary_reads"""
+        return {
+            'total_sessions': totals.get('total') or 0,
+            'average_depression_score': totals.get('average') or 0.0,
+            'last_session': last_session,
+            'video_consultations': video.get('total') or 0,
+            'clinic_consultations': clinic.get('total') or 0,
+            'latest_phq9': latest_phq9
+        }
+    
+    def _get_session_summary(self, user_id: str) -> Dict:
+        """Session totals for get_user_statistics from aggregation queries, without loading sessions"""
+        return self._session_summary(*(read() for read in self._session_summary_reads(user_id)))
+    
+    async def aget_session_summary(self, user_id: str) -> Dict:
+        """_get_session_summary with its reads side by side on the event loop's default executor"""
+        results = await asyncio.gather(*(
+            asyncio.to_thread(read) for read in self._session_summary_reads(user_id)
+        ))
+        return self._session_summary(*results)
 
     def update_user_fake_status(self, user_id: str, fake_assessment: Dict):
         """Persist fake detection result on the user profile to avoid frequent recalculation"""
@@ -665,19 +1072,7 @@ class FirestoreService:
                     print(f"[ERROR] Error processing mood check-in document {doc.id}: {e}")
                     continue
             
-            # Sort by created_at descending (handle various time formats)
-            def get_created_time(c):
-                created_at = c.get('created_at')
-                if isinstance(created_at, datetime):
-                    return created_at
-                elif isinstance(created_at, str):
-                    try:
-                        return datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                    except:
-                        pass
-                return datetime.min
-            
-            checkins.sort(key=get_created_time, reverse=True)
+            checkins.sort(key=self._created_time_key, reverse=True)
             
             print(f"[INFO] Retrieved {len(checkins)} mood check-ins for user {user_id} (limited to {limit})")
             return checkins[:limit]
@@ -688,14 +1083,23 @@ class FirestoreService:
             traceback.print_exc()
             return []
     
+    @staticmethod
+    def _created_time_key(c: Dict):
+        """Sort key for created_at (handle various time formats)"""
+        return FirestoreService._utc_time_key(c.get('created_at'))
+    
     def get_all_mood_checkins(
         self,
         limit: int = 100,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        start_after_id: Optional[str] = None
     ) -> List[Dict]:
-        """Get all mood check-ins (for admin panel)"""
+        """Get one page of mood check-ins, newest first (for admin panel)
+
+        start_after_id is the id of the last check-in of the previous page.
+        """
         mood_ref = self.db.collection('mood_checkins')
         query = mood_ref
         
@@ -706,14 +1110,25 @@ class FirestoreService:
         if end_date:
             query = query.where('date', '<=', end_date)
         
-        checkins = []
-        for doc in query.stream():
-            checkins.append(doc.to_dict())
-        
-        # Sort by created_at descending
-        checkins.sort(key=lambda x: x.get('created_at', datetime.min), reverse=True)
+        # Sorted and limited server-side; a range on date has to be ordered by
+        # date first (indexes: [user_id,] [date desc,] created_at desc).
+        # Check-ins without created_at are not matched until
+        # backfill_mood_checkin_created_at.py has been run
+        if start_date or end_date:
+            query = query.order_by('date', direction=firestore.Query.DESCENDING)
+        query = query.order_by('created_at', direction=firestore.Query.DESCENDING)
+        if start_after_id:
+            cursor_doc = mood_ref.document(start_after_id).get()
+            if cursor_doc.exists:
+                query = query.start_after(cursor_doc)
         
-        return checkins[:limit]
+        checkins = []
+        for doc in query.limit(limit).stream():
+            checkin_data = doc.to_dict() or {}
+            if 'id' not in checkin_data:
+                checkin_data['id'] = doc.id
+            checkins.append(checkin_data)
+        return checkins
 
     # ========== BIO-FEEDBACK OPERATIONS ==========
     
@@ -7,36 +7,75 @@ Training:   ai_models/stress/train_keystroke_stress_model.py
 """
 
 from __future__ import annotations
+import asyncio
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
 
-# ── Model loading (lazy, loaded once) ────────────────────────────────────────
+# ── Model loading (loaded once, arrays memory-mapped) ────────────────────────
+# routes/stress.py builds its service at import, so the bundle is warm before
+# the first request. mmap_mode="r" maps the forest's node/value arrays straight
+# from the (uncompressed) joblib file: every uvicorn worker shares the same
+# page-cache pages instead of holding a private copy of the model.
 _MODEL_PATH = (
     Path(__file__).resolve().parent.parent.parent
     / "models" / "keystroke_stress" / "keystroke_stress_model.joblib"
 )
 
 _model        = None
+_classes      = None
 _feature_cols = None
+_feature_idx  = None   # FEATURE_COLS -> _feature_cols gather, None when identical
+_model_tail   = None   # pipeline without its imputer, for NaN-free batches
 
 
 def _load_model():
-    global _model, _feature_cols
+    global _model, _classes, _feature_cols, _feature_idx, _model_tail
     if _model is not None:
         return
     try:
         import joblib
-        bundle        = joblib.load(_MODEL_PATH)
+        bundle        = joblib.load(_MODEL_PATH, mmap_mode="r")
         _model        = bundle["model"]
+        _classes      = _model.classes_
         _feature_cols = bundle["feature_cols"]
+        _feature_idx  = _compile_feature_idx(_feature_cols)
+        _model_tail   = _strip_imputer(_model)
         print(f"[stress_analysis] Model loaded from {_MODEL_PATH}")
     except Exception as e:
         print(f"[stress_analysis] WARNING: Could not load model: {e}")
         _model        = None
+        _classes      = None
         _feature_cols = None
+        _feature_idx  = None
+        _model_tail   = None
+
+
+def _strip_imputer(model):
+    """
+    Return the pipeline minus a leading SimpleImputer step, or None.
+    The serving extractor fills every feature with a finite value, so the
+    imputer is a no-op copy on almost every request.
+    """
+    steps = getattr(model, "steps", None)
+    if not steps or len(steps) < 2 or steps[0][0] != "imputer":
+        return None
+    return model[1:]
+
+
+def _compile_feature_idx(feature_cols) -> Optional[np.ndarray]:
+    """
+    Resolve the model's column order against FEATURE_COLS once at load time.
+    Columns the extractor does not produce point at a trailing 0.0 slot.
+    """
+    if list(feature_cols) == FEATURE_COLS:
+        return None
+    pos = {col: i for i, col in enumerate(FEATURE_COLS)}
+    return np.array([pos.get(col, len(FEATURE_COLS)) for col in feature_cols], dtype=np.intp)
 
 
 # ── Feature constants ─────────────────────────────────────────────────────────
@@ -52,69 +91,234 @@ FEATURE_COLS = [
 
 PAUSE_THRESHOLD_S  = 1.0
 STRESS_LEVEL_MAP   = {0: "low", 1: "medium", 2: "high"}
+SNAPSHOT_COLS      = ["hold_mean", "dd_mean", "typing_speed_cps",
+                      "backspace_ratio", "long_pause_dd_ratio"]
+
+(_HOLD_MEAN, _HOLD_STD, _DD_MEAN, _DD_STD, _UD_MEAN, _UD_STD,
+ _LONG_PAUSE_DD, _LONG_PAUSE_UD, _BACKSPACE_RATIO, _TYPING_SPEED) = range(len(FEATURE_COLS))
+_SNAPSHOT_IDX = [FEATURE_COLS.index(col) for col in SNAPSHOT_COLS]
 
 
 # ── Feature extraction ────────────────────────────────────────────────────────
 
-def _extract_features(events: List[Any]) -> pd.DataFrame:
-    """Extract timing features from a list of KeystrokeEvent objects or dicts."""
+def _to_float(value: Any) -> float:
+    """Coerce a raw event field to float, mapping bad/missing values to NaN."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _extract_feature_vector(events: List[Any]) -> np.ndarray:
+    """
+    Extract timing features (in FEATURE_COLS order) from KeystrokeEvent objects or dicts.
+    Timestamps are epoch seconds, so the arithmetic stays float64; only the
+    finished feature vector is float32, the dtype the model was trained on.
+    """
+    vec = np.zeros(len(FEATURE_COLS), dtype=np.float32)
     if not events:
-        return pd.DataFrame([{col: 0.0 for col in FEATURE_COLS}])
+        return vec
 
     first = events[0]
-    if hasattr(first, "model_dump"):
-        rows = [e.model_dump() for e in events]
-    elif hasattr(first, "dict"):
-        rows = [e.dict() for e in events]
-    elif isinstance(first, dict):
-        rows = events
+    if isinstance(first, dict):
+        get = dict.get
+    elif hasattr(first, "press_time"):
+        get = getattr
     else:
         raise TypeError(f"Unsupported event type: {type(first)}")
 
-    df = pd.DataFrame(rows).rename(columns={
-        "press_time":   "Press_Time",
-        "release_time": "Release_Time",
-        "key":          "Key",
-    })
+    n       = len(events)
+    press   = np.fromiter((_to_float(get(e, "press_time", None))   for e in events), dtype=np.float64, count=n)
+    release = np.fromiter((_to_float(get(e, "release_time", None)) for e in events), dtype=np.float64, count=n)
+    is_bsp  = np.fromiter((bool(get(e, "is_backspace", False))     for e in events), dtype=bool,       count=n)
+
+    # Non-finite timestamps are dropped so every emitted feature is finite
+    valid = np.isfinite(press) & np.isfinite(release)
+    if not valid.any():
+        return vec
+
+    order   = np.argsort(press[valid], kind="stable")
+    press   = press[valid][order]
+    release = release[valid][order]
+    is_bsp  = is_bsp[valid][order]
+
+    hold = np.maximum(release - press, 0.0)
+    dd   = np.diff(press)
+    ud   = press[1:] - release[:-1]
+
+    total    = press.size
+    duration = float(press[-1] - press[0])
+
+    vec[_HOLD_MEAN]       = hold.mean()
+    vec[_HOLD_STD]        = hold.std()
+    vec[_BACKSPACE_RATIO] = int(is_bsp.sum()) / total
+    vec[_TYPING_SPEED]    = total / duration if duration > 0 else 0.0
+
+    if dd.size:
+        vec[_DD_MEAN]       = dd.mean()
+        vec[_DD_STD]        = dd.std()
+        vec[_UD_MEAN]       = ud.mean()
+        vec[_UD_STD]        = ud.std()
+        vec[_LONG_PAUSE_DD] = (dd > PAUSE_THRESHOLD_S).mean()
+        vec[_LONG_PAUSE_UD] = (ud > PAUSE_THRESHOLD_S).mean()
+    return vec
 
-    for col in ["Press_Time", "Release_Time"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
 
-    df = df.dropna(subset=["Press_Time", "Release_Time"]).reset_index(drop=True)
-    if df.empty:
-        return pd.DataFrame([{col: 0.0 for col in FEATURE_COLS}])
+def _extract_features(events: List[Any]) -> Dict[str, float]:
+    """Extract timing features from a list of KeystrokeEvent objects or dicts."""
+    return dict(zip(FEATURE_COLS, _extract_feature_vector(events).tolist()))
+
+
+def _model_row(vec: np.ndarray) -> np.ndarray:
+    """Project a FEATURE_COLS vector onto the model's column order."""
+    if _feature_idx is None:
+        return vec
+    return np.append(vec, np.float32(0.0))[_feature_idx]
 
-    df = df.sort_values("Press_Time").reset_index(drop=True)
 
-    df["Hold"] = (df["Release_Time"] - df["Press_Time"]).clip(lower=0)
-    df["DD"]   = df["Press_Time"].diff()
-    df["UD"]   = df["Press_Time"] - df["Release_Time"].shift(1)
+# ── Micro-batching ────────────────────────────────────────────────────────────
+# Concurrent /analyze requests are coalesced into one predict_proba call so the
+# fixed sklearn/BLAS dispatch overhead is paid once per batch, not per request.
+MAX_BATCH      = 32
+MAX_LATENCY_MS = 15
 
-    is_backspace = df.get("is_backspace", pd.Series(False, index=df.index))
-    is_backspace = is_backspace.fillna(False).astype(bool)
+_NOT_LOADED_RESULT = {
+    "stress_pred": 0,
+    "stress_level": "low",
+    "stress_probabilities": {"low": 1.0, "medium": 0.0, "high": 0.0},
+    "feature_snapshot": {},
+    "warning": "Model not loaded — install model file and restart.",
+}
 
-    total     = len(df)
-    bsp_ratio = int(is_backspace.sum()) / total if total > 0 else 0.0
-    duration  = float(df["Press_Time"].iloc[-1] - df["Press_Time"].iloc[0])
-    speed     = total / duration if duration > 0 else 0.0
 
-    dd_valid = df["DD"].dropna()
-    ud_valid = df["UD"].dropna()
+def _predict_proba(X: np.ndarray) -> np.ndarray:
+    """Score a (B, F) feature matrix with the loaded pipeline."""
+    model = _model_tail if _model_tail is not None and not np.isnan(X).any() else _model
+    return model.predict_proba(pd.DataFrame(X, columns=_feature_cols))
 
-    features = {
-        "hold_mean":           float(df["Hold"].mean()),
-        "hold_std":            float(df["Hold"].std(ddof=0)),
-        "dd_mean":             float(dd_valid.mean())     if len(dd_valid) else 0.0,
-        "dd_std":              float(dd_valid.std(ddof=0)) if len(dd_valid) else 0.0,
-        "ud_mean":             float(ud_valid.mean())     if len(ud_valid) else 0.0,
-        "ud_std":              float(ud_valid.std(ddof=0)) if len(ud_valid) else 0.0,
-        "long_pause_dd_ratio": float((dd_valid > PAUSE_THRESHOLD_S).mean()) if len(dd_valid) else 0.0,
-        "long_pause_ud_ratio": float((ud_valid > PAUSE_THRESHOLD_S).mean()) if len(ud_valid) else 0.0,
-        "backspace_ratio":     bsp_ratio,
-        "typing_speed_cps":    speed,
-    }
 
-    return pd.DataFrame([features])
+class _PredictionBatcher:
+    """
+    Async request coalescer in front of _predict_proba.
+    Waits at most MAX_LATENCY_MS for up to MAX_BATCH rows, then scores them
+    together in a worker thread and resolves each caller's future.
+    """
+
+    def __init__(self, max_batch: int = MAX_BATCH, max_latency_ms: float = MAX_LATENCY_MS):
+        self.max_batch   = max_batch
+        self.max_latency = max_latency_ms / 1000.0
+        self._queue: Optional[asyncio.Queue]             = None
+        self._task:  Optional[asyncio.Task]              = None
+        self._loop:  Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self) -> None:
+        # A queue and task belong to one event loop, so a new loop (a reload,
+        # a test client) gets its own rather than waiting on a dead one
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop  = loop
+        self._queue = asyncio.Queue()
+        self._task  = loop.create_task(self._run())
+
+    async def submit(self, row: np.ndarray) -> np.ndarray:
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                deadline = loop.time() + self.max_latency
+                while len(batch) < self.max_batch:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                X     = np.vstack([row for row, _ in batch])
+                proba = await loop.run_in_executor(None, _predict_proba, X)
+                for i, (_, future) in enumerate(batch):
+                    if not future.done():
+                        future.set_result(proba[i])
+            except asyncio.CancelledError:
+                # Shutting down: nobody will score what is still waiting
+                while not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                for _, future in batch:
+                    future.cancel()
+                raise
+            except Exception as e:
+                # Whatever failed, every caller in this cycle gets the error
+                # instead of waiting forever, and the loop keeps serving
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+
+_batcher = _PredictionBatcher()
+
+
+# ── Score cache ───────────────────────────────────────────────────────────────
+# Chat clients resend the same keystroke window on retries. Rows are quantised
+# before scoring, so a cache hit returns exactly what a fresh score would.
+SCORE_CACHE_SIZE     = 4096
+SCORE_CACHE_DECIMALS = 3
+
+
+class _ScoreCache:
+    """
+    Small LRU of class probabilities keyed by the quantised feature row.
+    predict() can run in worker threads, so every access holds the lock.
+    """
+
+    def __init__(self, maxsize: int = SCORE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits    = 0
+        self.misses  = 0
+        self._data: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._lock   = threading.Lock()
+
+    @staticmethod
+    def quantize(row: np.ndarray) -> np.ndarray:
+        return np.round(row, SCORE_CACHE_DECIMALS)
+
+    def get(self, key: tuple) -> Optional[np.ndarray]:
+        with self._lock:
+            proba = self._data.get(key)
+            if proba is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return proba
+
+    def put(self, key: tuple, proba: np.ndarray) -> None:
+        with self._lock:
+            self._data[key] = proba
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size, hits, misses = len(self._data), self.hits, self.misses
+        total = hits + misses
+        return {
+            "size": size,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+
+
+_score_cache = _ScoreCache()
 
 
 # ── Service class ─────────────────────────────────────────────────────────────
@@ -134,6 +338,14 @@ class StressAnalysisService:
     def model_loaded(self) -> bool:
         return _model is not None
 
+    @property
+    def cache_stats(self) -> Dict[str, Any]:
+        return _score_cache.stats()
+
+    def start_batcher(self) -> None:
+        """Launch the background micro-batching task (call from app startup)."""
+        _batcher.start()
+
     def predict(self, events: List[Any]) -> Dict[str, Any]:
         """
         Run stress prediction on a list of keystroke events.
@@ -147,20 +359,44 @@ class StressAnalysisService:
         """
         if not self.model_loaded:
             # Graceful degradation if model file is missing
-            return {
-                "stress_pred": 0,
-                "stress_level": "low",
-                "stress_probabilities": {"low": 1.0, "medium": 0.0, "high": 0.0},
-                "feature_snapshot": {},
-                "warning": "Model not loaded — install model file and restart.",
-            }
+            return dict(_NOT_LOADED_RESULT)
 
-        features_df = _extract_features(events)
-        X = features_df.reindex(columns=_feature_cols, fill_value=0.0)
+        vec, row, key, proba = self._lookup(events)
+        if proba is None:
+            proba = self._store(key, _predict_proba(row[None, :])[0])
+        return self._build_result(vec, proba, len(events))
 
-        stress_pred = int(_model.predict(X)[0])
-        proba       = _model.predict_proba(X)[0]
-        classes     = _model.classes_.tolist()
+    async def predict_async(self, events: List[Any]) -> Dict[str, Any]:
+        """Same as predict(), but scored through the shared micro-batcher."""
+        if not self.model_loaded:
+            return dict(_NOT_LOADED_RESULT)
+
+        vec, row, key, proba = self._lookup(events)
+        if proba is None:
+            proba = self._store(key, await _batcher.submit(row))
+        return self._build_result(vec, proba, len(events))
+
+    @staticmethod
+    def _lookup(events: List[Any]) -> Tuple[np.ndarray, np.ndarray, tuple, Optional[np.ndarray]]:
+        """
+        Feature vector, quantised model row and its cache key for events,
+        plus the cached class probabilities (None on a miss).
+        """
+        vec = _extract_feature_vector(events)
+        row = _score_cache.quantize(_model_row(vec))
+        key = tuple(row.tolist())
+        return vec, row, key, _score_cache.get(key)
+
+    @staticmethod
+    def _store(key: tuple, proba: np.ndarray) -> np.ndarray:
+        """Cache freshly scored probabilities and hand them back."""
+        _score_cache.put(key, proba)
+        return proba
+
+    @staticmethod
+    def _build_result(vec: np.ndarray, proba: np.ndarray, n_events: int) -> Dict[str, Any]:
+        classes     = _classes.tolist()
+        stress_pred = int(classes[int(np.argmax(proba))])
 
         stress_probabilities = {
             STRESS_LEVEL_MAP[cls]: round(float(prob), 4)
@@ -168,13 +404,12 @@ class StressAnalysisService:
         }
 
         feature_snapshot = {
-            col: round(float(features_df[col].iloc[0]), 4)
-            for col in ["hold_mean", "dd_mean", "typing_speed_cps",
-                        "backspace_ratio", "long_pause_dd_ratio"]
+            col: round(value, 4)
+            for col, value in zip(SNAPSHOT_COLS, vec[_SNAPSHOT_IDX].tolist())
         }
 
         warning = None
-        if len(events) < 20:
+        if n_events < 20:
             warning = "Short session — result may be less accurate."
 
         return {
@@ -15,7 +15,7 @@ from app.services.chatbot_service import ChatbotService
 from app.services.voice_analysis import VoiceAnalysisService
 from app.services.call_bot_detection import CallBotDetectionService
 from app.services.fake_detection import FakeDetectionService
-from app.services.firestore_service import FirestoreService
+from app.services.firestore_client import firestore_service
 from app.services.batch_fake_detection import BatchFakeDetectionService
 from openai import OpenAI
 from gtts import gTTS
@@ -28,7 +28,7 @@ class VoiceCallService:
     
     def __init__(self):
         self.chatbot_service = ChatbotService()
-        self.firestore_service = FirestoreService()
+        self.firestore_service = firestore_service
         self.voice_analysis_service = VoiceAnalysisService()
         self.call_bot_service = CallBotDetectionService()
         self.fake_detection_service = FakeDetectionService()
@@ -0,0 +1,19 @@
+"""
+One-off backfill: set created_at on admin alerts that predate the field.
+The alert list is ordered by created_at server-side, and Firestore leaves
+documents without the ordered field out of such queries, so these alerts
+would not be listed. The document's own creation time is used.
+"""
+
+from app.services.firestore_service import FirestoreService
+
+fs = FirestoreService()
+alerts_ref = fs.db.collection('admin_alerts')
+
+updated = fs.batch_write(
+    (doc.reference, {'created_at': doc.create_time})
+    for doc in alerts_ref.select(['created_at']).stream()
+    if not (doc.to_dict() or {}).get('created_at')
+)
+
+print(f"Set created_at on {updated} alerts")
@@ -0,0 +1,28 @@
+"""
+One-off backfill: copy each user's username onto their existing admin alerts,
+so the alert list never has to read user documents.
+Alerts created after this change already carry the username.
+"""
+
+from app.services.firestore_service import FirestoreService
+
+fs = FirestoreService()
+alerts_ref = fs.db.collection('admin_alerts')
+
+pending = []  # (alert reference, user_id)
+for doc in alerts_ref.stream():
+    alert = doc.to_dict() or {}
+    if not alert.get('username') and alert.get('user_id'):
+        pending.append((doc.reference, alert['user_id']))
+print(f"Alerts without a username: {len(pending)}")
+
+# One batched read for all the users involved
+users = fs.get_users_by_ids([user_id for _, user_id in pending])
+
+updated = fs.batch_write(
+    (alert_ref, {'username': users[user_id]['username']})
+    for alert_ref, user_id in pending
+    if users.get(user_id, {}).get('username')
+)
+
+print(f"Backfilled {updated} alerts")
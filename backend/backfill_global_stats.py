@@ -0,0 +1,29 @@
+"""
+One-off backfill: build the session counters (stats/global/counter_shards) from
+the existing sessions, so /admin/dashboard/summary is correct from the start.
+After this, FirestoreService.create_session keeps the counters up to date.
+Run once, before deploying the counters - increments made while it runs are
+overwritten.
+"""
+
+from collections import Counter
+
+from app.services.firestore_service import FirestoreService
+
+fs = FirestoreService()
+
+session_types = Counter(
+    (doc.to_dict() or {}).get('session_type', 'chatbot')
+    for doc in fs.db.collection('sessions').select(['session_type']).stream()
+)
+total_sessions = sum(session_types.values())
+
+# All existing sessions go into shard 0; the other shards start from zero
+shards_ref = fs._counter_shards_ref()
+fs.batch_write([
+    (shards_ref.document('0'), {'total_sessions': total_sessions, 'session_types': dict(session_types)}),
+    *((shards_ref.document(str(shard)), {'total_sessions': 0, 'session_types': {}})
+      for shard in range(1, FirestoreService.SESSION_COUNTER_SHARDS))
+], method='set')
+
+print(f"Counted {total_sessions} sessions across {len(session_types)} session types")
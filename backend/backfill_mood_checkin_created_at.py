@@ -0,0 +1,20 @@
+"""
+One-off backfill: set created_at on mood check-ins that predate the field.
+The admin check-in listing is ordered by created_at server-side, and
+Firestore leaves documents without the ordered field out of such queries,
+so these check-ins would not be listed. The document's own creation time
+is used.
+"""
+
+from app.services.firestore_service import FirestoreService
+
+fs = FirestoreService()
+checkins_ref = fs.db.collection('mood_checkins')
+
+updated = fs.batch_write(
+    (doc.reference, {'created_at': doc.create_time})
+    for doc in checkins_ref.select(['created_at']).stream()
+    if not (doc.to_dict() or {}).get('created_at')
+)
+
+print(f"Set created_at on {updated} mood check-ins")
@@ -0,0 +1,33 @@
+"""
+One-off backfill: set is_active, is_admin, is_sub_admin and created_at on
+user documents that predate the fields, so server-side is_active filters,
+created_at ordering (e.g. the paged admin user listing) and the dashboard's
+patient counts include them. Missing role flags default to False and a
+missing created_at is taken from the document's own creation time.
+New users get all four fields from FirestoreService.create_user.
+"""
+
+from app.services.firestore_service import FirestoreService
+
+fs = FirestoreService()
+users_ref = fs.db.collection('users')
+
+
+def user_updates():
+    """(user reference, missing fields) for every user lacking any of them"""
+    for doc in users_ref.select(['is_active', 'is_admin', 'is_sub_admin', 'created_at']).stream():
+        user_data = doc.to_dict() or {}
+        updates = {}
+        if 'is_active' not in user_data:
+            updates['is_active'] = True
+        for flag in ('is_admin', 'is_sub_admin'):
+            if flag not in user_data:
+                updates[flag] = False
+        if not user_data.get('created_at'):
+            updates['created_at'] = doc.create_time
+        if updates:
+            yield doc.reference, updates
+
+
+updated = fs.batch_write(user_updates())
+print(f"Backfilled is_active/role flags/created_at on {updated} users")
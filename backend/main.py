@@ -8,7 +8,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import Optional, List
+import asyncio
 import uvicorn
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from app.config import settings
@@ -53,6 +55,13 @@ app.include_router(endpoints.router)
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
+    # The Firestore SDK blocks, so routes push its calls onto the default
+    # executor with asyncio.to_thread. The stock pool is min(32, CPUs + 4)
+    # threads, which on a small instance serializes parallel reads
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=settings.FIRESTORE_IO_THREADS, thread_name_prefix="firestore-io")
+    )
+    
     # Firebase is already initialized before routes import
     # Just verify it's working
     from app.services.firebase_service import is_firebase_initialized
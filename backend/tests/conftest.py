@@ -0,0 +1,25 @@
+"""
+Shared fixtures. Routes and services talk to an in-memory Firestore
+(tests/fake_firestore.py) instead of a live Firebase project.
+"""
+
+import pytest
+
+from app.services import firebase_service
+
+# The shared FirestoreService is built at import time; point it at the fake
+# before any app module is imported
+firebase_service.is_firebase_initialized = lambda: True
+firebase_service.get_firestore_db = lambda: None
+
+from app.services.firestore_client import firestore_service  # noqa: E402
+from tests.fake_firestore import FakeFirestore  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """A fresh, empty Firestore behind the shared firestore_service"""
+    fake = FakeFirestore()
+    firestore_service._db = fake
+    yield fake
+    firestore_service._db = None
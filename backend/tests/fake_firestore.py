@@ -0,0 +1,258 @@
+"""
+In-memory stand-in for the Firestore client, covering the subset of the API the
+backend uses: collections and documents, where / order_by / start_after /
+offset / limit / select queries, count and avg aggregations, batched reads and
+writes, Increment and SERVER_TIMESTAMP.
+
+Query semantics follow Firestore where it matters to the code under test: a
+document without a filtered or ordered field is not matched, and naive
+datetimes compare as UTC.
+"""
+
+import copy
+import functools
+from datetime import datetime, timezone
+from itertools import count as _counter
+
+from google.api_core.exceptions import NotFound
+from google.cloud.firestore_v1.transforms import Increment, Sentinel
+
+_ids = _counter(1)
+
+
+def _comparable(value):
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _resolve(value, old=None):
+    """Apply write transforms (Increment, SERVER_TIMESTAMP) against the old value"""
+    if isinstance(value, Increment):
+        return (old or 0) + value.value
+    if isinstance(value, Sentinel):
+        return datetime.now(timezone.utc)
+    if isinstance(value, dict):
+        old = old if isinstance(old, dict) else {}
+        return {key: _resolve(item, old.get(key)) for key, item in value.items()}
+    return value
+
+
+def _merge(old: dict, new: dict) -> dict:
+    merged = dict(old)
+    for key, value in new.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = _resolve(value, merged.get(key))
+    return merged
+
+
+class FakeSnapshot:
+    def __init__(self, reference, data, create_time=None, fields=None):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self.create_time = create_time
+        if data is not None and fields is not None:
+            data = {key: value for key, value in data.items() if key in fields}
+        self._data = data
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+    def get(self, field):
+        return (self._data or {}).get(field)
+
+
+class FakeDocument:
+    def __init__(self, db, path):
+        self._db = db
+        self._path = path
+        self.id = path[-1]
+
+    def collection(self, name):
+        return FakeCollection(self._db, self._path + (name,))
+
+    def get(self):
+        data = self._db._docs.get(self._path)
+        return FakeSnapshot(self, copy.deepcopy(data), self._db._created.get(self._path))
+
+    def set(self, data, merge=False):
+        old = self._db._docs.get(self._path, {})
+        self._db._docs[self._path] = _merge(old, data) if merge else _resolve(data)
+        self._db._created.setdefault(self._path, datetime.now(timezone.utc))
+
+    def update(self, updates):
+        if self._path not in self._db._docs:
+            raise NotFound(f"No document to update: {'/'.join(self._path)}")
+        self._db._docs[self._path] = _merge(self._db._docs[self._path], updates)
+
+    def delete(self):
+        self._db._docs.pop(self._path, None)
+
+
+class FakeAggregation:
+    def __init__(self, query, aggregations):
+        self._query = query
+        self._aggregations = aggregations
+
+    def count(self, alias):
+        return FakeAggregation(self._query, self._aggregations + [('count', None, alias)])
+
+    def avg(self, field, alias):
+        return FakeAggregation(self._query, self._aggregations + [('avg', field, alias)])
+
+    def get(self):
+        docs = [doc.to_dict() for doc in self._query.stream()]
+        results = []
+        for kind, field, alias in self._aggregations:
+            if kind == 'count':
+                value = len(docs)
+            else:
+                values = [doc[field] for doc in docs if isinstance(doc.get(field), (int, float))]
+                value = sum(values) / len(values) if values else None
+            results.append(FakeAggregationResult(alias, value))
+        return [results]
+
+
+class FakeAggregationResult:
+    def __init__(self, alias, value):
+        self.alias = alias
+        self.value = value
+
+
+class FakeQuery:
+    def __init__(self, collection, filters=(), orders=(), fields=None,
+                 cursor=None, skip=0, max_results=None):
+        self._collection = collection
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._fields = fields
+        self._cursor = cursor
+        self._skip = skip
+        self._max_results = max_results
+
+    def _copy(self, **changes):
+        state = dict(filters=self._filters, orders=self._orders, fields=self._fields,
+                     cursor=self._cursor, skip=self._skip, max_results=self._max_results)
+        state.update(changes)
+        return FakeQuery(self._collection, **state)
+
+    def where(self, field, op, value):
+        return self._copy(filters=self._filters + ((field, op, value),))
+
+    def order_by(self, field, direction='ASCENDING'):
+        return self._copy(orders=self._orders + ((field, direction),))
+
+    def select(self, fields):
+        return self._copy(fields=list(fields))
+
+    def start_after(self, snapshot):
+        return self._copy(cursor=snapshot)
+
+    def offset(self, skip):
+        return self._copy(skip=skip)
+
+    def limit(self, max_results):
+        return self._copy(max_results=max_results)
+
+    def count(self, alias=None):
+        return FakeAggregation(self, [('count', None, alias)])
+
+    def _matches(self, data):
+        for field, op, value in self._filters:
+            if field not in data:
+                return False
+            actual, value = _comparable(data[field]), _comparable(value)
+            if op == 'in':
+                ok = actual in value
+            elif op == '==':
+                ok = actual == value
+            else:
+                try:
+                    ok = {'>=': actual >= value, '<=': actual <= value,
+                          '>': actual > value, '<': actual < value}[op]
+                except TypeError:
+                    ok = False
+            if not ok:
+                return False
+        return all(field in data for field, _ in self._orders)
+
+    def _compare(self, a, b):
+        (a_id, a_data), (b_id, b_data) = a, b
+        for field, direction in self._orders:
+            x, y = _comparable(a_data[field]), _comparable(b_data[field])
+            if x != y:
+                result = -1 if x < y else 1
+                return -result if direction == 'DESCENDING' else result
+        return (a_id > b_id) - (a_id < b_id)
+
+    def stream(self):
+        db, path = self._collection._db, self._collection._path
+        rows = [
+            (doc_path[-1], data) for doc_path, data in db._docs.items()
+            if doc_path[:-1] == path and self._matches(data)
+        ]
+        rows.sort(key=functools.cmp_to_key(self._compare))
+        if self._cursor is not None:
+            after = (self._cursor.id, self._cursor.to_dict())
+            rows = [row for row in rows if self._compare(row, after) > 0]
+        rows = rows[self._skip:]
+        if self._max_results is not None:
+            rows = rows[:self._max_results]
+        for doc_id, data in rows:
+            reference = FakeDocument(db, path + (doc_id,))
+            yield FakeSnapshot(reference, copy.deepcopy(data), db._created.get(path + (doc_id,)), self._fields)
+
+    def get(self):
+        return list(self.stream())
+
+
+class FakeCollection(FakeQuery):
+    def __init__(self, db, path):
+        self._db = db
+        self._path = path
+        super().__init__(self)
+
+    def document(self, doc_id=None):
+        return FakeDocument(self._db, self._path + (doc_id or f"auto{next(_ids)}",))
+
+    def add_doc(self, doc_id, data, create_time=None):
+        """Test helper: store data as-is under doc_id"""
+        self._db._docs[self._path + (doc_id,)] = copy.deepcopy(data)
+        self._db._created[self._path + (doc_id,)] = create_time or datetime.now(timezone.utc)
+
+
+class FakeBatch:
+    def __init__(self):
+        self._writes = []
+
+    def set(self, reference, data, merge=False):
+        self._writes.append(lambda: reference.set(data, merge=merge))
+
+    def update(self, reference, updates):
+        self._writes.append(lambda: reference.update(updates))
+
+    def delete(self, reference):
+        self._writes.append(reference.delete)
+
+    def commit(self):
+        for write in self._writes:
+            write()
+        self._writes = []
+
+
+class FakeFirestore:
+    def __init__(self):
+        self._docs = {}     # path tuple -> document data
+        self._created = {}  # path tuple -> create_time
+
+    def collection(self, name):
+        return FakeCollection(self, (name,))
+
+    def batch(self):
+        return FakeBatch()
+
+    def get_all(self, references, field_paths=None):
+        return [reference.get() for reference in references]
@@ -0,0 +1,276 @@
+"""Admin routes: listings and cursor paging, the response cache and timestamp helpers"""
+
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+
+from app.routes import admin
+from app.services.firestore_client import firestore_service
+
+UTC = timezone.utc
+
+
+def _at(day, hour=12):
+    return datetime(2024, 1, day, hour, tzinfo=UTC)
+
+
+class _Client:
+    """Synchronous GETs against the app over httpx's ASGI transport"""
+
+    def __init__(self, app):
+        self._app = app
+
+    def get(self, url, params=None):
+        async def request():
+            transport = httpx.ASGITransport(app=self._app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+                return await client.get(url, params=params)
+        return asyncio.run(request())
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    monkeypatch.setattr(admin, '_response_cache', admin._ResponseCache())
+    app = FastAPI()
+    app.include_router(admin.router, prefix='/api/admin')
+    app.dependency_overrides[admin.get_admin_role] = lambda: {
+        'username': 'admin', 'is_admin': True, 'is_sub_admin': False
+    }
+    return _Client(app)
+
+
+# ── /users ────────────────────────────────────────────────────────────────────
+
+def test_user_listing_keeps_users_missing_is_active_or_created_at(client, db):
+    users = db.collection('users')
+    users.add_doc('new', {'username': 'new', 'is_active': True, 'created_at': _at(3)})
+    users.add_doc('old', {'username': 'old', 'is_active': True, 'created_at': _at(1)})
+    users.add_doc('legacy', {'username': 'legacy'})
+    users.add_doc('no_date', {'username': 'no_date', 'is_active': True})
+    users.add_doc('deleted', {'username': 'deleted', 'is_active': False, 'created_at': _at(2)})
+    users.add_doc('legacy_new', {'username': 'legacy_new', 'created_at': _at(4),
+                                 'hashed_password': 'secret'})
+
+    body = client.get('/api/admin/users').json()
+
+    listed = [user['id'] for user in body['users']]
+    assert listed[:3] == ['legacy_new', 'new', 'old']
+    assert set(listed[3:]) == {'legacy', 'no_date'}
+    assert body['next_cursor'] is None
+    assert all('hashed_password' not in user for user in body['users'])
+
+
+def test_user_listing_pages_with_next_cursor(client, db):
+    users = db.collection('users')
+    for day in range(1, 6):
+        users.add_doc(f'u{day}', {'username': f'u{day}', 'is_active': True, 'created_at': _at(day)})
+
+    listed, cursor = [], None
+    while True:
+        params = {'limit': 2, **({'after': cursor} if cursor else {})}
+        body = client.get('/api/admin/users', params=params).json()
+        listed += [user['id'] for user in body['users']]
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+
+    assert listed == ['u5', 'u4', 'u3', 'u2', 'u1']
+    assert client.get('/api/admin/users', params={'limit': 501}).status_code == 422
+
+
+# ── /users/{id}/profile ───────────────────────────────────────────────────────
+
+def _profile_fixture(db, count):
+    db.collection('users').add_doc('u1', {'id': 'u1', 'username': 'one', 'created_at': _at(1)})
+    sessions = db.collection('sessions')
+    for i in range(count):
+        sessions.add_doc(f's{i:03d}', {'id': f's{i:03d}', 'user_id': 'u1', 'session_type': 'chatbot',
+                                      'depression_score': 0.5, 'start_time': _at(1) + timedelta(hours=i)})
+
+
+def test_profile_caps_sessions_at_50_by_default(client, db):
+    _profile_fixture(db, 60)
+
+    first = client.get('/api/admin/users/u1/profile').json()
+    rest = client.get('/api/admin/users/u1/profile', params={'after': first['next_cursor']}).json()
+
+    assert len(first['sessions']) == 50
+    assert first['sessions'][0]['start_time'] == (_at(1) + timedelta(hours=59)).isoformat()
+    assert [s['id'] for s in rest['sessions']] == [f's{i:03d}' for i in range(9, -1, -1)]
+    assert rest['next_cursor'] is None
+    # The totals cover every session, not just the page
+    assert first['statistics']['total_sessions'] == 60
+
+
+def test_profile_pages_sessions_with_a_smaller_limit(client, db):
+    _profile_fixture(db, 5)
+
+    first = client.get('/api/admin/users/u1/profile', params={'limit': 3}).json()
+    rest = client.get('/api/admin/users/u1/profile',
+                      params={'limit': 3, 'after': first['next_cursor']}).json()
+
+    assert [s['id'] for s in first['sessions']] == ['s004', 's003', 's002']
+    assert [s['id'] for s in rest['sessions']] == ['s001', 's000']
+    assert rest['next_cursor'] is None
+
+
+@pytest.mark.parametrize('limit', [0, 201])
+def test_profile_limit_is_bounded(client, limit):
+    assert client.get('/api/admin/users/u1/profile', params={'limit': limit}).status_code == 422
+
+
+# ── /alerts ───────────────────────────────────────────────────────────────────
+
+def test_alerts_page_through_next_cursor(client, db):
+    db.collection('users').add_doc('u1', {'username': 'older_user'})
+    alerts = db.collection('admin_alerts')
+    for day in range(1, 6):
+        alert = {'id': f'a{day}', 'user_id': 'u1', 'alert_type': 'risk', 'severity': 'high',
+                 'message': 'm', 'is_resolved': False, 'created_at': _at(day)}
+        if day > 2:
+            alert['username'] = 'named'
+        alerts.add_doc(f'a{day}', alert)
+
+    listed, cursor = [], None
+    while True:
+        params = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+        body = client.get('/api/admin/alerts', params=params).json()
+        listed += body['alerts']
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+
+    assert [alert['id'] for alert in listed] == ['a5', 'a4', 'a3', 'a2', 'a1']
+    assert [alert['username'] for alert in listed] == ['named'] * 3 + ['older_user'] * 2
+
+
+@pytest.mark.parametrize('limit', [0, 501])
+def test_alerts_limit_is_bounded(client, limit):
+    assert client.get('/api/admin/alerts', params={'limit': limit}).status_code == 422
+
+
+# ── /mood-checkins ────────────────────────────────────────────────────────────
+
+def test_mood_checkins_are_read_off_the_event_loop(client, db, monkeypatch):
+    db.collection('users').add_doc('u1', {'id': 'u1', 'username': 'one', 'email': 'one@example.com'})
+    checkins = db.collection('mood_checkins')
+    for day in range(1, 4):
+        checkins.add_doc(f'm{day}', {'id': f'm{day}', 'user_id': 'u1', 'mood': 'ok',
+                                     'date': f'2024-01-0{day}', 'created_at': _at(day)})
+    threads = []
+    for name in ('get_all_mood_checkins', 'get_users_by_ids'):
+        def recording(*args, _read=getattr(firestore_service, name), **kwargs):
+            threads.append(threading.current_thread())
+            return _read(*args, **kwargs)
+        monkeypatch.setattr(firestore_service, name, recording)
+
+    body = client.get('/api/admin/mood-checkins', params={'limit': 2}).json()
+
+    assert [c['id'] for c in body['checkins']] == ['m3', 'm2']
+    assert {c['username'] for c in body['checkins']} == {'one'}
+    assert body['next_cursor'] == 'm2'
+    assert len(threads) == 2 and threading.main_thread() not in threads
+
+
+# ── Response cache ────────────────────────────────────────────────────────────
+
+def test_response_cache_builds_once_for_concurrent_requests():
+    cache = admin._ResponseCache()
+    calls = []
+
+    async def build():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 'value'
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_build('key', build) for _ in range(5)))
+
+    assert asyncio.run(run()) == ['value'] * 5
+    assert len(calls) == 1
+
+
+def test_response_cache_drops_a_build_that_a_write_raced():
+    cache = admin._ResponseCache()
+    builds = iter(['stale', 'fresh'])
+
+    async def build():
+        value = next(builds)
+        if value == 'stale':
+            cache.clear()  # a write lands while the snapshot is being built
+        return value
+
+    async def run():
+        first = await cache.get_or_build('key', build)
+        second = await cache.get_or_build('key', build)
+        return first, second
+
+    assert asyncio.run(run()) == ('stale', 'fresh')
+
+
+def test_response_cache_clear_forces_a_rebuild():
+    cache = admin._ResponseCache()
+    values = iter([1, 2])
+
+    async def build():
+        return next(values)
+
+    async def run():
+        first = await cache.get_or_build('key', build)
+        cached = await cache.get_or_build('key', build)
+        cache.clear()
+        return first, cached, await cache.get_or_build('key', build)
+
+    assert asyncio.run(run()) == (1, 1, 2)
+
+
+def test_response_cache_evicts_expired_and_oldest_entries(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(admin.time, 'monotonic', lambda: clock[0])
+    cache = admin._ResponseCache(ttl=30, maxsize=3)
+
+    async def fill(keys):
+        for key in keys:
+            async def build(key=key):
+                return key
+            await cache.get_or_build(key, build)
+
+    asyncio.run(fill(range(5)))
+    assert list(cache._data) == [2, 3, 4]
+    assert set(cache._locks) == {2, 3, 4}
+
+    clock[0] += 31
+    asyncio.run(fill(['new']))
+    assert list(cache._data) == ['new']
+    assert set(cache._locks) == {'new'}
+
+
+# ── Timestamps ────────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize('value', [
+    datetime(2024, 1, 2, 3, 4, 5),
+    datetime(2024, 1, 2, 8, 34, 5, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+    DatetimeWithNanoseconds(2024, 1, 2, 3, 4, 5, tzinfo=UTC),
+    '2024-01-02T03:04:05Z',
+    '2024-01-02T03:04:05',
+    '2024-01-02T08:34:05+05:30',
+])
+def test_parse_dt_returns_aware_utc(value):
+    parsed = admin._parse_dt(value)
+    assert parsed == datetime(2024, 1, 2, 3, 4, 5, tzinfo=UTC)
+    assert parsed.utcoffset() == timedelta(0)
+
+
+def test_timestamp_output_formats():
+    value = datetime(2024, 1, 2, 3, 4, 5, tzinfo=UTC)
+    assert admin._iso_utc(value) == '2024-01-02T03:04:05+00:00'
+    assert admin._epoch_millis(value) == 1704164645000
+    assert admin._epoch_millis(datetime(2024, 1, 2, 3, 4, 5)) == 1704164645000
+    assert admin._parse_dt(None) is None
+    assert admin._parse_dt('not a date') is None
+    assert admin._iso_utc('') is None
@@ -0,0 +1,155 @@
+"""Auth: the token -> user cache, argon2 rehashing and upload streaming"""
+
+import asyncio
+import io
+from datetime import timedelta
+from types import SimpleNamespace
+
+import bcrypt
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.routes import auth
+from app.services.firestore_client import firestore_service
+
+
+@pytest.fixture(autouse=True)
+def empty_user_cache():
+    auth.invalidate_user_cache()
+    yield
+    auth.invalidate_user_cache()
+
+
+def _authenticate(token):
+    credentials = HTTPAuthorizationCredentials(scheme='Bearer', credentials=token)
+    request = SimpleNamespace(state=SimpleNamespace())
+    return asyncio.run(auth.get_current_user(request, credentials))
+
+
+def _token(username, minutes=30):
+    return auth.create_access_token({'sub': username}, expires_delta=timedelta(minutes=minutes))
+
+
+@pytest.fixture
+def lookups(db, monkeypatch):
+    """Count the Firestore user lookups made while authenticating"""
+    calls = []
+    lookup = firestore_service.get_user_by_username
+
+    def counted(username):
+        calls.append(username)
+        return lookup(username)
+    monkeypatch.setattr(firestore_service, 'get_user_by_username', counted)
+    return calls
+
+
+# ── Token cache ───────────────────────────────────────────────────────────────
+
+def test_token_cache_reads_the_user_once(db, lookups):
+    db.collection('users').add_doc('u1', {'id': 'u1', 'username': 'ann', 'is_active': True})
+    token = _token('ann')
+
+    assert _authenticate(token)['username'] == 'ann'
+    assert _authenticate(token)['username'] == 'ann'
+    assert lookups == ['ann']
+
+    auth.invalidate_user_cache()
+    _authenticate(token)
+    assert lookups == ['ann', 'ann']
+
+
+def test_cached_user_is_a_copy(db, lookups):
+    db.collection('users').add_doc('u1', {'id': 'u1', 'username': 'ann'})
+    token = _token('ann')
+
+    _authenticate(token)['username'] = 'changed'
+
+    assert _authenticate(token)['username'] == 'ann'
+
+
+def test_deactivated_user_is_refused_fresh_and_cached(db, lookups):
+    db.collection('users').add_doc('u1', {'id': 'u1', 'username': 'ann', 'is_active': False})
+    token = _token('ann')
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as error:
+            _authenticate(token)
+        assert error.value.status_code == 401
+    assert lookups == ['ann']
+
+
+def test_deleted_user_is_refused_after_invalidation(db, lookups):
+    users = db.collection('users')
+    users.add_doc('u1', {'id': 'u1', 'username': 'ann'})
+    token = _token('ann')
+    _authenticate(token)
+
+    users.document('u1').delete()
+    auth.invalidate_user_cache()
+
+    with pytest.raises(HTTPException):
+        _authenticate(token)
+
+
+def test_cache_entry_never_outlives_the_token(db):
+    auth._cache_user('expired', {'exp': 0}, {'username': 'ann'})
+    assert auth._get_cached_user('expired') is None
+
+
+# ── Password hashing ──────────────────────────────────────────────────────────
+
+def test_new_hashes_are_argon2_and_verify():
+    hashed = auth.get_password_hash('correct horse')
+    assert hashed.startswith('$argon2id$')
+    assert auth.verify_password('correct horse', hashed)
+    assert not auth.verify_password('wrong', hashed)
+    assert not auth.password_needs_rehash(hashed)
+
+
+def test_legacy_bcrypt_hashes_verify_and_need_rehash():
+    hashed = bcrypt.hashpw(b'correct horse', bcrypt.gensalt(rounds=4)).decode()
+    assert auth.verify_password('correct horse', hashed)
+    assert not auth.verify_password('wrong', hashed)
+    assert auth.password_needs_rehash(hashed)
+
+
+def test_rehash_writes_to_the_resolved_document(db):
+    legacy_hash = bcrypt.hashpw(b'pw', bcrypt.gensalt(rounds=4)).decode()
+    users = db.collection('users')
+    users.add_doc('doc1', {'id': 'legacy-id', 'username': 'ann', 'hashed_password': legacy_hash})
+
+    auth._rehash_password('legacy-id', 'pw')
+
+    stored = users.document('doc1').get().to_dict()['hashed_password']
+    assert stored.startswith('$argon2id$')
+    assert auth.verify_password('pw', stored)
+    assert not users.document('legacy-id').get().exists
+
+
+def test_rehash_of_a_missing_user_writes_nothing(db):
+    auth._rehash_password('nobody', 'pw')
+    assert not list(db.collection('users').stream())
+
+
+# ── Upload streaming ──────────────────────────────────────────────────────────
+
+class _ChunkRecorder(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.reads = []
+
+    def read(self, size=-1):
+        self.reads.append(size)
+        return super().read(size)
+
+
+def test_save_upload_streams_in_bounded_chunks(tmp_path):
+    data = bytes(range(256)) * 10_000  # ~2.5 MiB
+    source = _ChunkRecorder(data)
+    target = tmp_path / 'image.png'
+
+    auth._save_upload(source, str(target))
+
+    assert target.read_bytes() == data
+    assert source.reads and all(0 < size <= 1 << 20 for size in source.reads)
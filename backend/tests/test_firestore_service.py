@@ -0,0 +1,314 @@
+"""FirestoreService queries, paging cursors and aggregation summaries"""
+
+import asyncio
+import runpy
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from app.services.firestore_client import firestore_service
+from app.services.firestore_service import FirestoreService
+from tests.fake_firestore import FakeBatch, FakeQuery
+
+UTC = timezone.utc
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def _at(day, hour=12):
+    return datetime(2024, 1, day, hour, tzinfo=UTC)
+
+
+def _on_io_executor(coro):
+    """Run coro on a loop whose default executor names its threads io-*"""
+    async def main():
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=4, thread_name_prefix='io'))
+        return await coro
+    return asyncio.run(main())
+
+
+# ── Session sort ──────────────────────────────────────────────────────────────
+
+def test_sort_sessions_mixes_naive_aware_and_string_times():
+    sessions = [
+        {'id': 'naive', 'start_time': datetime(2024, 1, 2, 12)},
+        {'id': 'aware', 'start_time': _at(3)},
+        {'id': 'missing'},
+        {'id': 'iso_z', 'start_time': '2024-01-04T12:00:00Z'},
+        {'id': 'iso_naive', 'start_time': '2024-01-01T12:00:00'},
+        {'id': 'garbage', 'start_time': 'not a date'},
+    ]
+    FirestoreService._sort_sessions(sessions)
+    assert [s['id'] for s in sessions[:4]] == ['iso_z', 'aware', 'naive', 'iso_naive']
+    assert {s['id'] for s in sessions[4:]} == {'missing', 'garbage'}
+
+
+def test_users_statistics_with_mixed_timestamps(db):
+    users = db.collection('users')
+    users.add_doc('u1', {'id': 'u1', 'username': 'one', 'is_active': True})
+    sessions = db.collection('sessions')
+    sessions.add_doc('s1', {'id': 's1', 'user_id': 'u1', 'start_time': datetime(2024, 1, 1, 9),
+                            'depression_score': 0.2, 'risk_level': 'low'})
+    sessions.add_doc('s2', {'id': 's2', 'user_id': 'u1', 'start_time': _at(2),
+                            'depression_score': 0.4, 'risk_level': 'high'})
+    sessions.add_doc('s3', {'id': 's3', 'user_id': 'u1', 'session_type': 'video'})
+    checkins = db.collection('mood_checkins')
+    checkins.add_doc('m1', {'user_id': 'u1', 'mood': 'sad', 'created_at': datetime(2024, 1, 1)})
+    checkins.add_doc('m2', {'user_id': 'u1', 'mood': 'happy', 'created_at': _at(2)})
+
+    stats = asyncio.run(firestore_service.aget_users_statistics([{'id': 'u1', 'username': 'one'}]))
+
+    assert stats['u1']['total_sessions'] == 3
+    assert stats['u1']['video_consultations'] == 1
+    assert [s['id'] for s in stats['u1']['sessions']] == ['s2', 's1', 's3']
+    assert stats['u1']['risk_level'] == 'high'
+
+
+# ── User lookup ───────────────────────────────────────────────────────────────
+
+def test_find_user_doc_queries_the_id_field_only_on_a_miss(db, monkeypatch):
+    users = db.collection('users')
+    users.add_doc('doc1', {'id': 'doc1', 'username': 'direct'})
+    users.add_doc('doc2', {'id': 'legacy-id', 'username': 'legacy'})
+    queries = []
+    stream = FakeQuery.stream
+    monkeypatch.setattr(FakeQuery, 'stream', lambda self: queries.append(self._filters) or stream(self))
+
+    assert firestore_service.find_user_doc('doc1') == ('doc1', {'id': 'doc1', 'username': 'direct'})
+    assert queries == []
+
+    assert firestore_service.find_user_doc('legacy-id') == ('doc2', {'id': 'legacy-id', 'username': 'legacy'})
+    assert firestore_service.find_user_doc('missing') == (None, None)
+    assert queries == [(('id', '==', 'legacy-id'),), (('id', '==', 'missing'),)]
+
+
+# ── Bulk statistics ───────────────────────────────────────────────────────────
+
+def test_users_statistics_fan_out_on_the_default_executor(db, monkeypatch):
+    users = [{'id': f'u{i}', 'username': f'user{i}'} for i in range(45)]  # two 'in' chunks
+    sessions = db.collection('sessions')
+    for i in range(45):
+        sessions.add_doc(f's{i}', {'id': f's{i}', 'user_id': f'u{i}', 'start_time': _at(1 + i % 20),
+                                   'session_type': 'video' if i % 3 == 0 else 'chatbot'})
+    threads = []
+    fetch = firestore_service._get_docs_for_users
+
+    def recording_fetch(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return fetch(*args, **kwargs)
+    monkeypatch.setattr(firestore_service, '_get_docs_for_users', recording_fetch)
+
+    stats = _on_io_executor(firestore_service.aget_users_statistics(users))
+
+    assert set(stats) == {user['id'] for user in users}
+    assert all(stats[f'u{i}']['total_sessions'] == 1 for i in range(45))
+    assert stats['u3']['video_consultations'] == 1
+    # 2 chunks x sessions, mood check-ins and typing analyses
+    assert len(threads) == 6
+    assert all(name.startswith('io') for name in threads)
+
+
+def test_session_summary_reads_run_on_the_default_executor(db, monkeypatch):
+    sessions = db.collection('sessions')
+    rows = [('s1', 'video', 0.2, 1), ('s2', 'clinic', 0.4, 2), ('s3', 'chatbot', None, 3),
+            ('s4', 'phq9', 0.6, 4)]
+    for session_id, session_type, score, day in rows:
+        data = {'id': session_id, 'user_id': 'u1', 'session_type': session_type, 'start_time': _at(day)}
+        if score is not None:
+            data['depression_score'] = score
+        if session_type == 'phq9':
+            data['phq9_score'] = 12
+        sessions.add_doc(session_id, data)
+    sessions.add_doc('other', {'id': 'other', 'user_id': 'u2', 'session_type': 'video',
+                               'depression_score': 1.0, 'start_time': _at(5)})
+    threads = []
+    reads = firestore_service._session_summary_reads
+
+    def recording_reads(user_id):
+        def record(read):
+            return lambda: threads.append(threading.current_thread().name) or read()
+        return [record(read) for read in reads(user_id)]
+    monkeypatch.setattr(firestore_service, '_session_summary_reads', recording_reads)
+
+    summary = _on_io_executor(firestore_service.aget_session_summary('u1'))
+
+    assert summary['total_sessions'] == 4
+    assert abs(summary['average_depression_score'] - 0.4) < 1e-9
+    assert summary['video_consultations'] == 1
+    assert summary['clinic_consultations'] == 1
+    assert summary['last_session']['id'] == 's4'
+    assert summary['latest_phq9']['phq9_score'] == 12
+    assert len(threads) == 5 and all(name.startswith('io') for name in threads)
+    assert firestore_service._get_session_summary('u1') == summary
+
+
+# ── Paging cursors ────────────────────────────────────────────────────────────
+
+def _pages(fetch, key):
+    """Follow a cursor to the end, returning the pages"""
+    pages, cursor = [], None
+    while True:
+        page = fetch(cursor)
+        pages.append(page)
+        if not page:
+            return pages
+        cursor = page[-1][key]
+
+
+def test_user_sessions_page_cursor_walks_every_session_once(db):
+    sessions = db.collection('sessions')
+    for day in range(1, 8):
+        sessions.add_doc(f's{day}', {'id': f's{day}', 'user_id': 'u1', 'start_time': _at(day)})
+    sessions.add_doc('other', {'id': 'other', 'user_id': 'u2', 'start_time': _at(5)})
+
+    pages = _pages(lambda after: firestore_service.get_user_sessions_page(
+        'u1', limit=3, start_after_id=after), 'id')
+
+    assert [[s['id'] for s in page] for page in pages] == [
+        ['s7', 's6', 's5'], ['s4', 's3', 's2'], ['s1'], []
+    ]
+    # Only the listed fields are read
+    assert set(pages[0][0]) <= set(FirestoreService.SESSION_LIST_FIELDS)
+
+
+def test_alerts_cursor_pages_in_created_order(db):
+    alerts = db.collection('admin_alerts')
+    for day in range(1, 6):
+        alerts.add_doc(f'a{day}', {'id': f'a{day}', 'user_id': 'u1', 'is_resolved': day % 2 == 0,
+                                   'created_at': _at(day)})
+
+    pages = _pages(lambda cursor: firestore_service.get_alerts(limit=2, cursor=cursor), 'id')
+    assert [[a['id'] for a in page] for page in pages] == [['a5', 'a4'], ['a3', 'a2'], ['a1'], []]
+
+    unresolved = firestore_service.get_alerts(resolved=False)
+    assert [a['id'] for a in unresolved] == ['a5', 'a3', 'a1']
+
+
+def test_mood_checkins_cursor_pages(db):
+    checkins = db.collection('mood_checkins')
+    for day in range(1, 6):
+        checkins.add_doc(f'm{day}', {'user_id': 'u1', 'mood': 'ok', 'date': f'2024-01-0{day}',
+                                     'created_at': _at(day)})
+
+    pages = _pages(lambda after: firestore_service.get_all_mood_checkins(
+        limit=2, start_after_id=after), 'id')
+    assert [[c['id'] for c in page] for page in pages] == [['m5', 'm4'], ['m3', 'm2'], ['m1'], []]
+
+    in_range = firestore_service.get_all_mood_checkins(start_date='2024-01-02', end_date='2024-01-04')
+    assert [c['id'] for c in in_range] == ['m4', 'm3', 'm2']
+
+
+# ── Aggregation summaries ─────────────────────────────────────────────────────
+
+def test_session_counters_are_summed_over_shards(db, monkeypatch):
+    shard_ids = iter([0, 3, 3, 7])
+    monkeypatch.setattr('app.services.firestore_service.random.randrange', lambda n: next(shard_ids))
+    for session_type in ['chatbot', 'video', 'video', 'clinic']:
+        firestore_service._increment_session_counters(session_type)
+
+    assert firestore_service._get_session_counters() == {
+        'total_sessions': 4,
+        'session_types': {'chatbot': 1, 'video': 2, 'clinic': 1},
+    }
+    assert len(list(firestore_service._counter_shards_ref().stream())) == 3
+
+
+def test_create_session_survives_a_failed_counter_update(db, monkeypatch):
+    def fail(session_type):
+        raise RuntimeError('contention')
+    monkeypatch.setattr(firestore_service, '_increment_session_counters', fail)
+
+    session_id = firestore_service.create_session({'user_id': 'u1', 'session_type': 'chatbot'})
+
+    assert db.collection('sessions').document(session_id).get().exists
+
+
+def test_dashboard_summary_counts_patients_only(db):
+    now = datetime.now(UTC)
+    old = now - timedelta(days=90)
+    users = db.collection('users')
+    rows = [
+        # id, gender, admin, sub-admin, active, created
+        ('p1', 'male', False, False, True, now),
+        ('p2', 'female', False, False, True, old),
+        ('p3', 'female', False, False, True, old),
+        ('p4', None, False, False, True, now),
+        ('gone', 'male', False, False, False, now),
+        ('admin', 'male', True, False, True, now),
+        ('sub', 'female', False, True, True, old),
+        ('both', 'male', True, True, True, now),
+    ]
+    for user_id, gender, is_admin, is_sub_admin, is_active, created_at in rows:
+        data = {'id': user_id, 'is_admin': is_admin, 'is_sub_admin': is_sub_admin,
+                'is_active': is_active, 'created_at': created_at}
+        if gender:
+            data['gender'] = gender
+        users.add_doc(user_id, data)
+    firestore_service._counter_shards_ref().document('0').set(
+        {'total_sessions': 5, 'session_types': {'video': 2, 'clinic': 1, 'chatbot': 2}})
+
+    summary = asyncio.run(firestore_service.aget_dashboard_summary())
+
+    assert summary == {
+        'total_patients': 4,
+        'new_patients': 2,
+        'old_patients': 2,
+        'total_sessions': 5,
+        'video_consultations': 2,
+        'clinic_consultations': 1,
+        'male': 1,
+        'female': 2,
+        'other': 1,
+    }
+
+
+def test_new_users_carry_the_role_flags_the_patient_counts_filter_on(db):
+    user_id = firestore_service.create_user({'username': 'new', 'is_admin': True})
+    user = db.collection('users').document(user_id).get().to_dict()
+    assert (user['is_active'], user['is_admin'], user['is_sub_admin']) == (True, True, False)
+
+
+# ── Batched writes ────────────────────────────────────────────────────────────
+
+def _count_commits(monkeypatch):
+    commits = []
+    commit = FakeBatch.commit
+    monkeypatch.setattr(FakeBatch, 'commit', lambda self: commits.append(len(self._writes)) or commit(self))
+    return commits
+
+
+def test_batch_write_commits_every_500_writes(db, monkeypatch):
+    commits = _count_commits(monkeypatch)
+    sessions = db.collection('sessions')
+    for i in range(1001):
+        sessions.add_doc(f's{i}', {'id': f's{i}', 'user_id': 'u1'})
+
+    written = firestore_service.batch_write((sessions.document(f's{i}'), {'mood': 'ok'}) for i in range(1001))
+
+    assert written == 1001
+    assert commits == [500, 500, 1]
+    assert all(doc.to_dict()['mood'] == 'ok' for doc in sessions.stream())
+    assert firestore_service.batch_write(iter(())) == 0
+    assert commits == [500, 500, 1]
+
+
+def test_backfill_user_is_active_fills_only_missing_fields(db, monkeypatch):
+    monkeypatch.setattr('app.services.firestore_service.get_firestore_db', lambda: db)
+    commits = _count_commits(monkeypatch)
+    users = db.collection('users')
+    created = _at(1)
+    users.add_doc('legacy', {'username': 'legacy'}, create_time=created)
+    users.add_doc('admin', {'username': 'admin', 'is_admin': True, 'is_active': True}, create_time=created)
+    users.add_doc('done', {'username': 'done', 'is_active': False, 'is_admin': False,
+                           'is_sub_admin': False, 'created_at': _at(2)})
+
+    runpy.run_path(str(BACKEND_DIR / 'backfill_user_is_active.py'))
+
+    get = lambda user_id: users.document(user_id).get().to_dict()
+    assert get('legacy') == {'username': 'legacy', 'is_active': True, 'is_admin': False,
+                             'is_sub_admin': False, 'created_at': created}
+    assert get('admin') == {'username': 'admin', 'is_active': True, 'is_admin': True,
+                            'is_sub_admin': False, 'created_at': created}
+    assert get('done')['is_active'] is False
+    assert commits == [2]
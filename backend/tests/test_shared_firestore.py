@@ -0,0 +1,23 @@
+"""Services reuse the one shared FirestoreService instead of building their own"""
+
+import importlib
+
+import pytest
+
+from app.services.firestore_client import firestore_service
+
+
+@pytest.mark.parametrize('module, cls', [
+    ('app.services.call_service', 'CallService'),
+    ('app.services.digital_twin_service', 'DigitalTwinService'),
+    ('app.services.batch_fake_detection', 'BatchFakeDetectionService'),
+    ('app.services.voice_call_service', 'VoiceCallService'),
+])
+def test_services_share_the_firestore_client(module, cls):
+    try:
+        service_module = importlib.import_module(module)
+    except ImportError as e:  # optional speech/TTS SDKs
+        pytest.skip(str(e))
+    assert service_module.firestore_service is firestore_service
+    if cls != 'VoiceCallService':  # builds speech and OpenAI clients
+        assert getattr(service_module, cls)().firestore_service is firestore_service
@@ -0,0 +1,138 @@
+"""Keystroke stress serving: the micro-batcher and the score cache"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.services import stress_analysis
+
+
+class _Model:
+    """predict_proba stand-in that records each batch it scores"""
+
+    classes_ = np.array([0, 1, 2])
+
+    def __init__(self):
+        self.batches = []
+
+    def predict_proba(self, X):
+        self.batches.append(len(X))
+        hold = X['hold_mean'].to_numpy(dtype=np.float64)
+        return np.column_stack([1 - hold, hold, np.zeros_like(hold)])
+
+
+@pytest.fixture
+def model(monkeypatch):
+    fake = _Model()
+    monkeypatch.setattr(stress_analysis, '_model', fake)
+    monkeypatch.setattr(stress_analysis, '_classes', fake.classes_)
+    monkeypatch.setattr(stress_analysis, '_feature_cols', stress_analysis.FEATURE_COLS)
+    monkeypatch.setattr(stress_analysis, '_feature_idx', None)
+    monkeypatch.setattr(stress_analysis, '_model_tail', None)
+    monkeypatch.setattr(stress_analysis, '_score_cache', stress_analysis._ScoreCache())
+    monkeypatch.setattr(stress_analysis, '_batcher', stress_analysis._PredictionBatcher())
+    return fake
+
+
+def _events(hold, n=10):
+    return [{'press_time': i * 0.3, 'release_time': i * 0.3 + hold, 'is_backspace': False}
+            for i in range(n)]
+
+
+# ── Micro-batcher ─────────────────────────────────────────────────────────────
+
+def test_concurrent_requests_share_one_batch_and_match_predict(model):
+    service = stress_analysis.StressAnalysisService.__new__(stress_analysis.StressAnalysisService)
+    sessions = [_events(hold) for hold in (0.1, 0.2, 0.25, 0.4)]
+
+    async def main():
+        return await asyncio.gather(*(service.predict_async(events) for events in sessions))
+
+    batched = asyncio.run(main())
+
+    assert model.batches == [4]
+    stress_analysis._score_cache._data.clear()
+    assert batched == [service.predict(events) for events in sessions]
+
+
+def test_a_failed_cycle_fails_its_callers_and_the_batcher_keeps_serving(monkeypatch):
+    batcher = stress_analysis._PredictionBatcher(max_latency_ms=5)
+    calls = []
+
+    def predict_proba(X):
+        calls.append(len(X))
+        if len(calls) == 1:
+            raise RuntimeError('model exploded')
+        return np.ones((len(X), 3))
+    monkeypatch.setattr(stress_analysis, '_predict_proba', predict_proba)
+
+    async def main():
+        first = await asyncio.gather(batcher.submit(np.zeros(10)), batcher.submit(np.zeros(10)),
+                                     return_exceptions=True)
+        # Rows that cannot be stacked fail inside the cycle, outside scoring
+        mismatched = await asyncio.gather(batcher.submit(np.zeros(10)), batcher.submit(np.zeros(3)),
+                                          return_exceptions=True)
+        after = await asyncio.wait_for(batcher.submit(np.zeros(10)), 1)
+        return first, mismatched, after
+
+    first, mismatched, after = asyncio.run(main())
+
+    assert [str(e) for e in first] == ['model exploded'] * 2
+    assert all(isinstance(e, ValueError) for e in mismatched)
+    assert after.tolist() == [1.0, 1.0, 1.0]
+
+
+def test_the_batcher_restarts_on_a_new_event_loop(monkeypatch):
+    batcher = stress_analysis._PredictionBatcher(max_latency_ms=1)
+    monkeypatch.setattr(stress_analysis, '_predict_proba', lambda X: np.ones((len(X), 3)))
+
+    for _ in range(2):
+        result = asyncio.run(asyncio.wait_for(batcher.submit(np.zeros(10)), 1))
+        assert result.tolist() == [1.0, 1.0, 1.0]
+
+
+def test_cancelling_the_batcher_cancels_waiting_callers(monkeypatch):
+    batcher = stress_analysis._PredictionBatcher(max_latency_ms=1000)
+
+    async def main():
+        waiting = asyncio.ensure_future(batcher.submit(np.zeros(10)))
+        await asyncio.sleep(0.01)
+        batcher._task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+    asyncio.run(main())
+
+
+# ── Score cache ───────────────────────────────────────────────────────────────
+
+def test_score_cache_stays_consistent_under_threads():
+    cache = stress_analysis._ScoreCache(maxsize=64)
+    proba = np.ones(3)
+
+    def hammer(worker):
+        for i in range(2000):
+            key = ((worker * 7 + i) % 200,)
+            if cache.get(key) is None:
+                cache.put(key, proba)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(hammer, range(8)))
+
+    stats = cache.stats()
+    assert stats['size'] == 64
+    assert stats['hits'] + stats['misses'] == 8 * 2000
+    assert len(cache._data) == 64
+
+
+def test_score_cache_evicts_least_recently_used():
+    cache = stress_analysis._ScoreCache(maxsize=2)
+    cache.put(('a',), np.zeros(3))
+    cache.put(('b',), np.zeros(3))
+    cache.get(('a',))
+    cache.put(('c',), np.zeros(3))
+
+    assert list(cache._data) == [('a',), ('c',)]
+    assert cache.stats() == {'size': 2, 'hits': 1, 'misses': 0, 'hit_rate': 1.0}
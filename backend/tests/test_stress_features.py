@@ -0,0 +1,203 @@
+"""
+Parity of the vectorised keystroke feature code with the original pandas /
+row-loop implementations, which are kept here as the reference.
+"""
+
+import glob
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import stress_analysis
+
+STRESS_DIR = Path(__file__).resolve().parents[2] / 'ai_models' / 'stress'
+RAW_DIR = Path(__file__).resolve().parents[1] / 'app' / 'data' / 'keystroke_stress'
+sys.path.insert(0, str(STRESS_DIR))
+import parse_raw_keystroke_data as raw_parser  # noqa: E402
+
+
+# ── Serving features (stress_analysis) ────────────────────────────────────────
+
+def _reference_features(events):
+    """The original DataFrame-based stress_analysis._extract_features"""
+    cols = stress_analysis.FEATURE_COLS
+    if not events:
+        return {col: 0.0 for col in cols}
+    df = pd.DataFrame(events).rename(columns={
+        'press_time': 'Press_Time', 'release_time': 'Release_Time', 'key': 'Key',
+    })
+    for col in ['Press_Time', 'Release_Time']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df = df.dropna(subset=['Press_Time', 'Release_Time']).reset_index(drop=True)
+    if df.empty:
+        return {col: 0.0 for col in cols}
+    df = df.sort_values('Press_Time').reset_index(drop=True)
+    df['Hold'] = (df['Release_Time'] - df['Press_Time']).clip(lower=0)
+    df['DD'] = df['Press_Time'].diff()
+    df['UD'] = df['Press_Time'] - df['Release_Time'].shift(1)
+    is_backspace = df.get('is_backspace', pd.Series(False, index=df.index))
+    is_backspace = is_backspace.fillna(False).astype(bool)
+    total = len(df)
+    duration = float(df['Press_Time'].iloc[-1] - df['Press_Time'].iloc[0])
+    dd_valid = df['DD'].dropna()
+    ud_valid = df['UD'].dropna()
+    threshold = stress_analysis.PAUSE_THRESHOLD_S
+    return {
+        'hold_mean': float(df['Hold'].mean()),
+        'hold_std': float(df['Hold'].std(ddof=0)),
+        'dd_mean': float(dd_valid.mean()) if len(dd_valid) else 0.0,
+        'dd_std': float(dd_valid.std(ddof=0)) if len(dd_valid) else 0.0,
+        'ud_mean': float(ud_valid.mean()) if len(ud_valid) else 0.0,
+        'ud_std': float(ud_valid.std(ddof=0)) if len(ud_valid) else 0.0,
+        'long_pause_dd_ratio': float((dd_valid > threshold).mean()) if len(dd_valid) else 0.0,
+        'long_pause_ud_ratio': float((ud_valid > threshold).mean()) if len(ud_valid) else 0.0,
+        'backspace_ratio': int(is_backspace.sum()) / total if total > 0 else 0.0,
+        'typing_speed_cps': total / duration if duration > 0 else 0.0,
+    }
+
+
+def _random_session(rng, n):
+    start = 1_737_325_113.0
+    press = start + np.cumsum(rng.exponential(0.35, n) + 1e-3)
+    events = []
+    for p in rng.permutation(press):  # arrive out of order
+        events.append({
+            'key': 'a',
+            'press_time': float(p),
+            'release_time': float(p + rng.uniform(0.02, 0.4)),
+            'is_backspace': bool(rng.random() < 0.1),
+        })
+    return events
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_feature_vector_matches_reference(seed):
+    rng = np.random.default_rng(seed)
+    events = _random_session(rng, int(rng.integers(1, 120)))
+    if seed % 4 == 0 and len(events) > 2:
+        events[1]['press_time'] = None         # dropped by both
+        events[2]['release_time'] = 'garbage'  # coerced to NaN, dropped by both
+
+    expected = _reference_features(events)
+    actual = stress_analysis._extract_features(events)
+
+    assert list(actual) == stress_analysis.FEATURE_COLS
+    np.testing.assert_allclose([actual[c] for c in expected], list(expected.values()), rtol=1e-5, atol=1e-6)
+
+
+@pytest.mark.parametrize('events', [
+    [],
+    [{'press_time': None, 'release_time': None}],
+    [{'press_time': 1.0, 'release_time': 1.2}],
+])
+def test_feature_vector_edge_cases_match_reference(events):
+    expected = _reference_features(events)
+    actual = stress_analysis._extract_features(events)
+    np.testing.assert_allclose([actual[c] for c in expected], list(expected.values()), atol=1e-6)
+
+
+# ── Training rep segmentation (parse_raw_keystroke_data) ──────────────────────
+
+def _reference_repetitions(session_df, user_id, session_id):
+    """The original row-loop parse_repetitions"""
+    rows, buffer, rep_num = [], [], 0
+    for _, row in session_df.iterrows():
+        buffer.append(row)
+        if row['Key_Pressed'] == 'Key.enter' and len(buffer) > 4:
+            rep_df = pd.DataFrame(buffer)
+            typing = rep_df[rep_df['Key_Pressed'] != 'Key.enter']
+            is_bsp = rep_df['Key_Pressed'].astype(str).str.contains('backspace', case=False, na=False)
+            if len(typing) < 5:
+                buffer = []
+                continue
+            hold_vals = pd.to_numeric(typing['Hold_Time'], errors='coerce').dropna()
+            dd_vals = pd.to_numeric(typing['DD'], errors='coerce').dropna()
+            ud_vals = pd.to_numeric(typing['UD'], errors='coerce').dropna()
+            pt = pd.to_numeric(rep_df['Press_Time'], errors='coerce').dropna()
+            duration = float(pt.max() - pt.min()) if len(pt) >= 2 else np.nan
+            key_count = len(rep_df)
+            speed = key_count / duration if (duration and duration > 0) else np.nan
+            rows.append({
+                'User_ID': user_id,
+                'Session_ID': session_id,
+                'rep_num': rep_num,
+                'hold_mean': float(hold_vals.mean()) if len(hold_vals) else np.nan,
+                'hold_std': float(hold_vals.std()) if len(hold_vals) else np.nan,
+                'dd_mean': float(dd_vals.mean()) if len(dd_vals) else np.nan,
+                'dd_std': float(dd_vals.std()) if len(dd_vals) else np.nan,
+                'ud_mean': float(ud_vals.mean()) if len(ud_vals) else np.nan,
+                'ud_std': float(ud_vals.std()) if len(ud_vals) else np.nan,
+                'long_pause_dd_ratio': float((dd_vals > 1.0).mean()) if len(dd_vals) else np.nan,
+                'long_pause_ud_ratio': float((ud_vals > 1.0).mean()) if len(ud_vals) else np.nan,
+                'backspace_ratio': float(is_bsp.sum() / key_count),
+                'typing_speed_cps': speed,
+                'data_source': 'participant_raw_data',
+            })
+            rep_num += 1
+            buffer = []
+    return pd.DataFrame(rows, columns=raw_parser.REP_COLUMNS)
+
+
+def _reference_label(row):
+    """The original row-wise assign_stress_label"""
+    score = sum([
+        pd.notna(row['hold_mean']) and row['hold_mean'] > raw_parser.THR_HOLD_MEAN,
+        pd.notna(row['dd_mean']) and row['dd_mean'] > raw_parser.THR_DD_MEAN,
+        pd.notna(row['typing_speed_cps']) and row['typing_speed_cps'] < raw_parser.THR_TYPING_SPEED,
+        pd.notna(row['backspace_ratio']) and row['backspace_ratio'] > raw_parser.THR_BACKSPACE_RATIO,
+        pd.notna(row['long_pause_dd_ratio']) and row['long_pause_dd_ratio'] > raw_parser.THR_LONG_PAUSE_RATIO,
+    ])
+    return 0 if score <= 1 else 1 if score == 2 else 2
+
+
+RAW_FILES = sorted(glob.glob(str(RAW_DIR / '*_keystroke_raw.csv')))
+
+
+@pytest.mark.skipif(not RAW_FILES, reason='raw keystroke CSVs not present')
+@pytest.mark.parametrize('path', RAW_FILES, ids=lambda p: Path(p).name)
+def test_parse_repetitions_matches_reference(path):
+    df = raw_parser.read_raw_csv(path)
+    compared = 0
+    for (uid, sid), session in df.groupby(['User_ID', 'Session_ID'], sort=False):
+        expected = _reference_repetitions(session, str(uid), int(sid))
+        actual = raw_parser.parse_repetitions(session, str(uid), int(sid))
+        assert len(actual) == len(expected)
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False, rtol=1e-9)
+        compared += len(actual)
+    assert compared > 0
+
+
+def test_parse_repetitions_carries_short_runs_and_drops_short_reps():
+    keys = ['a', 'Key.enter',                             # short run carries over
+            'b', 'c', 'Key.backspace', 'd', 'e', 'f', 'Key.enter',
+            'g', 'h', 'i', 'j', 'Key.enter']              # only 4 typed keys: dropped
+    n = len(keys)
+    session = pd.DataFrame({
+        'User_ID': 'u', 'Session_ID': 1, 'Key_Pressed': keys,
+        'Press_Time': np.arange(n) * 0.5, 'Hold_Time': np.linspace(0.1, 0.3, n),
+        'DD': np.r_[np.nan, np.full(n - 1, 0.5)], 'UD': np.r_[np.nan, np.full(n - 1, 1.5)],
+    })
+    expected = _reference_repetitions(session, 'u', 1)
+    actual = raw_parser.parse_repetitions(session, 'u', 1)
+    assert len(actual) == 1
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_vectorised_labels_match_reference():
+    rng = np.random.default_rng(0)
+    n = 500
+    feats = pd.DataFrame({
+        'hold_mean': rng.uniform(0, 0.6, n),
+        'dd_mean': rng.uniform(0, 1.1, n),
+        'typing_speed_cps': rng.uniform(0, 5, n),
+        'backspace_ratio': rng.uniform(0, 0.16, n),
+        'long_pause_dd_ratio': rng.uniform(0, 0.36, n),
+    })
+    feats.iloc[::7, 0] = np.nan
+    feats.iloc[::11, 2] = np.nan
+
+    expected = feats.apply(_reference_label, axis=1).to_numpy()
+    np.testing.assert_array_equal(raw_parser.assign_stress_labels(feats), expected)